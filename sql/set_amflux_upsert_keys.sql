@@ -0,0 +1,5 @@
+CREATE UNIQUE INDEX IF NOT EXISTS amfluxeddy_stationid_timestamp_end_key
+    ON amfluxeddy (stationid, timestamp_end);
+
+CREATE UNIQUE INDEX IF NOT EXISTS amfluxmet_stationid_timestamp_end_key
+    ON amfluxmet (stationid, timestamp_end);
@@ -14,43 +14,76 @@ The main components of the package are:
 - `StationDataProcessor`: For processing and managing station data.
 """
 
-from .reader import AmerifluxDataProcessor
-from .format.reformatter import Reformatter
-from .report import tools
-from .report import graphs
-from .station_data_pull import StationDataDownloader, StationDataProcessor
-from .format import headers
-from .format import reformatter_vars
-from .qaqc import variable_limits, netrad_limits
-from .format import compare
-from .report import validate
-from .report import fix_g_values
-from .report import recalculate_albedo
-from .report import gap_summary
-from .report import eddy_plots
-from .format import transformers
-from .format import merge
-from .format import file_compile
-from .qaqc import data_cleaning
-from .report import easyflux_footprint, alfalfa_growth
-from .report.alfalfa_growth import (
-    simulate_alfalfa_height_multi_field,
-    AlfalfaHeightParams,
-)
-from .format.transformers import (
-    columns,
-    timestamps,
-    validation,
-    corrections,
-    cleanup,
-    interval_updates,
-    MISSING_VALUE,
-)
+import importlib
+
+# Public names are resolved on first access (PEP 562) so that importing the
+# package only costs pandas/numpy; plotting, database and ML dependencies
+# load when the module that needs them is first touched.
+_LAZY_ATTRS = {
+    "AmerifluxDataProcessor": ("micromet.reader", "AmerifluxDataProcessor"),
+    "Reformatter": ("micromet.format.reformatter", "Reformatter"),
+    "StationDataDownloader": ("micromet.station_data_pull", "StationDataDownloader"),
+    "StationDataProcessor": ("micromet.station_data_pull", "StationDataProcessor"),
+    "simulate_alfalfa_height_multi_field": (
+        "micromet.report.alfalfa_growth",
+        "simulate_alfalfa_height_multi_field",
+    ),
+    "AlfalfaHeightParams": ("micromet.report.alfalfa_growth", "AlfalfaHeightParams"),
+    "MISSING_VALUE": ("micromet.format.transformers", "MISSING_VALUE"),
+}
+
+_LAZY_MODULES = {
+    "tob1": "micromet.tob1",
+    "highfreq": "micromet.highfreq",
+    "tools": "micromet.report.tools",
+    "graphs": "micromet.report.graphs",
+    "headers": "micromet.format.headers",
+    "reformatter_vars": "micromet.format.reformatter_vars",
+    "variable_limits": "micromet.qaqc.variable_limits",
+    "netrad_limits": "micromet.qaqc.netrad_limits",
+    "compare": "micromet.format.compare",
+    "validate": "micromet.report.validate",
+    "fix_g_values": "micromet.report.fix_g_values",
+    "recalculate_albedo": "micromet.report.recalculate_albedo",
+    "gap_summary": "micromet.report.gap_summary",
+    "eddy_plots": "micromet.report.eddy_plots",
+    "transformers": "micromet.format.transformers",
+    "merge": "micromet.format.merge",
+    "file_compile": "micromet.format.file_compile",
+    "data_cleaning": "micromet.qaqc.data_cleaning",
+    "easyflux_footprint": "micromet.report.easyflux_footprint",
+    "alfalfa_growth": "micromet.report.alfalfa_growth",
+    "columns": "micromet.format.transformers.columns",
+    "timestamps": "micromet.format.transformers.timestamps",
+    "validation": "micromet.format.transformers.validation",
+    "corrections": "micromet.format.transformers.corrections",
+    "cleanup": "micromet.format.transformers.cleanup",
+    "interval_updates": "micromet.format.transformers.interval_updates",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_MODULES:
+        value = importlib.import_module(_LAZY_MODULES[name])
+    elif name in _LAZY_ATTRS:
+        module, attr = _LAZY_ATTRS[name]
+        value = getattr(importlib.import_module(module), attr)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRS) | set(_LAZY_MODULES))
+
 
 __version__ = "0.4.5"
 
 __all__ = [
     "AmerifluxDataProcessor",
+    "tob1",
+    "highfreq",
     "Reformatter",
     "tools",
     "graphs",
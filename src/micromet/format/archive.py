@@ -0,0 +1,472 @@
+"""
+Managed on-disk archive of station records.
+
+Raw datalogger files are merged into a columnar archive partitioned by
+station, data type and year::
+
+    <root>/<station>/<data_type>/manifest.json
+    <root>/<station>/<data_type>/<year>/_index.npy
+    <root>/<station>/<data_type>/<year>/<column>.npy
+
+Every column is a plain ``.npy`` array so a read can memory-map exactly the
+columns and rows it needs with ``np.load(..., mmap_mode="r")``. The manifest
+records each merged source file (path, size, mtime and SHA-256), and each
+skipped copy of one, so ingesting a directory again only parses files that
+are new or have changed.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from micromet.reader import AmerifluxDataProcessor
+from micromet.utils import logger_check
+
+MANIFEST_NAME = "manifest.json"
+INDEX_NAME = "_index"
+
+# Timestamp columns tried, in order, to index the records of a raw file
+_TIME_COLUMNS = ("TIMESTAMP", "TIMESTAMP_END", "TIMESTAMP_START")
+_UNSAFE_CHARS = re.compile(r"[^A-Za-z0-9_.+-]")
+
+
+def file_digest(path: Union[str, Path], chunk_size: int = 1 << 20) -> str:
+    """
+    Return the SHA-256 hex digest of a file's contents.
+
+    Parameters
+    ----------
+    path : str or Path
+        The file to hash.
+    chunk_size : int, optional
+        Read size in bytes. Defaults to 1 MiB.
+
+    Returns
+    -------
+    str
+        The hex digest.
+    """
+    digest = hashlib.sha256()
+    with Path(path).open("rb") as fp:
+        for chunk in iter(lambda: fp.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class StationArchive:
+    """
+    Incrementally maintained, memory-mappable station archive.
+
+    Parameters
+    ----------
+    root : str or Path
+        Directory holding the archive. Created on first ingest.
+    logger : logging.Logger, optional
+        A logger for tracking ingest progress. If not provided, a default
+        logger is used.
+    reader : AmerifluxDataProcessor, optional
+        Reader used to parse raw files. Defaults to a new
+        `AmerifluxDataProcessor` sharing `logger`.
+    """
+
+    def __init__(
+        self,
+        root: Union[str, Path],
+        logger: logging.Logger = None,  # type: ignore
+        reader: Optional[AmerifluxDataProcessor] = None,
+    ):
+        self.root = Path(root)
+        self.logger = logger_check(logger)
+        self.reader = reader or AmerifluxDataProcessor(logger=self.logger)
+
+    # ------------------------------------------------------------------
+    # Layout
+    # ------------------------------------------------------------------
+    def _table_dir(self, station: str, data_type: str) -> Path:
+        return self.root / str(station) / str(data_type)
+
+    def load_manifest(self, station: str, data_type: str = "eddy") -> dict:
+        """
+        Return the manifest of a station table.
+
+        The manifest has a ``sources`` mapping (resolved path to ``size``,
+        ``mtime`` and ``sha256``, plus ``duplicate_of`` for a skipped copy of
+        another source) and a ``columns`` mapping (column name to file name
+        and the stored dtype of each year partition).
+        """
+        path = self._table_dir(station, data_type) / MANIFEST_NAME
+        if not path.exists():
+            return {"sources": {}, "columns": {}}
+        with path.open("r") as fp:
+            return json.load(fp)
+
+    def _save_manifest(self, station: str, data_type: str, manifest: dict) -> None:
+        path = self._table_dir(station, data_type) / MANIFEST_NAME
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".json.tmp")
+        with tmp.open("w") as fp:
+            json.dump(manifest, fp, indent=2, sort_keys=True)
+        os.replace(tmp, path)
+
+    def years(self, station: str, data_type: str = "eddy") -> List[int]:
+        """Return the year partitions stored for a station table."""
+        table = self._table_dir(station, data_type)
+        if not table.exists():
+            return []
+        return sorted(
+            int(p.name)
+            for p in table.iterdir()
+            if p.is_dir() and p.name.isdigit() and (p / f"{INDEX_NAME}.npy").exists()
+        )
+
+    # ------------------------------------------------------------------
+    # Ingest
+    # ------------------------------------------------------------------
+    def pending_files(
+        self, station: str, files: Iterable[Union[str, Path]], data_type: str = "eddy"
+    ) -> List[Path]:
+        """
+        Return the files that are not yet merged into the archive.
+
+        A file is skipped when its path, size and mtime match the manifest,
+        or when its content hash matches an already merged source.
+        """
+        return list(self._scan(station, files, data_type)[0])
+
+    def _scan(
+        self, station: str, files: Iterable[Union[str, Path]], data_type: str
+    ) -> Tuple[Dict[Path, str], Dict[Path, dict]]:
+        """
+        Map each pending file to its content hash.
+
+        Also returns the manifest entries for new files whose content
+        duplicates a merged or pending source.
+        """
+        sources = self.load_manifest(station, data_type)["sources"]
+        known_hashes = {
+            entry["sha256"]: path
+            for path, entry in sources.items()
+            if "duplicate_of" not in entry
+        }
+        pending: Dict[Path, str] = {}
+        duplicates: Dict[Path, dict] = {}
+        for file in files:
+            path = Path(file).resolve()
+            stat = path.stat()
+            entry = sources.get(str(path))
+            if (
+                entry
+                and entry["size"] == stat.st_size
+                and entry["mtime"] == stat.st_mtime
+            ):
+                continue
+            digest = file_digest(path)
+            if entry is None and digest in known_hashes:
+                original = known_hashes[digest]
+                self.logger.debug(f"{path} duplicates {original}; skipping")
+                duplicates[path] = dict(
+                    _source_entry(path, digest), duplicate_of=original
+                )
+                continue
+            pending[path] = digest
+            known_hashes.setdefault(digest, str(path))
+        return pending, duplicates
+
+    def ingest(
+        self,
+        station: str,
+        files: Iterable[Union[str, Path]],
+        data_type: str = "eddy",
+    ) -> int:
+        """
+        Merge new or changed raw files into the archive.
+
+        Records are keyed by timestamp; where a timestamp is already stored
+        the newly ingested value wins.
+
+        Parameters
+        ----------
+        station : str
+            Station identifier, e.g. ``'US-UTD'``.
+        files : iterable of str or Path
+            Candidate raw files (TOA5, TOB1 or AmeriFlux CSV).
+        data_type : str, optional
+            Table name, e.g. ``'eddy'`` or ``'met'``. Defaults to ``'eddy'``.
+
+        Returns
+        -------
+        int
+            Number of files merged.
+        """
+        pending, duplicates = self._scan(station, files, data_type)
+        manifest = self.load_manifest(station, data_type)
+        manifest["sources"].update({str(p): e for p, e in duplicates.items()})
+        if not pending:
+            if duplicates:
+                self._save_manifest(station, data_type, manifest)
+            self.logger.info(f"{station}/{data_type}: archive up to date")
+            return 0
+
+        frames = []
+        for path, digest in pending.items():
+            self.logger.info(f"Archiving {path}")
+            df = self.reader.to_dataframe(path)
+            frames.append(_indexed(df))
+            manifest["sources"][str(path)] = _source_entry(path, digest)
+
+        new = pd.concat(frames)
+        new = new[~new.index.isna()]
+        for year, part in new.groupby(new.index.year):
+            self._merge_partition(station, data_type, int(year), part, manifest)
+        self._save_manifest(station, data_type, manifest)
+        return len(pending)
+
+    def _merge_partition(
+        self,
+        station: str,
+        data_type: str,
+        year: int,
+        new: pd.DataFrame,
+        manifest: dict,
+    ) -> None:
+        """Merge `new` rows into one year partition and rewrite its columns."""
+        part_dir = self._table_dir(station, data_type) / str(year)
+        if (part_dir / f"{INDEX_NAME}.npy").exists():
+            old = self._read_partition(part_dir, manifest, None, None, None)
+            merged = pd.concat([old, new])
+        else:
+            merged = new
+        merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+
+        part_dir.mkdir(parents=True, exist_ok=True)
+        _save_array(
+            part_dir / f"{INDEX_NAME}.npy", merged.index.to_numpy("datetime64[ns]")
+        )
+        columns = manifest["columns"]
+        for col in merged.columns:
+            values = _storable(merged[col])
+            entry = columns.setdefault(
+                str(col), {"file": _column_file(col, columns), "dtypes": {}}
+            )
+            entry["dtypes"][str(year)] = values.dtype.str
+            _save_array(part_dir / f"{entry['file']}.npy", values)
+
+    def ingest_directory(
+        self,
+        station: str,
+        directory: Union[str, Path],
+        search_str: str = "*Flux_AmeriFluxFormat*.dat",
+        data_type: str = "eddy",
+    ) -> int:
+        """
+        Ingest every file under `directory` matching `search_str`.
+
+        This is the incremental counterpart of
+        `AmerifluxDataProcessor.raw_file_compile`.
+        """
+        files = sorted(Path(directory).rglob(search_str))
+        return self.ingest(station, files, data_type=data_type)
+
+    # ------------------------------------------------------------------
+    # Read
+    # ------------------------------------------------------------------
+    def open(
+        self,
+        station: str,
+        start=None,
+        end=None,
+        columns: Optional[Sequence[str]] = None,
+        data_type: str = "eddy",
+    ) -> pd.DataFrame:
+        """
+        Read a time slice of a station table.
+
+        Only the year partitions overlapping ``[start, end]`` are touched,
+        and within them only the requested columns are memory-mapped; the
+        index is bisected so just the selected rows are copied out.
+
+        Parameters
+        ----------
+        station : str
+            Station identifier.
+        start, end : str or pd.Timestamp, optional
+            Inclusive time bounds. Defaults to the whole record.
+        columns : sequence of str, optional
+            Columns to return. Defaults to all archived columns.
+        data_type : str, optional
+            Table name. Defaults to ``'eddy'``.
+
+        Returns
+        -------
+        pd.DataFrame
+            Records indexed by a ``DatetimeIndex`` named ``TIMESTAMP``.
+
+        Raises
+        ------
+        KeyError
+            If a requested column is not in the archive.
+        """
+        manifest = self.load_manifest(station, data_type)
+        if columns is not None:
+            missing = [c for c in columns if c not in manifest["columns"]]
+            if missing:
+                raise KeyError(f"Columns not in archive: {missing}")
+        start = pd.Timestamp(start) if start is not None else None
+        end = pd.Timestamp(end) if end is not None else None
+
+        parts = []
+        for year in self.years(station, data_type):
+            if start is not None and year < start.year:
+                continue
+            if end is not None and year > end.year:
+                continue
+            part_dir = self._table_dir(station, data_type) / str(year)
+            parts.append(self._read_partition(part_dir, manifest, start, end, columns))
+        if not parts:
+            names = list(columns) if columns is not None else list(manifest["columns"])
+            return pd.DataFrame(
+                columns=names, index=pd.DatetimeIndex([], name="TIMESTAMP")
+            )
+        return pd.concat(parts)
+
+    def _read_partition(
+        self,
+        part_dir: Path,
+        manifest: dict,
+        start: Optional[pd.Timestamp],
+        end: Optional[pd.Timestamp],
+        columns: Optional[Sequence[str]],
+    ) -> pd.DataFrame:
+        index = np.load(part_dir / f"{INDEX_NAME}.npy", mmap_mode="r")
+        lo = (
+            0
+            if start is None
+            else int(np.searchsorted(index, start.to_datetime64(), "left"))
+        )
+        hi = (
+            len(index)
+            if end is None
+            else int(np.searchsorted(index, end.to_datetime64(), "right"))
+        )
+        names = list(columns) if columns is not None else list(manifest["columns"])
+
+        data = {}
+        for name in names:
+            entry = manifest["columns"][name]
+            path = part_dir / f"{entry['file']}.npy"
+            if path.exists():
+                data[name] = np.array(np.load(path, mmap_mode="r")[lo:hi])
+            else:
+                data[name] = _missing(_fill_dtype(entry["dtypes"].values()), hi - lo)
+        idx = pd.DatetimeIndex(np.array(index[lo:hi]), name="TIMESTAMP")
+        return pd.DataFrame(data, index=idx, columns=names)
+
+
+def open_archive(
+    root: Union[str, Path],
+    station: str,
+    start=None,
+    end=None,
+    columns: Optional[Sequence[str]] = None,
+    data_type: str = "eddy",
+) -> pd.DataFrame:
+    """
+    Read a time slice of a station table from an archive directory.
+
+    Convenience wrapper around `StationArchive.open`.
+    """
+    return StationArchive(root).open(
+        station, start=start, end=end, columns=columns, data_type=data_type
+    )
+
+
+def _indexed(df: pd.DataFrame) -> pd.DataFrame:
+    """Index a raw table by its timestamp column."""
+    for col in _TIME_COLUMNS:
+        if col not in df.columns:
+            continue
+        values = df[col]
+        if col == "TIMESTAMP":
+            stamps = pd.to_datetime(values, errors="coerce")
+        else:
+            stamps = pd.to_datetime(
+                values.astype("string").str.split(".").str[0],
+                format="%Y%m%d%H%M",
+                errors="coerce",
+            )
+        out = df.drop(columns=col)
+        out.index = pd.DatetimeIndex(stamps, name="TIMESTAMP")
+        return out
+    raise ValueError(f"No timestamp column among {list(_TIME_COLUMNS)}")
+
+
+def _storable(series: pd.Series) -> np.ndarray:
+    """Convert a column to an array ``np.load`` can memory-map."""
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+        if series.isna().any() and not pd.api.types.is_float_dtype(series):
+            return series.to_numpy(dtype="float64", na_value=np.nan)
+        return series.to_numpy()
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.to_numpy(dtype="datetime64[ns]")
+    return series.astype("string").fillna("").to_numpy(dtype=str)
+
+
+def _source_entry(path: Path, digest: str) -> dict:
+    """Manifest entry identifying the current state of a source file."""
+    stat = path.stat()
+    return {"size": stat.st_size, "mtime": stat.st_mtime, "sha256": digest}
+
+
+def _fill_dtype(dtypes: Iterable[str]) -> np.dtype:
+    """
+    Placeholder dtype for a column, from the dtypes of its partitions.
+
+    This is their common type, or object when they mix kinds that do not
+    promote, e.g. numbers and strings.
+    """
+    dtypes = [np.dtype(d) for d in dtypes]
+    kinds = {d.kind for d in dtypes}
+    if len(kinds) == 1 or kinds <= set("iufb"):
+        return np.result_type(*dtypes)
+    return np.dtype(object)
+
+
+def _missing(dtype: np.dtype, n: int) -> np.ndarray:
+    """Placeholder values for a column absent from a partition."""
+    if dtype.kind in "iub":
+        dtype = np.dtype("float64")
+    if dtype.kind == "f":
+        return np.full(n, np.nan, dtype=dtype)
+    if dtype.kind == "M":
+        return np.full(n, np.datetime64("NaT"), dtype=dtype)
+    if dtype.kind == "O":
+        return np.full(n, None, dtype=dtype)
+    return np.full(n, "", dtype=dtype)
+
+
+def _column_file(col, columns: Dict[str, dict]) -> str:
+    """Return a file-system safe, unique file stem for a column name."""
+    stem = _UNSAFE_CHARS.sub("_", str(col)) or "col"
+    taken = {entry["file"] for entry in columns.values()}
+    candidate, n = stem, 1
+    while candidate in taken or candidate == INDEX_NAME:
+        candidate = f"{stem}__{n}"
+        n += 1
+    return candidate
+
+
+def _save_array(path: Path, values: np.ndarray) -> None:
+    """Write an array atomically so readers never see a partial file."""
+    tmp = path.with_name(path.name + ".tmp")
+    with tmp.open("wb") as fp:
+        np.save(fp, values, allow_pickle=False)
+    os.replace(tmp, path)
@@ -0,0 +1,398 @@
+"""
+Single-pass columnar execution engine for the reformatter pipeline.
+
+`Reformatter.process` normally chains a dozen ``DataFrame.pipe`` steps,
+several of which copy the whole frame. This module produces the same output
+by planning every rename, duplicate merge and column drop from the header
+alone, then running numeric conversion, resampling, sentinel handling,
+variable fixes and physical-limit masking over one float64 block.
+
+Integer columns are tracked with a per-column flag that is cleared wherever
+the standard pipeline would have upcast the column to float, so the final
+frame writes the same CSV as the standard engine.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+import micromet.format.reformatter_vars as reformatter_vars
+import micromet.qaqc.variable_limits as variable_limits
+from micromet.format import transformers
+from micromet.format.transformers import corrections, validation
+from micromet.utils import logger_check
+
+ENGINES = ("pandas", "columnar")
+
+_TS_FORMAT = "%Y%m%d%H%M"
+_GENERATED = ("SAMPLING_INTERVAL", "TIMESTAMP_END", "TIMESTAMP_START")
+_ROUND_ET_COLUMNS = ("ET_1_1_1", "ET_1_1_2")
+
+
+class UnsupportedFrame(ValueError):
+    """Raised when a frame cannot be handled by the columnar engine."""
+
+
+@dataclass
+class ColumnPlan:
+    """
+    Header-only execution plan for `process_columnar`.
+
+    Attributes
+    ----------
+    ts_col : str
+        Raw column holding the ``YYYYMMDDHHMM`` end timestamp.
+    merged : list of str
+        Column names after duplicate merging, before any drops.
+    final : list of str
+        Output column names, in output order.
+    groups : dict
+        Merged name -> raw source columns in merge precedence order. Empty
+        for generated columns.
+    limits : tuple
+        ``(column, key, Min, Max)`` physical limit plan for the merged
+        columns (see `transformers.validation.limit_plan`).
+    """
+
+    ts_col: str
+    merged: List[str]
+    final: List[str]
+    groups: Dict[str, List[str]] = field(default_factory=dict)
+    limits: tuple = ()
+
+
+def _header(columns: Sequence[str]) -> pd.DataFrame:
+    """Empty single-block frame carrying only column names."""
+    return pd.DataFrame(np.empty((0, len(columns))), columns=list(columns))
+
+
+def plan_columns(
+    columns: Sequence[str],
+    data_type: str = "eddy",
+    config: Optional[dict] = None,
+    drop_soil: bool = True,
+    logger: Optional[logging.Logger] = None,
+) -> ColumnPlan:
+    """
+    Plan renames, duplicate merges and drops from the raw header.
+
+    The plan is built by running the standard column transformers on an
+    empty frame, so names and order always match the standard engine.
+
+    Parameters
+    ----------
+    columns : sequence of str
+        Raw column names as returned by `AmerifluxDataProcessor`.
+    data_type : str, optional
+        'eddy' or 'met'. Defaults to 'eddy'.
+    config : dict, optional
+        Reformatter configuration. Defaults to ``reformatter_vars.config``.
+    drop_soil : bool, optional
+        Whether extra soil columns are dropped. Defaults to True.
+    logger : logging.Logger, optional
+        Logger passed to the column transformers.
+
+    Returns
+    -------
+    ColumnPlan
+        The execution plan.
+
+    Raises
+    ------
+    UnsupportedFrame
+        If the header has duplicate names or already carries a
+        ``DATETIME_END`` column.
+    """
+    logger = logger_check(logger)
+    config = reformatter_vars.config if config is None else config
+
+    raw = [c for c in columns if c != "TIMESTAMP"]
+    if len(set(raw)) != len(raw):
+        raise UnsupportedFrame("duplicate raw column names")
+    if any(str(c).strip().upper() == "DATETIME_END" for c in raw):
+        raise UnsupportedFrame("raw header already contains DATETIME_END")
+
+    ts_col = transformers.infer_datetime_col(_header(raw), logger)
+
+    header = _header(raw + ["DATETIME_END"])
+    header = transformers.rename_columns(
+        header, data_type=data_type, config=config, logger=logger
+    )
+    names = transformers.make_unique(header.columns)
+    if names[-1] != "DATETIME_END" or names.count("DATETIME_END") != 1:
+        raise UnsupportedFrame("renames collide with DATETIME_END")
+    source = dict(zip(names[:-1], raw))
+
+    resampled = names[:-1] + [c for c in _GENERATED if c not in names]
+    groups = transformers.group_duplicate_columns(resampled)
+    existing = set(resampled)
+    merged = [c for c in resampled if c in groups]
+    merged += [base for base in groups if base not in existing]
+
+    header = _header(merged)
+    if drop_soil:
+        header = transformers.drop_extra_soil_columns(header, config, logger)
+    header = transformers.drop_extras(header, config)
+
+    # Same moves as transformers.col_order
+    final = list(header.columns)
+    for col in ("TIMESTAMP_END", "TIMESTAMP_START"):
+        if col in final:
+            final.remove(col)
+            final.insert(0, col)
+
+    return ColumnPlan(
+        ts_col=ts_col,
+        merged=merged,
+        final=final,
+        groups={
+            base: [] if base in _GENERATED else [source[c] for c in members]
+            for base, members in groups.items()
+        },
+        limits=transformers.limit_plan(merged, variable_limits.limits),
+    )
+
+
+def _resample_rows(
+    df: pd.DataFrame, ts_col: str, interval: int, logger: logging.Logger
+) -> Tuple[pd.DatetimeIndex, np.ndarray, np.ndarray, bool]:
+    """
+    Locate the source rows feeding each resampled timestamp.
+
+    Returns the resampled index, the source row positions sorted by time,
+    the bin of each of those rows, and whether any bin is empty.
+    """
+    dt = pd.to_datetime(df[ts_col], format=_TS_FORMAT, errors="coerce")
+    today = pd.Timestamp("today").floor("D")
+    keep = (dt.notna() & (dt <= today)).to_numpy()
+    rows = np.flatnonzero(keep)
+    stamps = pd.DatetimeIndex(dt.to_numpy()[rows])
+
+    first = ~stamps.duplicated(keep="first")
+    rows, stamps = rows[first], stamps[first]
+    order = np.argsort(stamps.asi8, kind="stable")
+    rows, stamps = rows[order], stamps[order]
+    if len(rows) == 0:
+        raise UnsupportedFrame("no valid timestamps")
+
+    if interval not in (30, 60):
+        logger.debug(
+            "Interval not 30 or 60 minutes; resampling at default rate of 30 minutes"
+        )
+        interval = 30
+    freq = f"{interval}min"
+    bins = stamps.floor(freq)
+    index = pd.date_range(bins[0], bins[-1], freq=freq, name="DATETIME_END")
+    codes = ((bins - bins[0]) // pd.Timedelta(freq)).to_numpy().astype(np.intp)
+    has_gaps = 1 + int(np.count_nonzero(np.diff(codes))) < len(index)
+    return index, rows, codes, has_gaps
+
+
+def _first_valid(values: np.ndarray, codes: np.ndarray, n_bins: int) -> np.ndarray:
+    """Return the first non-NaN value of each column per bin (``resample.first``)."""
+    out = np.full((n_bins, values.shape[1]), np.nan, order="F")
+    if len(codes) == 0:
+        return out
+    if len(codes) == 1 or np.all(np.diff(codes) > 0):
+        out[codes] = values
+        return out
+    starts = np.flatnonzero(np.r_[True, np.diff(codes) > 0])
+    n = len(codes)
+    pos = np.where(np.isnan(values), n, np.arange(n)[:, None])
+    first = np.minimum.reduceat(pos, starts, axis=0)
+    found = first < n
+    picked = np.take_along_axis(values, np.minimum(first, n - 1), axis=0)
+    out[codes[starts]] = np.where(found, picked, np.nan)
+    return out
+
+
+def _stamp_numbers(index: pd.DatetimeIndex) -> np.ndarray:
+    """``index.strftime("%Y%m%d%H%M").astype(int)`` computed arithmetically."""
+    return (
+        index.year.to_numpy(dtype=float) * 1e8
+        + index.month.to_numpy(dtype=float) * 1e6
+        + index.day.to_numpy(dtype=float) * 1e4
+        + index.hour.to_numpy(dtype=float) * 1e2
+        + index.minute.to_numpy(dtype=float)
+    )
+
+
+def _column_max(values: np.ndarray) -> float:
+    """``Series.max`` (skipna) for a float column."""
+    finite = values[~np.isnan(values)]
+    return finite.max() if finite.size else np.nan
+
+
+def _to_frame(
+    block: np.ndarray,
+    is_int: np.ndarray,
+    names: List[str],
+    positions: Dict[str, int],
+    index: pd.DatetimeIndex,
+) -> pd.DataFrame:
+    """Assemble selected block columns, restoring integer dtypes."""
+    cols = [positions[c] for c in names]
+    out = pd.DataFrame(block[:, cols], index=index, columns=names)
+    int_cols = [c for c in names if is_int[positions[c]]]
+    if int_cols:
+        out = out.astype({c: "int64" for c in int_cols})
+    return out
+
+
+def process_columnar(
+    df: pd.DataFrame,
+    interval: int = 30,
+    data_type: str = "eddy",
+    config: Optional[dict] = None,
+    drop_soil: bool = True,
+    logger: Optional[logging.Logger] = None,
+    extra_columns: Sequence[str] = (),
+) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    Run the reformatter pipeline in a single pass over a float64 block.
+
+    Produces the same frame and limits report as the standard
+    `Reformatter.process` chain (``fix_timestamps`` through ``col_order``).
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Raw station data.
+    interval : int, optional
+        Sampling interval in minutes (30 or 60). Defaults to 30.
+    data_type : str, optional
+        'eddy' or 'met'. Defaults to 'eddy'.
+    config : dict, optional
+        Reformatter configuration. Defaults to ``reformatter_vars.config``.
+    drop_soil : bool, optional
+        Whether extra soil columns are dropped. Defaults to True.
+    logger : logging.Logger, optional
+        Logger for progress messages.
+    extra_columns : sequence of str, optional
+        Columns to return as they were after physical limits and before any
+        drops (e.g. radiation columns for timestamp alignment checks).
+
+    Returns
+    -------
+    tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]
+        The processed frame, the physical limits report, and a frame of the
+        requested `extra_columns` that exist.
+
+    Raises
+    ------
+    UnsupportedFrame
+        If the frame needs behaviour the engine does not replicate; callers
+        should fall back to the standard engine.
+    """
+    logger = logger_check(logger)
+    plan = plan_columns(df.columns, data_type, config, drop_soil, logger)
+
+    extras = [c for c in extra_columns if c in plan.groups]
+    limited = [entry[0] for entry in plan.limits]
+    needed = list(dict.fromkeys(plan.final + limited + extras))
+    positions = {name: i for i, name in enumerate(needed)}
+
+    sources = list(dict.fromkeys(s for name in needed for s in plan.groups[name]))
+    for src in sources:
+        kind = df[src].dtype.kind
+        if kind not in "iufO" and not isinstance(df[src].dtype, pd.StringDtype):
+            raise UnsupportedFrame(f"unsupported dtype {df[src].dtype} for {src}")
+
+    index, rows, codes, has_gaps = _resample_rows(df, plan.ts_col, interval, logger)
+    n_bins = len(index)
+
+    # Numeric conversion of the raw source columns, then resample 'first'
+    raw_block = np.empty((len(rows), len(sources)), order="F")
+    raw_int = np.zeros(len(sources), dtype=bool)
+    for j, src in enumerate(sources):
+        col = pd.to_numeric(df[src], errors="coerce")
+        raw_int[j] = col.dtype.kind in "iu"
+        raw_block[:, j] = col.to_numpy(dtype=float, na_value=np.nan)[rows]
+    raw_block = _first_valid(raw_block, codes, n_bins)
+    raw_int &= not has_gaps
+    src_pos = {src: j for j, src in enumerate(sources)}
+
+    # Duplicate merging with -9999 treated as missing
+    block = np.empty((n_bins, len(needed)), order="F")
+    is_int = np.zeros(len(needed), dtype=bool)
+    minutes = interval if interval in (30, 60) else 30
+    generated = {
+        "SAMPLING_INTERVAL": np.full(n_bins, minutes, dtype=float),
+        "TIMESTAMP_END": _stamp_numbers(index),
+        "TIMESTAMP_START": _stamp_numbers(index - pd.Timedelta(minutes=interval)),
+    }
+    singles, single_src = [], []
+    for name, j in positions.items():
+        if name in generated:
+            block[:, j] = generated[name]
+            is_int[j] = True
+        elif len(plan.groups[name]) == 1:
+            singles.append(j)
+            single_src.append(src_pos[plan.groups[name][0]])
+        else:
+            members = [src_pos[s] for s in plan.groups[name]]
+            sub = raw_block[:, members]
+            sentinel = sub == -9999
+            is_int[j] = bool(raw_int[members].all()) and not sentinel.any()
+            sub = np.where(sentinel, np.nan, sub)
+            valid = ~np.isnan(sub)
+            merged = sub[np.arange(n_bins), valid.argmax(axis=1)]
+            block[:, j] = np.where(np.isnan(merged), -9999.0, merged)
+    if singles:
+        # A lone column only has its NaNs replaced by the sentinel
+        sub = raw_block[:, single_src]
+        is_int[singles] = raw_int[single_src] & ~(sub == -9999).any(axis=0)
+        block[:, singles] = np.where(np.isnan(sub), -9999.0, sub)
+
+    # Variable-specific fixes (tau_fixer, fix_swc_percent, ssitc_scale)
+    if "TAU" in positions and "U_STAR" in plan.groups:
+        j = positions["TAU"]
+        zero = block[:, j] == 0
+        if zero.any():
+            block[zero, j] = np.nan
+            is_int[j] = False
+    for name, j in positions.items():
+        if name.startswith("SWC_"):
+            m = _column_max(block[:, j])
+            if pd.notna(m) and m <= 1.5:
+                block[:, j] *= 100.0
+                is_int[j] = False
+                logger.debug(f"Converted {name} from fraction to percent")
+        elif name.startswith(corrections.SSITC_BASES) and _column_max(block[:, j]) > 3:
+            block[:, j] = corrections.rating_array(block[:, j])
+            is_int[j] = True
+            logger.debug(f"Scaled SSITC {name}")
+
+    # Physical limits
+    for name in _ROUND_ET_COLUMNS:
+        if name in positions:
+            j = positions[name]
+            neg = block[:, j] < 0
+            block[neg, j] = np.round(block[neg, j], 1)
+
+    limited = [positions[entry[0]] for entry in plan.limits]
+    mins, maxs = validation._limit_vectors(plan.limits)
+    sub, _, counts = validation._bound_block(block[:, limited], mins, maxs)
+    block[:, limited] = sub
+    is_int[limited] &= ~np.isnan(sub).any(axis=0)
+    report = validation._limits_report(plan.limits, counts)
+
+    extra_df = _to_frame(block, is_int, extras, positions, index)
+
+    block = np.where(np.isnan(block), -9999.0, block)
+    out = _to_frame(block, is_int, plan.final, positions, index)
+    return out, report, extra_df
+
+
+__all__ = [
+    "ENGINES",
+    "ColumnPlan",
+    "UnsupportedFrame",
+    "plan_columns",
+    "process_columnar",
+]
@@ -4,23 +4,40 @@ Compile files by substring into a single directory.
 
 Key logic:
 - Group by exact filename (case-sensitive match on the filename itself).
-- Within each group, deduplicate items that have the *same* (creation_time, size).
-- If >1 unique items remain *and* both creation_time and size differ across them,
-  copy all, labeled sequentially: name_1.ext, name_2.ext, ...
+- Within each group, deduplicate items that have the same content (default) or,
+  with ``dedupe="ctime_size"``, the *same* (creation_time, size).
+- If >1 unique items remain, copy all, labeled sequentially: name_1.ext,
+  name_2.ext, ... (in "ctime_size" mode only if both creation_time and size
+  differ across them).
 - Else (effectively duplicates), copy only one.
+
+Directory listings, file stats and content hashes are cached in a sidecar
+index (see `FileIndex`), so reruns only rescan directories that changed. By
+default the index is kept in the user cache directory, outside the source and
+output trees (see `default_index_path`).
 """
 
 from __future__ import annotations
 import argparse
+import hashlib
+import json
 import os
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from dataclasses import dataclass
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 import shutil
 import sys
 import time
 
+from micromet.format.archive import file_digest
+
+# Bytes hashed from each end of a file for the quick content hash
+HASH_BLOCK = 1 << 16
+DEDUPE_MODES = ("content", "ctime_size")
+
 
 @dataclass(frozen=True)
 class FileInfo:
@@ -45,7 +62,7 @@ class FileInfo:
     mtime_ts: float
 
 
-def _get_creation_time(p: Path) -> float:
+def _get_creation_time(st: os.stat_result) -> float:
     """
     Get the file creation time in a cross-platform manner.
 
@@ -54,98 +71,40 @@ def _get_creation_time(p: Path) -> float:
 
     Parameters
     ----------
-    p : Path
-        The path to the file.
+    st : os.stat_result
+        The result of stat'ing the file.
 
     Returns
     -------
     float
         The creation timestamp of the file.
     """
-    st = p.stat()
     if hasattr(st, "st_birthtime"):  # macOS, some BSDs
         return st.st_birthtime
     return st.st_ctime  # Windows: creation, Linux: change time
 
 
-def _gather_files(root: Path, pattern: str, case_sensitive: bool = True) -> List[Path]:
+def default_index_path(root: Path) -> Path:
     """
-    Gather all files in a directory tree whose names match a specific pattern.
-
-    Parameters
-    ----------
-    root : Path
-        The root directory to start the search from.
-    pattern : str
-        The regular expression pattern to search for in filenames.
-        For a simple substring search, you can pass the substring directly,
-        and it will be treated as an escaped literal pattern.
-    case_sensitive : bool, default True
-        Whether the search should be case-sensitive.
+    Location of the sidecar index used for `root` when none is given.
 
-    Returns
-    -------
-    List[Path]
-        A list of paths to the files that match the criteria.
-    """
-    files: List[Path] = []
-    
-    # 1. Escape the pattern to treat it as a literal string for simple searches
-    # If the user wants to use true regex, they must escape special characters themselves,
-    # or you could introduce an 'is_regex' flag, but for simplicity, we'll assume
-    # the user is passing a regex pattern for complex searches.
-    
-    # Compile the regex pattern with or without IGNORECASE flag
-    flags = 0 if case_sensitive else re.IGNORECASE
-    try:
-        compiled_pattern = re.compile(pattern, flags=flags)
-    except re.error:
-        # Handle cases where the pattern might be malformed, though less likely
-        # if the user is careful.
-        print(f"Error compiling regex pattern: {pattern}")
-        return files
-
-
-    for dirpath, _, filenames in os.walk(root):
-        for fn in filenames:
-            # 2. Use re.search() to check for a match
-            if compiled_pattern.search(fn):
-                files.append(Path(dirpath) / fn)
-                
-    return files
-
-
-def _to_fileinfo(paths: List[Path], use_mtime: bool) -> List[FileInfo]:
-    """
-    Convert a list of file paths to a list of FileInfo objects.
+    The index lives in the user cache directory (``$XDG_CACHE_HOME`` or
+    ``~/.cache``) under ``micromet/file_compile``, named after a hash of the
+    resolved `root`, so nothing is written into the source or output trees.
 
     Parameters
     ----------
-    paths : List[Path]
-        A list of paths to files.
-    use_mtime : bool
-        If True, use the modification time as the creation time.
+    root : Path
+        The root directory being compiled.
 
     Returns
     -------
-    List[FileInfo]
-        A list of FileInfo objects corresponding to the input paths.
+    Path
+        The index file path.
     """
-    out: List[FileInfo] = []
-    for p in paths:
-        try:
-            st = p.stat()
-            fi = FileInfo(
-                path=p,
-                size=st.st_size,
-                create_ts=st.st_mtime if use_mtime else _get_creation_time(p),
-                mtime_ts=st.st_mtime,
-            )
-            out.append(fi)
-        except FileNotFoundError:
-            # Skip files that disappear between walk and stat
-            continue
-    return out
+    cache = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    key = hashlib.sha1(str(Path(root).resolve()).encode()).hexdigest()[:16]
+    return Path(cache) / "micromet" / "file_compile" / f"{key}.json"
 
 
 def _group_by_filename(infos: List[FileInfo]) -> Dict[str, List[FileInfo]]:
@@ -215,13 +174,302 @@ def _all_differ_in_both_ctime_and_size(items: List[FileInfo]) -> bool:
     n = len(items)
     if n <= 1:
         return False
-    for i in range(n):
-        for j in range(i + 1, n):
-            same_ctime = int(items[i].create_ts) == int(items[j].create_ts)
-            same_size = items[i].size == items[j].size
-            if same_ctime or same_size:
-                return False
-    return True
+    ctimes = {int(fi.create_ts) for fi in items}
+    sizes = {fi.size for fi in items}
+    return len(ctimes) == n and len(sizes) == n
+
+
+class FileIndex:
+    """
+    Persistent index of directory listings, file stats and content hashes.
+
+    A directory whose modification time is unchanged since the last scan is
+    not listed again and its files are not re-stat'ed; only new or changed
+    directories are read, in parallel. Content hashes are kept while a
+    file's size and mtime stay the same.
+
+    Files rewritten in place do not change their directory's mtime, so
+    pass ``rescan=True`` to `scan` when that can happen.
+
+    Parameters
+    ----------
+    path : Path, optional
+        JSON file holding the index. If None the index is kept in memory
+        only.
+    workers : int, optional
+        Number of threads used to list directories and hash files.
+        Defaults to 8.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: Optional[Path] = None, workers: int = 8):
+        self.path = Path(path) if path is not None else None
+        self.workers = workers
+        self.dirs: Dict[str, dict] = {}
+        self.files: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        if self.path is not None and self.path.exists():
+            try:
+                data = json.loads(self.path.read_text())
+            except (OSError, ValueError):
+                data = {}
+            if data.get("version") == self.VERSION:
+                self.dirs = data["dirs"]
+                self.files = data["files"]
+
+    def save(self) -> None:
+        """Write the index to `path` (atomically)."""
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        data = {"version": self.VERSION, "dirs": self.dirs, "files": self.files}
+        tmp.write_text(json.dumps(data))
+        os.replace(tmp, self.path)
+
+    def scan(self, root: Path, rescan: bool = False) -> List[FileInfo]:
+        """
+        Scan a directory tree and return the metadata of all its files.
+
+        Parameters
+        ----------
+        root : Path
+            The root directory.
+        rescan : bool, optional
+            If True, list every directory even when its mtime is unchanged.
+
+        Returns
+        -------
+        List[FileInfo]
+            One entry per file, with `create_ts` from the platform creation
+            time (see `_get_creation_time`).
+        """
+        seen: List[str] = []
+        level = [str(root)]
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            while level:
+                seen.extend(level)
+                subdirs = pool.map(lambda d: self._scan_dir(d, rescan), level)
+                level = [sub for subs in subdirs for sub in subs]
+
+        prefix = str(root).rstrip(os.sep) + os.sep
+        live = set(seen)
+        for d in [d for d in self.dirs if d not in live and d.startswith(prefix)]:
+            del self.dirs[d]
+        infos: List[FileInfo] = []
+        live_files = set()
+        for d in seen:
+            for name in self.dirs.get(d, {}).get("files", []):
+                key = os.path.join(d, name)
+                live_files.add(key)
+                entry = self.files[key]
+                infos.append(
+                    FileInfo(
+                        path=Path(key),
+                        size=entry["size"],
+                        create_ts=entry["ctime"],
+                        mtime_ts=entry["mtime"],
+                    )
+                )
+        stale = [k for k in self.files if k not in live_files and k.startswith(prefix)]
+        for key in stale:
+            del self.files[key]
+        return infos
+
+    def _scan_dir(self, d: str, rescan: bool) -> List[str]:
+        """List one directory unless unchanged; return its subdirectories."""
+        try:
+            mtime = os.stat(d).st_mtime_ns
+        except FileNotFoundError:
+            with self._lock:
+                self.dirs.pop(d, None)
+            return []
+        cached = self.dirs.get(d)
+        if cached is not None and cached["mtime"] == mtime and not rescan:
+            return [os.path.join(d, sub) for sub in cached["subdirs"]]
+
+        files, subdirs = [], []
+        try:
+            entries = list(os.scandir(d))
+        except (FileNotFoundError, NotADirectoryError, PermissionError):
+            with self._lock:
+                self.dirs.pop(d, None)
+            return []
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.name)
+                    continue
+                if not entry.is_file():
+                    continue
+                st = entry.stat()
+            except FileNotFoundError:
+                # Skip files that disappear between listing and stat
+                continue
+            ctime = _get_creation_time(st)
+            with self._lock:
+                old = self.files.get(entry.path)
+                new = {"size": st.st_size, "mtime": st.st_mtime, "ctime": ctime}
+                if old and old["size"] == st.st_size and old["mtime"] == st.st_mtime:
+                    new.update({k: old[k] for k in ("quick", "full") if k in old})
+                self.files[entry.path] = new
+            files.append(entry.name)
+        with self._lock:
+            self.dirs[d] = {"mtime": mtime, "files": files, "subdirs": subdirs}
+        return [os.path.join(d, sub) for sub in subdirs]
+
+    def digest(self, fi: FileInfo, full: bool = False) -> str:
+        """
+        Return a cached content hash of a file.
+
+        Parameters
+        ----------
+        fi : FileInfo
+            The file.
+        full : bool, optional
+            If False, hash the size plus the first and last `HASH_BLOCK`
+            bytes (BLAKE2b); this covers the whole content of files up to
+            ``2 * HASH_BLOCK`` bytes. If True, hash the full content
+            (SHA-256).
+
+        Returns
+        -------
+        str
+            The hex digest.
+        """
+        kind = "full" if full else "quick"
+        entry = self.files.get(str(fi.path))
+        if entry is not None and kind in entry:
+            return entry[kind]
+        value = file_digest(fi.path) if full else _quick_digest(fi.path, fi.size)
+        if entry is not None:
+            with self._lock:
+                entry[kind] = value
+        return value
+
+    def digests(self, infos: List[FileInfo], full: bool = False) -> Dict[Path, str]:
+        """
+        Hash many files, computing only uncached hashes on a thread pool.
+
+        Parameters
+        ----------
+        infos : List[FileInfo]
+            The files.
+        full : bool, optional
+            Passed to `digest`.
+
+        Returns
+        -------
+        Dict[Path, str]
+            The hex digest per path.
+        """
+        kind = "full" if full else "quick"
+        out: Dict[Path, str] = {}
+        todo: List[FileInfo] = []
+        for fi in infos:
+            value = self.files.get(str(fi.path), {}).get(kind)
+            if value is None:
+                todo.append(fi)
+            else:
+                out[fi.path] = value
+        if todo:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                values = pool.map(lambda fi: self.digest(fi, full), todo)
+                out.update(zip((fi.path for fi in todo), values))
+        return out
+
+
+def _quick_digest(path: Path, size: int) -> str:
+    """BLAKE2b of a file's size and its first and last `HASH_BLOCK` bytes."""
+    h = hashlib.blake2b(str(size).encode(), digest_size=16)
+    with open(path, "rb") as fp:
+        h.update(fp.read(HASH_BLOCK))
+        if size > 2 * HASH_BLOCK:
+            fp.seek(-HASH_BLOCK, os.SEEK_END)
+        h.update(fp.read(HASH_BLOCK))
+    return h.hexdigest()
+
+
+def _content_keys(
+    groups: Dict[str, List[FileInfo]], index: FileIndex
+) -> Dict[Path, tuple]:
+    """
+    Compute a content key per file, hashing only where needed.
+
+    Files whose size is unique within their filename group are keyed by
+    size alone. Files sharing a size get a quick hash; files that also
+    share the quick hash and are larger than ``2 * HASH_BLOCK`` bytes get
+    a full hash. Uncached hashes are computed on the index's thread pool.
+
+    Returns
+    -------
+    Dict[Path, tuple]
+        A key per file; equal keys mean equal content.
+    """
+    keys: Dict[Path, tuple] = {}
+    same_size: List[List[FileInfo]] = []
+    for items in groups.values():
+        by_size: Dict[int, List[FileInfo]] = {}
+        for fi in items:
+            by_size.setdefault(fi.size, []).append(fi)
+        for size, same in by_size.items():
+            if len(same) == 1:
+                keys[same[0].path] = (size,)
+            else:
+                same_size.append(same)
+
+    quick = index.digests([fi for same in same_size for fi in same])
+    need_full = []
+    for same in same_size:
+        by_quick: Dict[str, List[FileInfo]] = {}
+        for fi in same:
+            by_quick.setdefault(quick[fi.path], []).append(fi)
+        for digest, dups in by_quick.items():
+            if len(dups) > 1 and dups[0].size > 2 * HASH_BLOCK:
+                need_full.extend(dups)
+            else:
+                for fi in dups:
+                    keys[fi.path] = (fi.size, digest)
+    full = index.digests(need_full, full=True)
+    for fi in need_full:
+        keys[fi.path] = (fi.size, quick[fi.path], full[fi.path])
+    return keys
+
+
+def _unique_by_content(
+    items: List[FileInfo], keys: Dict[Path, tuple]
+) -> List[FileInfo]:
+    """
+    Keep the earliest-created file of each distinct content.
+
+    Parameters
+    ----------
+    items : List[FileInfo]
+        Files sharing a filename.
+    keys : Dict[Path, tuple]
+        Content keys from `_content_keys`.
+
+    Returns
+    -------
+    List[FileInfo]
+        One FileInfo per distinct content.
+    """
+    unique: Dict[tuple, FileInfo] = {}
+    for fi in sorted(items, key=lambda fi: fi.create_ts):
+        unique.setdefault(keys[fi.path], fi)
+    return list(unique.values())
+
+
+def _place(src: Path, dst: Path, link: bool) -> None:
+    """Copy `src` to `dst`, or hard-link it when `link` is set and possible."""
+    if link:
+        try:
+            os.link(src, dst)
+            return
+        except OSError:
+            pass
+    shutil.copy2(src, dst)
 
 
 def _ensure_outdir(p: Path):
@@ -261,6 +509,11 @@ def compile_files(
     dry_run: bool = False,
     use_mtime: bool = False,
     sequential_zero_pad: int = 1,
+    dedupe: str = "content",
+    link: bool = False,
+    workers: int = 8,
+    index_path: Optional[Path] = None,
+    rescan: bool = False,
 ) -> None:
     """
     Compile files from a source directory to a destination, handling duplicates.
@@ -268,7 +521,7 @@ def compile_files(
     This function scans a directory tree for files containing a specific
     substring in their names, groups them by filename, and then copies
     them to an output directory. It includes logic to handle duplicate
-    files based on their creation time and size.
+    files based on their content (or creation time and size).
 
     Parameters
     ----------
@@ -290,78 +543,110 @@ def compile_files(
     sequential_zero_pad : int, optional
         The number of digits to use for zero-padding when creating
         sequential filenames for duplicates. Defaults to 1.
+    dedupe : {"content", "ctime_size"}, optional
+        "content" treats files with identical content as duplicates and
+        labels every distinct version sequentially. "ctime_size" keeps the
+        earlier behaviour of comparing (creation time, size).
+        Defaults to "content".
+    link : bool, optional
+        If True, hard-link files into `outdir` instead of copying them,
+        falling back to a copy across file systems. Defaults to False.
+    workers : int, optional
+        Number of threads used for scanning, hashing and copying.
+        Defaults to 8.
+    index_path : Path, optional
+        Sidecar index file. Defaults to `default_index_path` of `root`,
+        in the user cache directory.
+    rescan : bool, optional
+        If True, list every directory even if the index says it is
+        unchanged. Defaults to False.
     """
+    if dedupe not in DEDUPE_MODES:
+        raise ValueError(f"dedupe must be one of {DEDUPE_MODES}")
     _ensure_outdir(outdir)
 
-    paths = _gather_files(root, contains, case_sensitive)
-    infos = _to_fileinfo(paths, use_mtime=use_mtime)
+    flags = 0 if case_sensitive else re.IGNORECASE
+    try:
+        compiled_pattern = re.compile(contains, flags=flags)
+    except re.error:
+        print(f"Error compiling regex pattern: {contains}")
+        return
+
+    index = FileIndex(index_path or default_index_path(root), workers=workers)
+    infos = [
+        fi
+        for fi in index.scan(root, rescan=rescan)
+        if compiled_pattern.search(fi.path.name)
+    ]
+    if use_mtime:
+        infos = [
+            FileInfo(fi.path, fi.size, create_ts=fi.mtime_ts, mtime_ts=fi.mtime_ts)
+            for fi in infos
+        ]
     groups = _group_by_filename(infos)
+    keys = _content_keys(groups, index) if dedupe == "content" else {}
 
     copied = 0
     skipped_dup = 0
     made_sequential = 0
+    plan: List[Tuple[Path, Path]] = []
+    planned: set = set()
 
-    for filename, items in sorted(groups.items()):
-        uniques = _unique_by_ctime_size(items)
+    def taken(dst: Path) -> bool:
+        return dst in planned or dst.exists()
+
+    def same_as_existing(fi: FileInfo, dst: Path) -> bool:
+        if dst in planned or dst.stat().st_size != fi.size:
+            return False
+        if dedupe == "ctime_size":
+            return True
+        existing = FileInfo(dst, fi.size, create_ts=0.0, mtime_ts=0.0)
+        return index.digest(existing, full=True) == index.digest(fi, full=True)
 
-        # Only one unique (ctime,size): copy just one (the earliest by ctime)
-        if len(uniques) == 1:
-            src = uniques[0].path
+    for filename, items in sorted(groups.items()):
+        stem, ext = Path(filename).stem, Path(filename).suffix
+        if dedupe == "content":
+            uniques = _unique_by_content(items, keys)
+            distinct = len(uniques) > 1
+        else:
+            uniques = _unique_by_ctime_size(items)
+            distinct = _all_differ_in_both_ctime_and_size(uniques)
+
+        if distinct:
+            # Several versions of the same filename: label sequentially,
+            # oldest first, without overwriting anything already there
+            uniques_sorted = sorted(uniques, key=lambda fi: fi.create_ts)
+            for idx, fi in enumerate(uniques_sorted, start=1):
+                k = idx
+                dst = outdir / f"{stem}_{str(k).zfill(sequential_zero_pad)}{ext}"
+                while taken(dst):
+                    k += 1
+                    dst = outdir / f"{stem}_{str(k).zfill(sequential_zero_pad)}{ext}"
+                plan.append((fi.path, dst))
+                planned.add(dst)
+                made_sequential += 1
+        else:
+            # Duplicates: copy the earliest by creation time once
+            choice = min(uniques, key=lambda fi: fi.create_ts)
             dst = outdir / filename
-            if dst.exists():
-                # If same filename already placed (from another pass), skip if same size,
-                # else append a suffix to avoid overwrite.
-                if dst.stat().st_size == uniques[0].size:
+            if taken(dst):
+                # If the same file was already placed (from another pass),
+                # skip it, else add a suffix to avoid overwriting
+                if same_as_existing(choice, dst):
                     skipped_dup += 1
                     continue
-                # Different size: avoid overwrite by adding suffix
-                stem, ext = Path(filename).stem, Path(filename).suffix
                 dst = outdir / f"{stem}_1{ext}"
-            if dry_run:
-                print(f"[DRY-RUN] COPY {src} -> {dst}")
-            else:
-                shutil.copy2(src, dst)
+            plan.append((choice.path, dst))
+            planned.add(dst)
             copied += 1
 
-        else:
-            # Multiple unique versions for the same filename
-            # If they differ in BOTH creation time and size, label sequentially.
-            # Otherwise treat as duplicates and copy only one.
-            if _all_differ_in_both_ctime_and_size(uniques):
-                # Sort by creation time (oldest first)
-                uniques_sorted = sorted(uniques, key=lambda fi: fi.create_ts)
-                stem, ext = Path(filename).stem, Path(filename).suffix
-                for idx, fi in enumerate(uniques_sorted, start=1):
-                    suffix = f"_{str(idx).zfill(sequential_zero_pad)}"
-                    dst = outdir / f"{stem}{suffix}{ext}"
-                    if dst.exists():
-                        # Find the next available suffix to avoid accidental overwrite
-                        k = idx
-                        while dst.exists():
-                            k += 1
-                            suffix = f"_{str(k).zfill(sequential_zero_pad)}"
-                            dst = outdir / f"{stem}{suffix}{ext}"
-                    if dry_run:
-                        print(f"[DRY-RUN] COPY {fi.path} -> {dst}")
-                    else:
-                        shutil.copy2(fi.path, dst)
-                    made_sequential += 1
-            else:
-                # Treat as duplicates: pick the earliest by creation time and copy once
-                choice = min(uniques, key=lambda fi: fi.create_ts)
-                dst = outdir / filename
-                if dst.exists():
-                    if dst.stat().st_size == choice.size:
-                        skipped_dup += 1
-                        continue
-                    # Different size but not both differing -> keep just one, but avoid overwrite
-                    stem, ext = Path(filename).stem, Path(filename).suffix
-                    dst = outdir / f"{stem}_1{ext}"
-                if dry_run:
-                    print(f"[DRY-RUN] COPY {choice.path} -> {dst}")
-                else:
-                    shutil.copy2(choice.path, dst)
-                copied += 1
+    if dry_run:
+        for src, dst in plan:
+            print(f"[DRY-RUN] COPY {src} -> {dst}")
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(lambda job: _place(*job, link), plan))
+        index.save()
 
     print(
         f"Done. Copied: {copied}, Sequentially labeled: {made_sequential}, Skipped duplicates: {skipped_dup}"
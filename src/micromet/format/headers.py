@@ -18,12 +18,16 @@ from __future__ import annotations
 
 import csv
 import io
+import os
 import re
 import shutil
+import threading
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from difflib import SequenceMatcher
 from pathlib import Path
-from typing import Optional, Tuple, List
+from typing import Dict, Optional, Tuple, List
 
 import pandas as pd
 
@@ -35,6 +39,7 @@ import pandas as pd
 COMMON_DELIMITERS = [",", "\t", ";", "|", " "]  # space last (least likely)
 DEFAULT_ENCODINGS = ["utf-8-sig", "utf-8", "latin-1"]
 DEFAULT_SAMPLE_SIZE = 64_000
+DONOR_EXTENSIONS = {".csv", ".dat", ".txt", ".tsv"}
 
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -251,7 +256,11 @@ def detect_delimiter_and_header(
     """
     with open_text(path) as f:
         sample = f.read(sample_size)
-    
+    return _detect_from_sample(sample)
+
+
+def _detect_from_sample(sample: str) -> Tuple[str, bool]:
+    """Delimiter and header flag of a text sample; see `detect_delimiter_and_header`."""
     # Default delimiter guess: comma
     delimiter = ","
     has_header = False
@@ -308,6 +317,31 @@ def count_columns(path: Path, delimiter: str) -> int:
     return 0
 
 
+def _count_columns_in_sample(sample: str, delimiter: str, complete: bool) -> Optional[int]:
+    """
+    Count columns like `count_columns`, but from a leading text sample.
+
+    Returns None when the sample cannot decide, i.e. when it was cut short
+    and the first non-empty row may continue past its end.
+    """
+    if not complete:
+        cut = sample.rfind("\n")
+        if cut < 0:
+            return None
+        sample = sample[: cut + 1]
+    reader = csv.reader(io.StringIO(sample), delimiter=delimiter)
+    try:
+        for row in reader:
+            if row and any(cell.strip() != "" for cell in row):
+                # the row is only known to be whole if another one follows it
+                if complete or next(reader, None) is not None:
+                    return len(row)
+                return None
+    except csv.Error:
+        return None
+    return 0 if complete else None
+
+
 def read_colnames(path: Path) -> list[str]:
     """
     Read column names from the first line of a file.
@@ -389,11 +423,208 @@ def name_similarity(a: str, b: str) -> float:
     return SequenceMatcher(None, a, b).ratio()
 
 
+@dataclass(frozen=True)
+class FileSignature:
+    """
+    What donor selection needs to know about one delimited text file.
+
+    Attributes
+    ----------
+    path : Path
+        The file.
+    delimiter : str
+        Delimiter detected by `detect_delimiter_and_header`.
+    has_header : bool
+        Whether a header row was detected.
+    columns : int
+        Column count of the first non-empty row, as `count_columns`.
+    first_line : str
+        The raw first line, as `get_first_line_raw`.
+    mtime : float
+        Modification time when the signature was taken.
+    size : int
+        File size when the signature was taken.
+    """
+
+    path: Path
+    delimiter: str
+    has_header: bool
+    columns: int
+    first_line: str
+    mtime: float
+    size: int
+
+    @property
+    def is_donor(self) -> bool:
+        """True if the file can lend its first line as a header."""
+        return (
+            self.has_header
+            and self.path.suffix.lower() in DONOR_EXTENSIONS
+            and header_line_is_valid(self.first_line, self.delimiter, self.columns)
+        )
+
+
+def file_signature(
+    path: Path, sample_size: int = DEFAULT_SAMPLE_SIZE
+) -> FileSignature:
+    """
+    Take the signature of a file from one bounded read of its start.
+
+    The delimiter, header flag, column count and first line agree with
+    `detect_delimiter_and_header`, `count_columns` and `get_first_line_raw`;
+    those are only consulted again for rows longer than `sample_size`.
+
+    Parameters
+    ----------
+    path : Path
+        The file to inspect.
+    sample_size : int, optional
+        Number of characters to read. Defaults to 64,000.
+
+    Returns
+    -------
+    FileSignature
+    """
+    st = path.stat()
+    with open_text(path) as f:
+        first = f.readline(sample_size)
+        sample = first + f.read(sample_size - len(first))
+    complete = len(sample) < sample_size
+    delimiter, has_header = _detect_from_sample(sample)
+
+    columns = _count_columns_in_sample(sample, delimiter, complete)
+    if columns is None:
+        columns = count_columns(path, delimiter)
+    if complete or first.endswith(("\n", "\r")):
+        first_line = first.rstrip("\r\n")
+    else:
+        first_line = get_first_line_raw(path)
+    return FileSignature(
+        path, delimiter, has_header, columns, first_line, st.st_mtime, st.st_size
+    )
+
+
+class HeaderIndex:
+    """
+    Per-directory cache of `FileSignature` objects for donor lookups.
+
+    Each directory is indexed once, with bounded reads, and its donors are
+    bucketed by ``(delimiter, columns)`` so that finding the candidates for
+    a headerless file is a dictionary lookup. A directory is re-indexed
+    only when its own modification time changes; files whose size or
+    modification time changed since they were read are re-read.
+
+    Parameters
+    ----------
+    workers : int, optional
+        Threads used to read the files of a directory. Defaults to 8.
+    sample_size : int, optional
+        Characters read from the start of each file. Defaults to 64,000.
+    refresh : bool, optional
+        If False, a directory is indexed once and never revisited, so files
+        repaired after that do not become donors. Defaults to True.
+    """
+
+    def __init__(
+        self,
+        workers: int = 8,
+        sample_size: int = DEFAULT_SAMPLE_SIZE,
+        refresh: bool = True,
+    ):
+        self.workers = workers
+        self.sample_size = sample_size
+        self.refresh = refresh
+        self._dirs: Dict[Path, Tuple[float, Dict[str, FileSignature]]] = {}
+        self._donors: Dict[Path, Dict[Tuple[str, int], List[FileSignature]]] = {}
+        self._lock = threading.Lock()
+
+    def _read(self, path: Path) -> Optional[FileSignature]:
+        try:
+            return file_signature(path, self.sample_size)
+        except Exception:
+            # unreadable files can neither donate nor be repaired
+            return None
+
+    def signatures(self, folder: Path) -> Dict[str, FileSignature]:
+        """
+        Return the signatures of the regular files in `folder` by name.
+
+        Parameters
+        ----------
+        folder : Path
+            Directory to index.
+
+        Returns
+        -------
+        dict of str to FileSignature
+            Unreadable files are left out.
+        """
+        folder = Path(folder)
+        with self._lock:
+            cached = self._dirs.get(folder)
+        if cached is not None and not self.refresh:
+            return cached[1]
+        mtime = folder.stat().st_mtime
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        old = cached[1] if cached else {}
+        entries: Dict[str, FileSignature] = {}
+        stale: List[Path] = []
+        with os.scandir(folder) as it:
+            for entry in it:
+                if not entry.is_file():
+                    continue
+                st = entry.stat()
+                sig = old.get(entry.name)
+                if sig and sig.mtime == st.st_mtime and sig.size == st.st_size:
+                    entries[entry.name] = sig
+                else:
+                    stale.append(Path(entry.path))
+
+        if len(stale) > 1 and self.workers > 1:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                fresh = list(pool.map(self._read, stale))
+        else:
+            fresh = [self._read(p) for p in stale]
+        for p, sig in zip(stale, fresh):
+            if sig is not None:
+                entries[p.name] = sig
+
+        donors: Dict[Tuple[str, int], List[FileSignature]] = defaultdict(list)
+        for sig in entries.values():
+            if sig.is_donor:
+                donors[(sig.delimiter, sig.columns)].append(sig)
+        with self._lock:
+            self._dirs[folder] = (mtime, entries)
+            self._donors[folder] = dict(donors)
+        return entries
+
+    def signature(self, path: Path) -> Optional[FileSignature]:
+        """Return the signature of `path`, indexing its directory if needed."""
+        path = Path(path)
+        sig = self.signatures(path.parent).get(path.name)
+        if sig is None or not self.refresh:
+            return sig
+        st = path.stat()
+        if sig.mtime != st.st_mtime or sig.size != st.st_size:
+            return self._read(path)
+        return sig
+
+    def donors(self, folder: Path, delimiter: str, columns: int) -> List[FileSignature]:
+        """Return the header donors in `folder` with this delimiter and width."""
+        folder = Path(folder)
+        self.signatures(folder)
+        with self._lock:
+            return list(self._donors[folder].get((delimiter, columns), ()))
+
+
 def find_header_donor(
     target: Path,
     delimiter: str,
     expected_cols: int,
     min_name_sim: float = 0.4,
+    index: Optional[HeaderIndex] = None,
 ) -> Optional[Tuple[Path, str]]:
     """
     Find a peer file to serve as a header "donor".
@@ -409,6 +640,9 @@ def find_header_donor(
     is chosen. Ties are broken by selecting the one with the highest name
     similarity.
 
+    Candidates come from a `HeaderIndex`, so each file in the directory is
+    read once per index rather than once per lookup.
+
     Parameters
     ----------
     target : Path
@@ -420,6 +654,9 @@ def find_header_donor(
     min_name_sim : float, optional
         The minimum name similarity ratio (0.0 to 1.0) required for a file
         to be considered a potential donor. Defaults to 0.4.
+    index : HeaderIndex, optional
+        Index to take donor signatures from. Pass the same index to repeated
+        calls; a throwaway one is built when omitted.
 
     Returns
     -------
@@ -427,44 +664,28 @@ def find_header_donor(
         A tuple containing the path to the donor file and its raw header line,
         or None if no suitable donor is found.
     """
-    folder = target.parent
+    if index is None:
+        index = HeaderIndex(workers=1)
     t_mtime = target.stat().st_mtime
     t_stem = target.stem
     best: Optional[Tuple[float, float, Path, str]] = None  # (time_diff, -name_sim, path, header_line)
 
-    for p in folder.iterdir():
-        if p == target or not p.is_file():
+    for sig in index.donors(target.parent, delimiter, expected_cols):
+        p = sig.path
+        if p == target:
             continue
-        try:
-            # Only consider text-like files by extension
-            if p.suffix.lower() not in {".csv", ".dat", ".txt", ".tsv"}:
-                continue
-
-            d_delim, d_has_header = detect_delimiter_and_header(p)
-            if d_delim != delimiter:
-                # Different delimiter—skip to avoid mismatched header
-                continue
-            if not d_has_header:
-                continue
-            
-            cols = count_columns(p, d_delim)
-            if cols != expected_cols:
-                continue
-            
-            hdr = get_first_line_raw(p)
-            if not header_line_is_valid(hdr, d_delim, expected_cols):
-                continue
-            
-            sim = name_similarity(t_stem, p.stem)
-            if sim < min_name_sim:
-                continue
-            
-            diff = abs(p.stat().st_mtime - t_mtime)
-            key = (diff, -sim, p, hdr)
-            if best is None or key < best:
-                best = key
-        except Exception:
+        matcher = SequenceMatcher(None, t_stem, p.stem)
+        # quick_ratio is an upper bound on ratio and much cheaper
+        if matcher.quick_ratio() < min_name_sim:
+            continue
+        sim = matcher.ratio()
+        if sim < min_name_sim:
             continue
+
+        diff = abs(sig.mtime - t_mtime)
+        key = (diff, -sim, p, sig.first_line)
+        if best is None or key < best:
+            best = key
     
     if best is None:
         return None
@@ -581,20 +802,33 @@ def patch_file(donor: Path, target: Path) -> pd.DataFrame:
         A DataFrame containing the data from the target file with the
         new header.
     """
-    cols = read_colnames(donor)
-    delimiter = sniff_delimiter(donor)
-    
+    return _patch_with(read_colnames(donor), sniff_delimiter(donor), target)
+
+
+def _patch_with(cols: list[str], delimiter: str, target: Path) -> pd.DataFrame:
+    """Body of `patch_file` once the donor's columns and delimiter are known."""
     df = pd.read_csv(target, header=None, names=cols, delimiter=delimiter)
     df.to_csv(target, index=False, sep=delimiter, quoting=csv.QUOTE_NONE, escapechar="\\")
     
     return df
 
 
+def _first_line_has_header(path: Path) -> bool:
+    """Apply `looks_like_header` to a bounded read of the first line."""
+    with path.open("r", encoding="utf-8") as f:
+        return looks_like_header(f.readline(DEFAULT_SAMPLE_SIZE))
+
+
 # ──────────────────────────────────────────────────────────────────────────────
 # SINGLE FILE AND DIRECTORY PROCESSING
 # ──────────────────────────────────────────────────────────────────────────────
 
-def process_file(path: Path, min_sim: float, make_backup: bool) -> None:
+def process_file(
+    path: Path,
+    min_sim: float,
+    make_backup: bool,
+    index: Optional[HeaderIndex] = None,
+) -> None:
     """
     Detect and repair a headerless delimited text file in place.
 
@@ -615,6 +849,8 @@ def process_file(path: Path, min_sim: float, make_backup: bool) -> None:
     make_backup : bool
         If True, write a bytes-for-bytes backup alongside the file at
         ``path.with_suffix(path.suffix + ".bak")`` before modifying the file.
+    index : HeaderIndex, optional
+        Signature index shared between calls, see :func:`find_header_donor`.
 
     Returns
     -------
@@ -628,12 +864,21 @@ def process_file(path: Path, min_sim: float, make_backup: bool) -> None:
     Exception
         Any error originating from helper functions may propagate.
     """
-    delim, has_hdr = detect_delimiter_and_header(path)
-    if has_hdr:
+    if index is None:
+        index = HeaderIndex(workers=1)
+    sig = index.signature(path)
+    if sig is None:
+        sig = file_signature(path)  # let the read error propagate
+    if sig.has_header:
         return  # nothing to do
 
-    cols = count_columns(path, delim)
-    donor = find_header_donor(path, delimiter=delim, expected_cols=cols, min_name_sim=min_sim)
+    donor = find_header_donor(
+        path,
+        delimiter=sig.delimiter,
+        expected_cols=sig.columns,
+        min_name_sim=min_sim,
+        index=index,
+    )
     
     if donor is None:
         print(f"[SKIP] {path.name}: no donor found")
@@ -648,7 +893,9 @@ def process_file(path: Path, min_sim: float, make_backup: bool) -> None:
     print(f"[FIXED] {path.stem}  ← header from {dpath.name}")
 
 
-def scan(root: Path, min_sim: float = 0.5, backup: bool = False) -> None:
+def scan(
+    root: Path, min_sim: float = 0.5, backup: bool = False, workers: int = 8
+) -> None:
     """
     Recursively scan a directory tree and fix headerless text files.
 
@@ -656,6 +903,12 @@ def scan(root: Path, min_sim: float = 0.5, backup: bool = False) -> None:
     every file whose extension is in ``{".dat"}``. Exceptions raised by
     :func:`process_file` are caught and reported, allowing the scan to continue.
 
+    All files share one :class:`HeaderIndex`, so each file is read once to
+    index it and donors are looked up rather than searched for. Every
+    directory is indexed before any file is repaired; donors are therefore
+    the files that had a header when the scan started, whatever order the
+    files are processed in.
+
     Parameters
     ----------
     root : pathlib.Path
@@ -666,6 +919,8 @@ def scan(root: Path, min_sim: float = 0.5, backup: bool = False) -> None:
     backup : bool, default=False
         If True, create a ``.bak`` file for each modified file; passed through
         to :func:`process_file` as ``make_backup``.
+    workers : int, default=8
+        Number of threads used to index directories and repair files.
 
     Returns
     -------
@@ -679,15 +934,32 @@ def scan(root: Path, min_sim: float = 0.5, backup: bool = False) -> None:
     """
     TEXT_EXT = {".dat"}
 
-    for p in root.rglob("*"):
-        if p.is_file() and p.suffix.lower() in TEXT_EXT:
-            try:
-                process_file(p, min_sim=min_sim, make_backup=backup)
-            except Exception as exc:
-                print(f"[ERROR] {p.name}: {exc}")
-
+    targets = [
+        p for p in root.rglob("*") if p.is_file() and p.suffix.lower() in TEXT_EXT
+    ]
+    index = HeaderIndex(workers=workers, refresh=False)
+    folders = sorted({p.parent for p in targets})
 
-def fix_all_in_parent(parent: Path, searchstr: str = "*_AmeriFluxFormat_*.dat") -> dict:
+    def _fix(p: Path) -> None:
+        try:
+            process_file(p, min_sim=min_sim, make_backup=backup, index=index)
+        except Exception as exc:
+            print(f"[ERROR] {p.name}: {exc}")
+
+    if workers > 1 and len(targets) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(index.signatures, folders))
+            list(pool.map(_fix, targets))
+    else:
+        for folder in folders:
+            index.signatures(folder)
+        for p in targets:
+            _fix(p)
+
+
+def fix_all_in_parent(
+    parent: Path, searchstr: str = "*_AmeriFluxFormat_*.dat", workers: int = 8
+) -> dict:
     """
     Recursively scan a parent directory for files with duplicate names and fix missing headers.
 
@@ -702,6 +974,8 @@ def fix_all_in_parent(parent: Path, searchstr: str = "*_AmeriFluxFormat_*.dat")
         Root directory to scan for matching files. All subdirectories are included recursively.
     searchstr : str, optional
         Glob-style pattern to match filenames (default is "*_AmeriFluxFormat_*.dat").
+    workers : int, optional
+        Number of threads used to inspect and patch files (default is 8).
 
     Returns
     -------
@@ -713,6 +987,7 @@ def fix_all_in_parent(parent: Path, searchstr: str = "*_AmeriFluxFormat_*.dat")
     - Files are grouped by basename and inspected line-by-line to determine whether
       they contain a header.
     - If multiple files have headers, only the first one is used as the donor.
+      Its column names are read once for the whole group.
     - Files with no header and no matching header source are skipped.
     """
     # Collect every file path, grouped by basename
@@ -722,28 +997,31 @@ def fix_all_in_parent(parent: Path, searchstr: str = "*_AmeriFluxFormat_*.dat")
         if p.is_file():
             paths_by_name[p.name].append(p)
 
-    # Examine each group of duplicates
-    for fname, paths in paths_by_name.items():
-        if len(paths) < 2:
-            continue  # no duplicates → nothing to do
-
-        # Classify each copy
-        header_files, noheader_files = [], []
-        for p in paths:
-            first = p.open("r", encoding="utf-8").readline()
-            if looks_like_header(first):
-                header_files.append(p)
-            else:
-                noheader_files.append(p)
-
-        if not header_files or not noheader_files:
-            # Either (a) every copy already has a header, or (b) none do
-            continue
+    groups = [paths for paths in paths_by_name.values() if len(paths) >= 2]
+    candidates = [p for paths in groups for p in paths]  # no duplicates → nothing to do
+
+    # Classify each copy
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        has_header = dict(zip(candidates, pool.map(_first_line_has_header, candidates)))
+
+        jobs = []
+        for paths in groups:
+            header_files = [p for p in paths if has_header[p]]
+            noheader_files = [p for p in paths if not has_header[p]]
+
+            if not header_files or not noheader_files:
+                # Either (a) every copy already has a header, or (b) none do
+                continue
+
+            # Use the first header-bearing file as the "donor" for all others
+            donor = header_files[0]
+            cols = read_colnames(donor)
+            delimiter = sniff_delimiter(donor)
+            for tgt in noheader_files:
+                jobs.append((tgt, pool.submit(_patch_with, cols, delimiter, tgt)))
 
-        # Use the first header-bearing file as the "donor" for all others
-        donor = header_files[0]
-        for tgt in noheader_files:
-            df_fixed = patch_file(donor, tgt)
+        for tgt, job in jobs:
+            df_fixed = job.result()
             print(
                 f"[INFO]  Patched  {tgt.relative_to(parent)}   "
                 f"({len(df_fixed):,d} rows)"
@@ -817,6 +1095,9 @@ __all__ = [
     "header_line_is_valid",
     # Peer matching
     "name_similarity",
+    "FileSignature",
+    "file_signature",
+    "HeaderIndex",
     "find_header_donor",
     # Header application
     "prepend_header_in_place",
@@ -16,6 +16,7 @@ import micromet.format.reformatter_vars as reformatter_vars
 import micromet.qaqc.variable_limits as variable_limits
 from micromet.utils import logger_check
 from micromet.format import transformers
+from micromet.format import columnar
 from micromet.qaqc.netrad_limits import analyze_timestamp_alignment, flag_issues
 
 
@@ -46,6 +47,11 @@ class Reformatter:
     logger : logging.Logger, optional
         A logger for tracking the reformatting process. If not provided,
         a default logger is used.
+    engine : str, optional
+        Execution engine for `process`: 'pandas' (default) runs the step-by-step
+        transformer chain; 'columnar' runs the single-pass engine in
+        `micromet.format.columnar`, which produces identical output with
+        fewer full-frame copies.
 
     Attributes
     ----------
@@ -65,6 +71,8 @@ class Reformatter:
         The longitude of the site.
     site_utc_offset : float
         The UTC offset of the site in hours.
+    engine : str
+        The execution engine used by `process`.
     """
 
     def __init__(
@@ -76,6 +84,7 @@ class Reformatter:
         site_lon: float | None = None,
         site_utc_offset: int = -7,
         logger: logging.Logger | None = None,
+        engine: str = "pandas",
     ):
         """
         Initialize the Reformatter.
@@ -96,8 +105,13 @@ class Reformatter:
             UTC offset in hours (required if check_timestamps=True).
         logger : logging.Logger, optional
             A logger for tracking the reformatting process.
+        engine : str, optional
+            'pandas' (default) or 'columnar'.
         """
         self.logger = logger_check(logger)
+        if engine not in columnar.ENGINES:
+            raise ValueError(f"engine must be one of {columnar.ENGINES}")
+        self.engine = engine
         self.config = reformatter_vars.config
 
         if var_limits_csv is None:
@@ -183,7 +197,7 @@ class Reformatter:
         return df, report, timestamp_results
 
     def process(
-        self, df: pd.DataFrame, interval: int, data_type: str = "eddy"
+        self, df: pd.DataFrame, interval: int = 30, data_type: str = "eddy"
     ) -> Tuple[pd.DataFrame, pd.DataFrame, Optional[Dict]]:
         """
         Prepare the data by applying a series of cleaning and standardization steps.
@@ -201,8 +215,9 @@ class Reformatter:
             The type of data being processed (e.g., 'eddy', 'met'). This is
             used to determine which column renaming map to use.
             Defaults to 'eddy'.
-        interval: int
-            The sampling interval used with the data; must be either 30 or 60 minutes
+        interval: int, optional
+            The sampling interval used with the data; must be either 30 or 60
+            minutes. Defaults to 30.
 
         Returns
         -------
@@ -216,6 +231,12 @@ class Reformatter:
         """
         self.logger.info("Starting reformat (%s rows)", len(df))
 
+        if self.engine == "columnar":
+            try:
+                return self._process_columnar(df, interval, data_type)
+            except columnar.UnsupportedFrame as e:
+                self.logger.debug(f"Columnar engine unavailable ({e}); using pandas")
+
         # Standard pipeline
         df = df.pipe(transformers.fix_timestamps, logger=self.logger)
         df = df.pipe(
@@ -256,6 +277,37 @@ class Reformatter:
         self.logger.info("Done; final shape: %s", df.shape)
         return df, report, timestamp_results
 
+    def _process_columnar(
+        self, df: pd.DataFrame, interval: int, data_type: str
+    ) -> Tuple[pd.DataFrame, pd.DataFrame, Optional[Dict]]:
+        """Run `process` through the single-pass columnar engine."""
+        extra_columns = []
+        if self.check_timestamps:
+            extra_columns = [
+                "TIMESTAMP_START",
+                "TIMESTAMP_END",
+                "SW_IN",
+                "SW_IN_1_1_1",
+                "PPFD_IN",
+                "PPFD_IN_1_1_1",
+            ]
+        df, report, pre_drop = columnar.process_columnar(
+            df,
+            interval=interval,
+            data_type=data_type,
+            config=self.config,
+            drop_soil=self.drop_soil,
+            logger=self.logger,
+            extra_columns=extra_columns,
+        )
+
+        timestamp_results = None
+        if self.check_timestamps:
+            timestamp_results = self._check_timestamp_alignment(pre_drop)
+
+        self.logger.info("Done; final shape: %s", df.shape)
+        return df, report, timestamp_results
+
     def _check_timestamp_alignment(self, df: pd.DataFrame) -> Dict | None:
         """
         Perform timestamp alignment analysis on radiation data.
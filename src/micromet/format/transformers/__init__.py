@@ -37,6 +37,8 @@ from .columns import (
 )
 
 from .validation import (
+    match_limit_keys,
+    limit_plan,
     apply_physical_limits,
     mask_stuck_values,
 )
@@ -48,7 +50,9 @@ from .corrections import (
     ssitc_scale,
     scale_and_convert,
     rating,
+    rating_array,
     fill_na_drop_dups,
+    group_duplicate_columns,
 )
 
 from .cleanup import (
@@ -80,6 +84,8 @@ __all__ = [
     "col_order",
     
     # Validation functions
+    "match_limit_keys",
+    "limit_plan",
     "apply_physical_limits",
     "mask_stuck_values",
     
@@ -90,7 +96,9 @@ __all__ = [
     "ssitc_scale",
     "scale_and_convert",
     "rating",
+    "rating_array",
     "fill_na_drop_dups",
+    "group_duplicate_columns",
     
     # Cleanup functions
     "drop_extra_soil_columns",
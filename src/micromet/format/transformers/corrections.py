@@ -11,6 +11,16 @@ import re
 import numpy as np
 import pandas as pd
 
+_DUP_SUFFIX_RE = re.compile(r"^(?P<base>.+?)\.(?P<idx>\d+)$")
+
+SSITC_BASES = (
+    "FC_SSITC_TEST",
+    "LE_SSITC_TEST",
+    "ET_SSITC_TEST",
+    "H_SSITC_TEST",
+    "TAU_SSITC_TEST",
+)
+
 
 def apply_fixes(df: pd.DataFrame, logger: logging.Logger) -> pd.DataFrame:
     """
@@ -122,22 +132,17 @@ def ssitc_scale(df: pd.DataFrame, logger: logging.Logger) -> pd.DataFrame:
     pd.DataFrame
         The DataFrame with SSITC columns scaled where applicable.
     """
-    ssitc_bases = [
-        "FC_SSITC_TEST",
-        "LE_SSITC_TEST",
-        "ET_SSITC_TEST",
-        "H_SSITC_TEST",
-        "TAU_SSITC_TEST",
-    ]
-    ssitc_columns = [
-        col for col in df.columns 
-        if any(col.startswith(base) for base in ssitc_bases)
-    ]
-
-    for column in ssitc_columns:
-        if column in df.columns:
-            if df[column].max() > 3:
-                df[column] = scale_and_convert(df[column])
+    ssitc_columns = [col for col in df.columns if col.startswith(SSITC_BASES)]
+    if ssitc_columns:
+        maxima = df[ssitc_columns].max()
+        scaled = [col for col in ssitc_columns if maxima[col] > 3]
+        if scaled:
+            # one array operation for every column that needs rescaling
+            block = df[scaled].to_numpy(dtype=float, na_value=np.nan)
+            df[scaled] = pd.DataFrame(
+                rating_array(block), index=df.index, columns=scaled
+            )
+            for column in scaled:
                 logger.debug(f"Scaled SSITC {column}")
     logger.debug(f"Scaled SSITC len: {len(df)}")
     return df
@@ -148,8 +153,8 @@ def scale_and_convert(column: pd.Series) -> pd.Series:
     """
     Apply a rating transformation and convert the column to float type.
 
-    This function applies a 'rating' function to each element of the
-    Series and then converts the entire Series to float.
+    This function applies `rating_array`, the vectorized form of `rating`,
+    to the whole Series at once.
 
     Parameters
     ----------
@@ -161,8 +166,8 @@ def scale_and_convert(column: pd.Series) -> pd.Series:
     pd.Series
         The transformed and converted Series.
     """
-    column = column.apply(rating)
-    return column
+    values = column.to_numpy(dtype=float, na_value=np.nan)
+    return pd.Series(rating_array(values), index=column.index, name=column.name)
 
 
 def rating(x):
@@ -196,6 +201,32 @@ def rating(x):
     return x
 
 
+def rating_array(values: np.ndarray) -> np.ndarray:
+    """
+    Apply `rating` element-wise to an array of any shape.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        Numeric values; NaN is treated like None and rated 0.
+
+    Returns
+    -------
+    np.ndarray
+        Integer ratings (0, 1 or 2) with the shape of `values`.
+    """
+    values = np.asarray(values, dtype=float)
+    return np.select(
+        [
+            np.isnan(values),
+            (values >= 0) & (values <= 3),
+            (values >= 4) & (values <= 6),
+        ],
+        [0, 0, 1],
+        default=2,
+    )
+
+
 def fill_na_drop_dups(df: pd.DataFrame) -> pd.DataFrame:
     """
     Merge any number of duplicate columns with numeric suffixes (``.1``, ``.2``, ...),
@@ -230,6 +261,9 @@ def fill_na_drop_dups(df: pd.DataFrame) -> pd.DataFrame:
       Columns not matching this pattern are treated as base columns.
     - Merge precedence follows ascending numeric suffix order, with the base column
       (if present) considered first.
+    - Groups of ``float64``/``int64`` columns are stacked into one 2-D array and
+      the first non-missing value per row is picked with ``argmax``; other dtypes
+      fall back to ``combine_first``.
     - The input DataFrame is not modified in place; a copy is returned.
 
     Examples
@@ -245,53 +279,116 @@ def fill_na_drop_dups(df: pd.DataFrame) -> pd.DataFrame:
     ... })
     >>> fill_na_drop_dups(df)
          A     B
-    0    1  10.0
-    1    2  11.0
-    2    3  12.0
-    3    4  13.0
+    0  1.0  10.0
+    1  2.0  11.0
+    2  3.0  12.0
+    3  4.0  13.0
+    """
+    groups = group_duplicate_columns(df.columns)
+    if not groups:
+        return df.copy()
+    dtypes = dict(zip(df.columns, df.dtypes))
+
+    # One 2-D array per numpy dtype, one row per column
+    rows: dict[str, np.ndarray] = {}
+    for dtype in (np.float64, np.int64):
+        cols = [col for col, dt in dtypes.items() if dt == dtype]
+        if cols and df.columns.is_unique:
+            rows.update(zip(cols, df[cols].to_numpy().T))
+
+    merged_cols: list[str] = []  # float64 results, written as one block
+    merged_vals: list[np.ndarray] = []
+    other: dict[str, pd.Series] = {}
+    to_drop: list[str] = []
+
+    for base, items_sorted in groups.items():
+        # Drop all duplicates except the base
+        to_drop.extend(col for col in items_sorted if col != base)
+
+        if not all(col in rows for col in items_sorted):
+            other[base] = _merge_duplicates(df, items_sorted)
+            continue
+
+        stack = np.stack([rows[col] for col in items_sorted])
+        if stack.dtype == np.int64:
+            if not (stack == -9999).any():
+                # nothing is missing, so the first column wins everywhere
+                if base != items_sorted[0]:
+                    other[base] = df[items_sorted[0]]
+                continue
+            stack = stack.astype(float)
+
+        if len(stack) == 1:
+            merged = stack[0]
+        else:
+            # first non-missing value per row, in precedence order
+            valid = (stack == stack) & (stack != -9999)
+            first = valid.argmax(axis=0)
+            merged = np.take_along_axis(stack, first[np.newaxis], axis=0)[0]
+        # Re-impose sentinel for any remaining NaNs
+        merged_cols.append(base)
+        merged_vals.append(np.where(np.isnan(merged), -9999.0, merged))
+
+    # Deduplicate in case of overlap
+    to_drop = list(dict.fromkeys(to_drop))
+    replaced = set(to_drop).union(merged_cols, other)
+    df_out = pd.concat(
+        [
+            df.drop(columns=[col for col in df.columns if col in replaced]),
+            pd.DataFrame(
+                np.stack(merged_vals, axis=1) if merged_vals else None,
+                index=df.index,
+                columns=merged_cols,
+            ),
+            pd.DataFrame(other, index=df.index),
+        ],
+        axis=1,
+    )
+
+    # Existing bases keep their place; new ones are appended in group order
+    dropped = set(to_drop)
+    order = [col for col in df.columns if col not in dropped]
+    order += [base for base in groups if base not in df.columns]
+    return df_out[order]
+
+
+def _merge_duplicates(df: pd.DataFrame, columns: list[str]) -> pd.Series:
+    """Coalesce `columns` with pandas, for dtypes `fill_na_drop_dups` cannot stack."""
+    merged = None
+    for col in columns:
+        s = df[col].replace(-9999, np.nan)
+        merged = s if merged is None else merged.combine_first(s)
+    return merged.fillna(-9999)
+
+
+def group_duplicate_columns(columns) -> dict[str, list[str]]:
     """
-    df_out = df.copy()
-    pattern = re.compile(r"^(?P<base>.+?)\.(?P<idx>\d+)$")
+    Group column names by base name, ignoring a trailing ``.<number>`` suffix.
 
-    # Group columns by base name with numeric suffixes collected and sorted
+    Parameters
+    ----------
+    columns : iterable of str
+        Column names, e.g. as produced by `make_unique`.
+
+    Returns
+    -------
+    dict[str, list[str]]
+        Mapping of base name to its member columns, ordered by numeric suffix
+        with the unsuffixed base column (if present) first. Groups appear in
+        order of first appearance of any member.
+    """
     groups: dict[str, list[tuple[int, str]]] = {}
-    for col in df_out.columns:
-        m = pattern.match(col)
+    for col in columns:
+        m = _DUP_SUFFIX_RE.match(col)
         if m:
-            base = m.group("base")
-            idx = int(m.group("idx"))
-            groups.setdefault(base, []).append((idx, col))
+            groups.setdefault(m.group("base"), []).append((int(m.group("idx")), col))
         else:
             # Ensure singleton group for base-only column
             groups.setdefault(col, []).append((0, col))
-
-    to_drop: list[str] = []
-
-    for base, items in groups.items():
-        # Sort by numeric suffix (base column, if present, has idx==0)
-        items_sorted = sorted(items, key=lambda t: t[0])
-
-        merged = None
-        for _, col in items_sorted:
-            s = df_out[col].replace(-9999, np.nan)
-            merged = s if merged is None else merged.combine_first(s)
-
-        # Re-impose sentinel for any remaining NaNs
-        merged = merged.fillna(-9999)
-
-        # Write back to base column (create if it didn't exist)
-        df_out[base] = merged
-
-        # Drop all duplicates except the base
-        for _, col in items_sorted:
-            if col != base:
-                to_drop.append(col)
-
-    if to_drop:
-        # Deduplicate in case of overlap
-        df_out = df_out.drop(columns=list(dict.fromkeys(to_drop)))
-
-    return df_out
+    return {
+        base: [col for _, col in sorted(items, key=lambda t: t[0])]
+        for base, items in groups.items()
+    }
 
 
 __all__ = [
@@ -302,4 +399,5 @@ __all__ = [
     "scale_and_convert",
     "rating",
     "fill_na_drop_dups",
+    "group_duplicate_columns",
 ]
\ No newline at end of file
@@ -5,14 +5,216 @@ This module handles applying physical limits to data values and detecting
 stuck or anomalous sensor readings.
 """
 
-import math
-from typing import Iterable, Optional, Tuple, Union
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple, Union
 
 import numpy as np
 import pandas as pd
 
 import micromet.qaqc.variable_limits as variable_limits
 
+# Columns that never receive physical limits
+NO_LIMIT_COLUMNS = (
+    "CO2_DENSITY_SIGMA_1_1_1",
+    "FC_SAMPLES_1_1_1",
+    "H_SAMPLES_1_1_1",
+    "LE_SAMPLES_1_1_1",
+    "RECORD",
+    "TAU_QC_1_1_1",
+)
+
+
+def _limits_fingerprint(limits_dict: dict) -> tuple:
+    """Hashable ``(key, Min, Max)`` summary of a limits dictionary."""
+    return tuple(
+        (key, lim.get("Min", np.nan), lim.get("Max", np.nan))
+        for key, lim in limits_dict.items()
+    )
+
+
+@lru_cache(maxsize=8)
+def _limit_trie(fingerprint: tuple) -> dict:
+    """
+    Build a character trie over the limit keys.
+
+    Each node maps a character to a child node; the ``None`` entry of a node
+    holds the position (in dict order) of the key ending there.
+    """
+    trie: dict = {}
+    for pos, (key, _, _) in enumerate(fingerprint):
+        node = trie
+        for ch in key:
+            node = node.setdefault(ch, {})
+        node[None] = pos
+    return trie
+
+
+@lru_cache(maxsize=128)
+def _limit_plan(
+    fingerprint: tuple, columns: tuple, prefer_longest_key: bool
+) -> tuple:
+    """
+    Resolve the limit entry for every column, cached on the column tuple.
+
+    Returns a tuple of ``(column, key, Min, Max)`` entries in the order the
+    original key-by-key scan inserted them (winning key rank, then column
+    position), so reports keep their historical row order.
+    """
+    trie = _limit_trie(fingerprint)
+    if prefer_longest_key:
+        by_len = sorted(range(len(fingerprint)), key=lambda i: -len(fingerprint[i][0]))
+        rank = {pos: r for r, pos in enumerate(by_len)}
+    else:
+        rank = {pos: pos for pos in range(len(fingerprint))}
+
+    matched = []
+    for col_pos, col in enumerate(columns):
+        if col in NO_LIMIT_COLUMNS:
+            continue
+        node = trie
+        hits = [node[None]] if None in node else []
+        for ch in str(col):
+            node = node.get(ch)
+            if node is None:
+                break
+            if None in node:
+                hits.append(node[None])
+        if not hits:
+            continue
+        # hits run shortest to longest; otherwise the first key in dict order wins
+        pos = hits[-1] if prefer_longest_key else min(hits)
+        matched.append((rank[pos], col_pos, col, pos))
+
+    matched.sort(key=lambda t: (t[0], t[1]))
+    return tuple(
+        (col, fingerprint[pos][0], fingerprint[pos][1], fingerprint[pos][2])
+        for _, _, col, pos in matched
+    )
+
+
+def match_limit_keys(
+    columns: Iterable,
+    limits_dict: Optional[dict] = None,
+    prefer_longest_key: bool = True,
+) -> dict:
+    """
+    Match columns to entries of the physical limits dictionary by prefix.
+
+    Matching walks a trie of the limit keys once per column, and the result
+    is cached on the column tuple, so repeated calls for the same header are
+    dictionary lookups.
+
+    Parameters
+    ----------
+    columns : iterable
+        Column names to match. Names in `NO_LIMIT_COLUMNS` are skipped.
+    limits_dict : dict, optional
+        Limits keyed by variable name prefix. Defaults to
+        ``variable_limits.limits``.
+    prefer_longest_key : bool, optional
+        If True, the longest matching key wins; otherwise the first matching
+        key in dictionary order. Defaults to True.
+
+    Returns
+    -------
+    dict
+        Mapping of column name to ``{"key", "Min", "Max"}`` for every column
+        that matched a key.
+    """
+    plan = limit_plan(columns, limits_dict, prefer_longest_key)
+    return {col: {"key": key, "Min": mn, "Max": mx} for col, key, mn, mx in plan}
+
+
+def limit_plan(
+    columns: Iterable,
+    limits_dict: Optional[dict] = None,
+    prefer_longest_key: bool = True,
+) -> tuple:
+    """
+    Return the cached ``(column, key, Min, Max)`` limit plan for a header.
+
+    Parameters
+    ----------
+    columns : iterable
+        Column names to match.
+    limits_dict : dict, optional
+        Limits keyed by variable name prefix. Defaults to
+        ``variable_limits.limits``.
+    prefer_longest_key : bool, optional
+        If True, the longest matching key wins. Defaults to True.
+
+    Returns
+    -------
+    tuple
+        One ``(column, key, Min, Max)`` entry per matched column.
+    """
+    if limits_dict is None:
+        limits_dict = variable_limits.limits
+    return _limit_plan(
+        _limits_fingerprint(limits_dict), tuple(columns), prefer_longest_key
+    )
+
+
+def _limit_vectors(plan: tuple) -> Tuple[np.ndarray, np.ndarray]:
+    """Min and Max vectors of a limit plan, with missing limits as NaN."""
+    mins = np.array([np.nan if pd.isna(e[2]) else e[2] for e in plan], dtype=float)
+    maxs = np.array([np.nan if pd.isna(e[3]) else e[3] for e in plan], dtype=float)
+    return mins, maxs
+
+
+def _bound_block(
+    values: np.ndarray, mins: np.ndarray, maxs: np.ndarray, how: str = "mask"
+) -> Tuple[np.ndarray, np.ndarray, dict]:
+    """
+    Apply broadcast Min/Max bounds to a 2-D block (rows x columns).
+
+    The -9999 and -999900 placeholders are treated as missing. Returns the
+    bounded block, the in-bounds mask, and per-column report counts.
+    """
+    values = np.where((values == -9999) | (values == -999900), np.nan, values)
+    notna = ~np.isnan(values)
+    with np.errstate(invalid="ignore"):
+        lower_ok = (values >= mins) | np.isnan(mins)
+        upper_ok = (values <= maxs) | np.isnan(maxs)
+    ok = lower_ok & upper_ok
+
+    if how == "mask":
+        result = np.where(ok, values, np.nan)
+    else:
+        result = np.maximum(values, np.where(np.isnan(mins), -np.inf, mins))
+        result = np.minimum(result, np.where(np.isnan(maxs), np.inf, maxs))
+
+    counts = {
+        "n_valid": notna.sum(axis=0),
+        "n_below": (~lower_ok & notna).sum(axis=0),
+        "n_above": (~upper_ok & notna).sum(axis=0),
+        "n_flagged": (~ok & notna).sum(axis=0),
+    }
+    return result, ok, counts
+
+
+def _limits_report(plan: tuple, counts: dict) -> pd.DataFrame:
+    """Build the physical limits report from a plan and `_bound_block` counts."""
+    records = []
+    for j, (col, key, mn, mx) in enumerate(plan):
+        n_oor = int(counts["n_flagged"][j])
+        n_valid = counts["n_valid"][j]
+        records.append(
+            {
+                "column": col,
+                "matched_key": key,
+                "min": mn,
+                "max": mx,
+                "n_below": int(counts["n_below"][j]),
+                "n_above": int(counts["n_above"][j]),
+                "n_flagged": n_oor,
+                "pct_flagged": (n_oor / n_valid * 100.0) if n_valid else 0.0,
+            }
+        )
+    return pd.DataFrame.from_records(records).sort_values(
+        ["n_flagged", "column"], ascending=[False, True]
+    )
+
 
 def apply_physical_limits(
     df: pd.DataFrame,
@@ -27,7 +229,8 @@ def apply_physical_limits(
 
     This function applies physical limits (minimum and maximum) to the columns
     of a DataFrame. It can either mask out-of-bounds values with NaN or clip
-    them to the limits.
+    them to the limits. All matched columns are bounded at once as a 2-D
+    array against broadcast Min/Max vectors.
 
     Parameters
     ----------
@@ -58,17 +261,7 @@ def apply_physical_limits(
     if how not in {"mask", "clip"}:
         raise ValueError("how must be 'mask' or 'clip'")
 
-    limits_dict = variable_limits.limits
-
     out = df if inplace else df.copy()
-    no_limits = ['CO2_DENSITY_SIGMA_1_1_1', 'FC_SAMPLES_1_1_1', 
-                 'H_SAMPLES_1_1_1','LE_SAMPLES_1_1_1', 'RECORD',
-                 'TAU_QC_1_1_1']
-    col_list = [i for i in out.columns if i not in no_limits]
-
-    keys = list(limits_dict.keys())
-    if prefer_longest_key:
-        keys.sort(key=len, reverse=True)
 
     round_cols = ['ET_1_1_1', 'ET_1_1_2']
     if round_et:
@@ -77,77 +270,91 @@ def apply_physical_limits(
                 mask = df[col] < 0
                 out.loc[mask, col] = out.loc[mask, col].round(1)
 
-    col_map = {}
-    for key in keys:
-        matching_cols = [c for c in col_list if str(c).startswith(key)]
-        if not matching_cols:
-            continue
-        lim = limits_dict[key]
-        mn = lim.get("Min", np.nan)
-        mx = lim.get("Max", np.nan)
-        for col in matching_cols:
-            if col not in col_map or (
-                prefer_longest_key and len(key) > len(col_map[col]["key"])
-            ):
-                col_map[col] = {"key": key, "Min": mn, "Max": mx}
-
-    mask_df = pd.DataFrame(False, index=out.index, columns=out.columns)
-    records = []
+    plan = limit_plan(out.columns, variable_limits.limits, prefer_longest_key)
+    cols = [entry[0] for entry in plan]
+    mins, maxs = _limit_vectors(plan)
 
-    NA_PLACEHOLDER = -9999 
-    PLACEHOLDER2 =  -999900
-
-    for col, info in col_map.items():
-        key = info["key"]
-        mn = info["Min"]
-        mx = info["Max"]
-        ser = pd.to_numeric(out[col], errors="coerce")
-        is_na_placeholder = ser == NA_PLACEHOLDER
-        ser = ser.mask(is_na_placeholder, np.nan)
-        is_na_placeholder2 = ser == PLACEHOLDER2
-        ser = ser.mask(is_na_placeholder2, np.nan)
-
-        lower_ok = (
-            ser >= mn
-            if not (pd.isna(mn) or (isinstance(mn, float) and math.isnan(mn)))
-            else pd.Series(True, index=ser.index)
-        )
-        upper_ok = (
-            ser <= mx
-            if not (pd.isna(mx) or (isinstance(mx, float) and math.isnan(mx)))
-            else pd.Series(True, index=ser.index)
+    # Numeric 2-D block of every matched column
+    dtypes = [out[col].dtype for col in cols]
+    if all(dt.kind in "iufb" for dt in dtypes):
+        values = out[cols].to_numpy(dtype=float, na_value=np.nan)
+    else:
+        numeric = [pd.to_numeric(out[col], errors="coerce") for col in cols]
+        dtypes = [ser.dtype for ser in numeric]
+        values = np.empty((len(out), len(cols)), order="F")
+        for j, ser in enumerate(numeric):
+            values[:, j] = ser.to_numpy(dtype=float, na_value=np.nan)
+
+    result, ok, counts = _bound_block(values, mins, maxs, how)
+
+    # Columns that stay NaN-free and integral keep their integer/bool dtype
+    has_nan = np.isnan(result).any(axis=0)
+    with np.errstate(invalid="ignore"):
+        integral = (result == np.round(result)).all(axis=0)
+    keep_dtype = [
+        dtypes[j].kind in "iub" and not has_nan[j] and integral[j]
+        for j in range(len(cols))
+    ]
+    float_pos = [j for j, keep in enumerate(keep_dtype) if not keep]
+    if float_pos:
+        out[[cols[j] for j in float_pos]] = result[:, float_pos]
+    for j, keep in enumerate(keep_dtype):
+        if keep:
+            out[cols[j]] = pd.Series(result[:, j], index=out.index).astype(dtypes[j])
+
+    report = _limits_report(plan, counts)
+
+    mask_df = None
+    if return_mask:
+        mask_df = pd.DataFrame(False, index=out.index, columns=out.columns)
+        mask_df[cols] = ~ok
+    return (out, mask_df, report)
+
+
+def _change_points(
+    df: pd.DataFrame, cols: List[str], tolerance: Optional[float]
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Change-point bitmask for `mask_stuck_values`.
+
+    Returns the float values (0 for non-numeric columns), the NaN mask and
+    the change mask, each shaped (rows, columns). A row is a change point
+    when it differs from the previous row (by more than `tolerance` for
+    numeric columns) or when either row is NaN; row 0 always is one.
+    """
+    n = len(df)
+    values = np.zeros((n, len(cols)))
+    isna = np.zeros((n, len(cols)), dtype=bool)
+    changed = np.ones((n, len(cols)), dtype=bool)
+    numeric = [
+        j
+        for j, col in enumerate(cols)
+        if pd.api.types.is_numeric_dtype(df[col])
+        and not pd.api.types.is_bool_dtype(df[col])
+    ]
+    if numeric:
+        block = np.column_stack(
+            [df[cols[j]].to_numpy(dtype=float, na_value=np.nan) for j in numeric]
         )
-        ok = lower_ok & upper_ok
-        oor = ~ok
-        n_below = int((~lower_ok & ser.notna()).sum())
-        n_above = int((~upper_ok & ser.notna()).sum())
-        n_oor = int((oor & ser.notna()).sum())
-        if how == "mask":
-            ser_out = ser.where(ok)
+        nan = np.isnan(block)
+        step = np.zeros_like(nan)
+        if tolerance is not None:
+            step[1:] = np.abs(np.diff(block, axis=0)) > tolerance
         else:
-            ser_out = ser
-            if not pd.isna(mn):
-                ser_out = ser_out.clip(lower=mn)
-            if not pd.isna(mx):
-                ser_out = ser_out.clip(upper=mx)
-        out[col] = ser_out.astype(float) if ser_out.isna().any() else ser_out
-        mask_df[col] = oor
-        records.append(
-            {
-                "column": col,
-                "matched_key": key,
-                "min": mn,
-                "max": mx,
-                "n_below": n_below,
-                "n_above": n_above,
-                "n_flagged": n_oor,
-                "pct_flagged": (n_oor / ser.notna().sum() * 100.0) if ser.notna().sum() else 0.0,
-            }
-        )
-    report = pd.DataFrame.from_records(records).sort_values(
-        ["n_flagged", "column"], ascending=[False, True]
-    )
-    return (out, (mask_df if return_mask else None), report)
+            step[1:] = block[1:] != block[:-1]
+        step[1:] |= nan[1:] | nan[:-1]
+        step[0] = True
+        values[:, numeric] = block
+        isna[:, numeric] = nan
+        changed[:, numeric] = step
+    for j, col in enumerate(cols):
+        if j in numeric:
+            continue
+        s = df[col]
+        prev = s.shift(1)
+        isna[:, j] = s.isna().to_numpy()
+        changed[:, j] = ((s != prev) | s.isna() | prev.isna()).to_numpy()
+    return values, isna, changed
 
 
 def mask_stuck_values(
@@ -217,98 +424,84 @@ def mask_stuck_values(
         thresh_delta = pd.to_timedelta(threshold)
         thresh_count = None
 
-    # Prepare mask and report accumulator
-    mask_df = pd.DataFrame(False, index=df.index, columns=cols)
-    report_rows = []
-
-    for col in cols:
-        s = df[col]
-
-        # Boundaries: treat NaNs as breaking runs
-        notna = s.notna()
-
-        # Determine "change points"
-        if pd.api.types.is_numeric_dtype(s) and tolerance is not None:
-            # consider 'no change' if difference <= tolerance
-            # mark a change when |diff| > tol
-            diff = s.diff().abs()
-            changed = (diff > tolerance) | (~notna) | (~notna.shift(1, fill_value=False))  # type: ignore
-        else:
-            # exact equality
-            # change occurs when current != previous OR either is NaN
-            prev = s.shift(1)
-            changed = (s != prev) | (~notna) | (~prev.notna())
-
-        # Group by segments of constant value (between change points)
-        group_id = changed.cumsum()
-
-        # Iterate groups that are non-NaN and constant
-        for gid, idx in s.groupby(group_id).groups.items():
-            # idx is an index of row positions (labels)
-            block = s.loc[idx]
-            if block.isna().any():
-                # skip blocks with NaN; we don't mask NaNs and they break runs
-                continue
-
-            # For safety, verify constancy within tolerance/equality
-            if pd.api.types.is_numeric_dtype(block) and tolerance is not None:
-                is_const = (block.max() - block.min()) <= tolerance
-            else:
-                is_const = block.nunique(dropna=False) == 1
-
-            if not is_const:
-                continue  # shouldn't happen often, but keep it robust
-
-            # Compute run stats
-            start_time = block.index[0]
-            end_time = block.index[-1]
-            n_rows = block.size
-            duration = end_time - start_time  # timedelta
-
-            meets = False
-            if thresh_type == "count":
-                meets = n_rows >= thresh_count  # type: ignore
-            else:
-                # For single-row runs, duration == 0; interpret as < threshold
-                meets = duration >= thresh_delta
-
-            if meets:
-                # Mask the entire run
-                mask_df.loc[block.index, col] = True
-
-                # Stuck value for report (representative)
-                val = block.iloc[0]
-
-                report_rows.append(
-                    {
-                        "column": col,
-                        "value": val,
-                        "start": start_time,
-                        "end": end_time,
-                        "n_rows": n_rows,
-                        "duration": duration,
-                        "threshold_type": thresh_type,
-                        "threshold_value": (
-                            thresh_count if thresh_type == "count" else thresh_delta
-                        ),
-                    }
-                )
+    n = len(df)
+    values, isna, changed = _change_points(df, cols, tolerance)
+
+    # Runs: every column starts a run at row 0, so in column-major order the
+    # change points split the whole array into runs that never span columns.
+    starts = np.flatnonzero(changed.T.ravel())
+    lengths = np.diff(np.append(starts, n * len(cols)))
+    run_col, row_start = np.divmod(starts, max(n, 1))
+    row_end = row_start + lengths - 1
+
+    # NaNs are single-row runs of their own and are never masked
+    keep = ~isna.T.ravel()[starts]
+    if tolerance is not None and starts.size:
+        flat = values.T.ravel()
+        spread = np.maximum.reduceat(flat, starts) - np.minimum.reduceat(flat, starts)
+        keep &= ~(spread > tolerance)
+
+    start_time = df.index[row_start]
+    end_time = df.index[row_end]
+    duration = end_time - start_time
+    if thresh_type == "count":
+        keep &= lengths >= thresh_count
+    else:
+        keep &= np.asarray(duration >= thresh_delta)
+
+    # Mask every row of the kept runs via +1/-1 boundaries and a prefix sum
+    bounds = np.zeros(n * len(cols) + 1, dtype=np.int64)
+    np.add.at(bounds, starts[keep], 1)
+    np.add.at(bounds, starts[keep] + lengths[keep], -1)
+    mask = (np.cumsum(bounds[:-1]) > 0).reshape(len(cols), n).T
+    mask_df = pd.DataFrame(mask, index=df.index, columns=cols)
+
+    run_col, row_start = run_col[keep], row_start[keep]
+    run_values = np.empty(len(row_start), dtype=object)
+    for j in np.unique(run_col):
+        sel = np.flatnonzero(run_col == j)
+        run_values[sel] = df[cols[j]].to_numpy()[row_start[sel]]
+
+    report_cols = [
+        "column",
+        "value",
+        "start",
+        "end",
+        "n_rows",
+        "duration",
+        "threshold_type",
+        "threshold_value",
+    ]
+    report = pd.DataFrame(
+        {
+            "column": [cols[j] for j in run_col],
+            "value": pd.Series(run_values.tolist(), dtype=None),
+            "start": start_time[keep],
+            "end": end_time[keep],
+            "n_rows": lengths[keep].astype(np.int64),
+            "duration": duration[keep],
+            "threshold_type": thresh_type,
+            "threshold_value": [
+                thresh_count if thresh_type == "count" else thresh_delta
+            ]
+            * len(run_col),
+        },
+        columns=report_cols,
+    )
+    report = report.sort_values(["column", "start"]).reset_index(drop=True)
 
     # Build outputs
     masked_df = df.copy()
-    for col in cols:
-        masked_df.loc[mask_df[col], col] = mask_value
-
-    report = (
-        pd.DataFrame(report_rows)
-        .sort_values(["column", "start"])
-        .reset_index(drop=True)
-    )
+    for j, col in enumerate(cols):
+        masked_df.loc[mask[:, j], col] = mask_value
 
     return (masked_df, report, mask_df) if return_mask else (masked_df, report)
 
 
 __all__ = [
+    "NO_LIMIT_COLUMNS",
+    "match_limit_keys",
+    "limit_plan",
     "apply_physical_limits",
     "mask_stuck_values",
 ]
\ No newline at end of file
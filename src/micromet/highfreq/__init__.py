@@ -0,0 +1,55 @@
+"""
+Processing of raw high-frequency (10/20 Hz) eddy-covariance data.
+
+- fluxes: Period-batched means, rotated covariances and corrected fluxes
+- lag: FFT search for the sonic-IRGA lag of maximum covariance
+- streaming: One-pass, mergeable per-period moments for files larger than memory
+"""
+
+from .fluxes import (
+    HighFreqConfig,
+    read_high_freq,
+    reshape_periods,
+    period_moments,
+    double_rotation,
+    air_temperature,
+    compute_fluxes,
+    fluxes_from_moments,
+)
+from .lag import (
+    lagged_covariance,
+    lagged_covariance_direct,
+    find_lag,
+    shift_samples,
+)
+from .streaming import (
+    Moments,
+    StreamingMoments,
+    split_high_freq,
+    iter_high_freq,
+    stream_moments,
+    stream_statistics,
+    stream_fluxes,
+)
+
+__all__ = [
+    "HighFreqConfig",
+    "read_high_freq",
+    "reshape_periods",
+    "period_moments",
+    "double_rotation",
+    "air_temperature",
+    "compute_fluxes",
+    "fluxes_from_moments",
+    "lagged_covariance",
+    "lagged_covariance_direct",
+    "find_lag",
+    "shift_samples",
+    "Moments",
+    "StreamingMoments",
+    "split_high_freq",
+    "iter_high_freq",
+    "stream_moments",
+    "stream_statistics",
+    "stream_fluxes",
+]
@@ -0,0 +1,514 @@
+"""
+Eddy-covariance fluxes from raw high-frequency sonic and open-path IRGA data.
+
+Raw samples (``Ux``, ``Uy``, ``Uz``, ``CO2``, ``H2O``, ``T_SONIC``) are laid
+out as ``(n_periods, samples_per_period)`` arrays and every averaging period
+is processed at once with NumPy, following the EasyFlux-DL chain in
+``steps.txt``:
+
+1. optionally, the IRGA lag of maximum ``w``-scalar covariance per period,
+   see :mod:`micromet.highfreq.lag`,
+2. means and the full covariance matrix of the six variables per period,
+3. traditional (double) coordinate rotation of the wind covariances,
+4. air temperature from sonic temperature and the Schotanus humidity
+   correction of ``w'T'``,
+5. H, LE, FC, USTAR, TKE and the Webb-Pearman-Leuning density corrections.
+
+Frequency-response (Massman) corrections are not applied.
+
+References:
+    Webb, E.K., Pearman, G.I. & Leuning, R. (1980). Correction of flux
+        measurements for density effects due to heat and water vapour
+        transfer. Q. J. R. Meteorol. Soc., 106, 85-100.
+    Schotanus, P., Nieuwstadt, F.T.M. & de Bruin, H.A.R. (1983). Temperature
+        measurement with a sonic anemometer and its application to heat and
+        moisture fluxes. Boundary-Layer Meteorology, 26, 81-93.
+    Wilczak, J.M., Oncley, S.P. & Stage, S.A. (2001). Sonic anemometer tilt
+        correction algorithms. Boundary-Layer Meteorology, 99, 127-150.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from micromet import tob1
+from micromet.highfreq.lag import find_lag, shift_samples
+
+# ---------------------------------------------------------------------------
+# Physical constants
+# ---------------------------------------------------------------------------
+KELVIN = 273.15
+R_DRY = 287.05  # gas constant of dry air [J kg-1 K-1]
+R_VAPOR = 461.5  # gas constant of water vapour [J kg-1 K-1]
+CP_DRY = 1004.67  # specific heat of dry air [J kg-1 K-1]
+MU = 1.6077  # ratio of molar masses of dry air and water vapour
+M_CO2 = 44.01  # molar mass of CO2 [g mol-1]
+GRAVITY = 9.81  # [m s-2]
+K_VON_KARMAN = 0.4
+
+# Order of the variables in the per-period moment arrays
+VARIABLES = ("u", "v", "w", "ts", "co2", "h2o")
+U, V, W, TS, CO2, H2O = range(len(VARIABLES))
+
+
+@dataclass
+class HighFreqConfig:
+    """Layout, units and site settings of a raw high-frequency table.
+
+    Parameters
+    ----------
+    sample_rate : float
+        Sampling frequency [Hz].
+    averaging_period : str
+        Pandas offset alias of the averaging period, e.g. ``"30min"``.
+    columns : dict
+        Column name in the raw table for each of ``u, v, w, ts, co2, h2o``.
+        Sonic temperature is in deg C, CO2 density in mg m-3 and H2O
+        density in g m-3, as written by EasyFlux-DL.
+    pressure : float
+        Air pressure [kPa], used when the table has no pressure column.
+    pressure_column : str, optional
+        Column holding air pressure [kPa]; its period mean is used.
+    sonic_azimuth : float
+        Compass bearing of the sonic's positive x axis [degrees].
+    measurement_height : float, optional
+        Aerodynamic measurement height [m]; enables ``ZL``.
+    min_valid_fraction : float
+        Periods with a smaller fraction of complete samples get NaN fluxes.
+    max_lag : int, optional
+        Largest IRGA lag searched [samples]. When set, CO2 and H2O are each
+        shifted per period by the lag of maximum covariance with ``w``;
+        when None (default) no lag is applied.
+    min_lag : int, optional
+        Smallest IRGA lag searched [samples]; ``-max_lag`` if omitted.
+    default_lag : int
+        Lag used for periods whose search fails [samples].
+    """
+
+    sample_rate: float = 10.0
+    averaging_period: str = "30min"
+    columns: Optional[Dict[str, str]] = None
+    pressure: float = 86.0
+    pressure_column: Optional[str] = None
+    sonic_azimuth: float = 0.0
+    measurement_height: Optional[float] = None
+    min_valid_fraction: float = 0.9
+    max_lag: Optional[int] = None
+    min_lag: Optional[int] = None
+    default_lag: int = 0
+
+    def __post_init__(self):
+        columns = {
+            "u": "Ux",
+            "v": "Uy",
+            "w": "Uz",
+            "ts": "T_SONIC",
+            "co2": "CO2",
+            "h2o": "H2O",
+        }
+        columns.update(self.columns or {})
+        self.columns = columns
+
+    @property
+    def period(self) -> pd.Timedelta:
+        """The averaging period as a Timedelta."""
+        return pd.Timedelta(self.averaging_period)
+
+    @property
+    def samples_per_period(self) -> int:
+        """Number of samples in a complete averaging period."""
+        return int(round(self.period.total_seconds() * self.sample_rate))
+
+
+def read_high_freq(file: Union[str, Path]) -> pd.DataFrame:
+    """
+    Read a raw high-frequency table from a TOB1 or CSV file.
+
+    Parameters
+    ----------
+    file : str or Path
+        A TOB1 binary file or a CSV file with one sample per row. A
+        ``TIMESTAMP`` column, if present, becomes the index.
+
+    Returns
+    -------
+    pd.DataFrame
+        The raw samples.
+    """
+    if tob1.is_tob1(file):
+        df = tob1.read_tob1(file)
+    else:
+        df = pd.read_csv(file, na_values=["NAN", -9999])
+    if "TIMESTAMP" in df.columns:
+        df = df.set_index(pd.to_datetime(df.pop("TIMESTAMP")))
+    return df
+
+
+def reshape_periods(
+    df: pd.DataFrame,
+    config: HighFreqConfig,
+    start: Optional[pd.Timestamp] = None,
+) -> Tuple[pd.Index, Dict[str, np.ndarray]]:
+    """
+    Lay raw samples out as one row per averaging period.
+
+    With a DatetimeIndex, each sample goes to the period ending at or after
+    its timestamp (EasyFlux-DL convention) and to the slot given by its
+    offset within that period, so gaps and partial periods become NaN.
+    Without one, samples are cut into consecutive blocks of
+    ``config.samples_per_period`` and the last block is padded with NaN.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Raw samples holding the columns named in ``config.columns``.
+    config : HighFreqConfig
+        Sample rate, averaging period and column names.
+    start : pd.Timestamp, optional
+        For frames without a DatetimeIndex, the start of the first period.
+        Periods are then labelled by their end time instead of by number.
+
+    Returns
+    -------
+    periods : pd.Index
+        Label of each row: period end times, or ``0..n-1``.
+    arrays : dict of str to np.ndarray
+        ``(n_periods, samples_per_period)`` float arrays keyed by variable
+        (``u, v, w, ts, co2, h2o`` and ``pressure`` when configured).
+    """
+    spp = config.samples_per_period
+    names = dict(config.columns)
+    if config.pressure_column:
+        names["pressure"] = config.pressure_column
+    missing = [col for col in names.values() if col not in df.columns]
+    if missing:
+        raise KeyError(f"Raw table lacks columns {missing}")
+
+    if isinstance(df.index, pd.DatetimeIndex) and len(df):
+        period = config.period
+        times = df.index
+        ends = times.ceil(period)
+        first = ends.min()
+        offset = (times - (ends - period)).to_numpy()
+        slot = np.rint(offset / pd.Timedelta(seconds=1 / config.sample_rate)) - 1
+        slot = np.clip(slot.astype(np.int64), 0, spp - 1)
+        row = ((ends - first) // period).to_numpy().astype(np.int64)
+        n_periods = int(row.max()) + 1
+        periods = pd.DatetimeIndex(
+            first + period * np.arange(n_periods), name="TIMESTAMP_END"
+        )
+        arrays = {}
+        for key, col in names.items():
+            out = np.full((n_periods, spp), np.nan)
+            out[row, slot] = df[col].to_numpy(dtype=float, na_value=np.nan)
+            arrays[key] = out
+        return periods, arrays
+
+    n_periods = -(-len(df) // spp)
+    pad = n_periods * spp - len(df)
+    arrays = {}
+    for key, col in names.items():
+        values = df[col].to_numpy(dtype=float, na_value=np.nan)
+        arrays[key] = np.pad(values, (0, pad), constant_values=np.nan).reshape(
+            n_periods, spp
+        )
+    if start is None:
+        periods = pd.RangeIndex(n_periods, name="period")
+    else:
+        periods = pd.DatetimeIndex(
+            pd.Timestamp(start) + config.period * np.arange(1, n_periods + 1),
+            name="TIMESTAMP_END",
+        )
+    return periods, arrays
+
+
+def period_moments(
+    arrays: Dict[str, np.ndarray],
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Means and covariance matrices of the six flux variables for every period.
+
+    A sample is used only when all six variables are finite, so every
+    covariance in a period comes from the same samples.
+
+    Parameters
+    ----------
+    arrays : dict of str to np.ndarray
+        ``(n_periods, samples_per_period)`` arrays keyed by ``VARIABLES``.
+
+    Returns
+    -------
+    means : np.ndarray
+        ``(n_periods, 6)`` period means, NaN for empty periods.
+    cov : np.ndarray
+        ``(n_periods, 6, 6)`` population covariance matrices.
+    n : np.ndarray
+        ``(n_periods,)`` number of complete samples.
+    """
+    x = np.stack([arrays[name] for name in VARIABLES], axis=1)  # (P, 6, S)
+    valid = np.isfinite(x).all(axis=1)  # (P, S)
+    n = valid.sum(axis=1)
+    x = np.where(valid[:, np.newaxis, :], x, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = x.sum(axis=2) / n[:, np.newaxis]
+        dev = np.where(valid[:, np.newaxis, :], x - means[:, :, np.newaxis], 0.0)
+        cov = dev @ dev.transpose(0, 2, 1) / n[:, np.newaxis, np.newaxis]
+    return means, cov, n
+
+
+def double_rotation(means: np.ndarray, cov: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """
+    Rotate per-period moments into the mean streamline (double rotation).
+
+    The first rotation about z sets the mean lateral wind to zero, the
+    second about the new y axis sets the mean vertical wind to zero. Only
+    the wind rows and columns of the covariance matrices change.
+
+    Parameters
+    ----------
+    means : np.ndarray
+        ``(n_periods, 6)`` period means.
+    cov : np.ndarray
+        ``(n_periods, 6, 6)`` covariance matrices.
+
+    Returns
+    -------
+    means_rot : np.ndarray
+        Rotated means; mean ``v`` and ``w`` are zero.
+    cov_rot : np.ndarray
+        Rotated covariance matrices.
+    yaw, pitch : np.ndarray
+        Rotation angles [radians].
+    """
+    u, v, w = means[:, U], means[:, V], means[:, W]
+    yaw = np.arctan2(v, u)
+    pitch = np.arctan2(w, np.hypot(u, v))
+    cy, sy, cp, sp = np.cos(yaw), np.sin(yaw), np.cos(pitch), np.sin(pitch)
+
+    rot = np.zeros(means.shape[:1] + (6, 6))
+    rot[:, 0, 0], rot[:, 0, 1], rot[:, 0, 2] = cy * cp, sy * cp, sp
+    rot[:, 1, 0], rot[:, 1, 1] = -sy, cy
+    rot[:, 2, 0], rot[:, 2, 1], rot[:, 2, 2] = -cy * sp, -sy * sp, cp
+    rot[:, 3:, 3:] = np.eye(3)
+
+    means_rot = np.einsum("pij,pj->pi", rot, means)
+    cov_rot = rot @ cov @ rot.transpose(0, 2, 1)
+    return means_rot, cov_rot, yaw, pitch
+
+
+def air_temperature(ts_kelvin, rho_v, pressure):
+    """
+    Air temperature from sonic temperature, in the units given.
+
+    Solves ``Ts = T (1 + 0.32 e / P)`` with ``e = rho_v R_v T``.
+
+    Parameters
+    ----------
+    ts_kelvin : array_like
+        Sonic temperature [K].
+    rho_v : array_like
+        Water vapour density [kg m-3].
+    pressure : array_like
+        Air pressure [Pa].
+
+    Returns
+    -------
+    np.ndarray
+        Air temperature [K].
+    """
+    a = 0.32 * np.asarray(rho_v) * R_VAPOR / np.asarray(pressure)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t = (np.sqrt(1.0 + 4.0 * a * ts_kelvin) - 1.0) / (2.0 * a)
+    return np.where(a > 0, t, ts_kelvin)
+
+
+def compute_fluxes(
+    df: pd.DataFrame,
+    config: Optional[HighFreqConfig] = None,
+    start: Optional[pd.Timestamp] = None,
+) -> pd.DataFrame:
+    """
+    Compute turbulent fluxes for every averaging period of a raw table.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Raw high-frequency samples, see :func:`reshape_periods`.
+    config : HighFreqConfig, optional
+        Layout and site settings; defaults to 10 Hz EasyFlux-DL columns and
+        30-minute periods.
+    start : pd.Timestamp, optional
+        Start of the first period for frames without a DatetimeIndex.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per period with AmeriFlux-style columns:
+
+        - ``H``, ``LE`` [W m-2], ``FC`` [umol m-2 s-1] (density-corrected)
+          and ``TAU`` [kg m-1 s-2],
+        - ``USTAR``, ``WS`` [m s-1], ``WD`` [degrees], ``TKE`` [m2 s-2],
+        - ``U_SIGMA``, ``V_SIGMA``, ``W_SIGMA`` (rotated),
+        - ``T_SONIC``, ``TA`` [deg C], ``CO2_DENSITY`` [mg m-3],
+          ``H2O_DENSITY`` [g m-3], ``PA`` [kPa], ``RHO`` [kg m-3],
+        - ``COV_W_TS``, ``COV_W_CO2``, ``COV_W_H2O`` (rotated, raw units),
+        - ``MO_LENGTH`` [m], ``ZL`` (with a measurement height),
+        - ``YAW``, ``PITCH`` [degrees] and ``N_SAMPLES``,
+        - ``LAG_CO2``, ``LAG_H2O`` [samples] when ``config.max_lag`` is set.
+    """
+    config = config or HighFreqConfig()
+    periods, arrays = reshape_periods(df, config, start=start)
+    lags = {}
+    if config.max_lag is not None:
+        for name in ("co2", "h2o"):
+            lags[name], _ = find_lag(
+                arrays["w"],
+                arrays[name],
+                config.max_lag,
+                min_lag=config.min_lag,
+                default_lag=config.default_lag,
+            )
+            arrays[name] = shift_samples(arrays[name], lags[name])
+    means, cov, n = period_moments(arrays)
+
+    pa = None
+    if config.pressure_column:
+        values = arrays["pressure"]
+        finite = np.isfinite(values)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            pa = np.where(finite, values, 0.0).sum(axis=1) / finite.sum(axis=1)
+    result = fluxes_from_moments(periods, means, cov, n, config, pressure=pa)
+    for name, lag in lags.items():
+        result[f"LAG_{name.upper()}"] = lag
+    return result
+
+
+def fluxes_from_moments(
+    periods: pd.Index,
+    means: np.ndarray,
+    cov: np.ndarray,
+    n: np.ndarray,
+    config: Optional[HighFreqConfig] = None,
+    pressure: Optional[np.ndarray] = None,
+) -> pd.DataFrame:
+    """
+    Compute turbulent fluxes from per-period means and covariances.
+
+    This is the part of :func:`compute_fluxes` after the moments are known,
+    so moments accumulated elsewhere (e.g. streamed from files too large to
+    load) give the same fluxes.
+
+    Parameters
+    ----------
+    periods : pd.Index
+        Label of each period.
+    means : np.ndarray
+        ``(n_periods, 6)`` means in ``VARIABLES`` order.
+    cov : np.ndarray
+        ``(n_periods, 6, 6)`` population covariance matrices.
+    n : np.ndarray
+        ``(n_periods,)`` number of samples behind each period.
+    config : HighFreqConfig, optional
+        Site settings; defaults as in :func:`compute_fluxes`.
+    pressure : np.ndarray, optional
+        Mean air pressure per period [kPa]; ``config.pressure`` if omitted.
+
+    Returns
+    -------
+    pd.DataFrame
+        As :func:`compute_fluxes`.
+    """
+    config = config or HighFreqConfig()
+    n = np.asarray(n)
+    means_r, cov_r, yaw, pitch = double_rotation(means, cov)
+
+    if pressure is None:
+        pa = np.full(len(n), float(config.pressure))
+    else:
+        pa = np.asarray(pressure, dtype=float)
+    pressure = pa * 1000.0
+
+    ts = means[:, TS] + KELVIN
+    rho_v = means[:, H2O] / 1000.0  # kg m-3
+    rho_c = means[:, CO2] / 1000.0  # g m-3
+    ta = air_temperature(ts, rho_v, pressure)
+    e = rho_v * R_VAPOR * ta
+    rho_d = (pressure - e) / (R_DRY * ta)
+    rho = rho_d + rho_v
+    q = rho_v / rho
+    cp = CP_DRY * (1.0 + 0.84 * q)
+    lv = (2.501 - 0.00237 * (ta - KELVIN)) * 1e6  # J kg-1
+    sigma = rho_v / rho_d
+
+    cov_uw, cov_vw = cov_r[:, U, W], cov_r[:, V, W]
+    cov_w_ts = cov_r[:, W, TS]
+    cov_w_rv = cov_r[:, W, H2O] / 1000.0  # kg m-2 s-1
+    cov_w_rc = cov_r[:, W, CO2] / 1000.0  # g m-2 s-1
+
+    # Schotanus et al. (1983): sonic to air temperature flux
+    cov_w_ta = (cov_w_ts - 0.51 * ta * cov_w_rv / rho) / (1.0 + 0.51 * q)
+
+    # Webb, Pearman and Leuning (1980)
+    evap = (1.0 + MU * sigma) * (cov_w_rv + rho_v / ta * cov_w_ta)
+    fc = (
+        cov_w_rc
+        + MU * rho_c / rho_d * cov_w_rv
+        + (1.0 + MU * sigma) * rho_c / ta * cov_w_ta
+    )
+
+    ustar = (cov_uw**2 + cov_vw**2) ** 0.25
+    with np.errstate(invalid="ignore", divide="ignore"):
+        obukhov = -(ustar**3) * ts / (K_VON_KARMAN * GRAVITY * cov_w_ts)
+
+    wd_sonic = np.degrees(np.arctan2(-means[:, V], -means[:, U])) % 360.0
+    out = {
+        "H": rho * cp * cov_w_ta,
+        "LE": lv * evap,
+        "FC": fc / M_CO2 * 1e6,
+        "TAU": rho * ustar**2,
+        "USTAR": ustar,
+        "WS": np.hypot(means[:, U], means[:, V]),
+        "WD": (360.0 + config.sonic_azimuth - wd_sonic) % 360.0,
+        "TKE": 0.5 * (cov_r[:, U, U] + cov_r[:, V, V] + cov_r[:, W, W]),
+        "U_SIGMA": np.sqrt(cov_r[:, U, U]),
+        "V_SIGMA": np.sqrt(cov_r[:, V, V]),
+        "W_SIGMA": np.sqrt(cov_r[:, W, W]),
+        "T_SONIC": means[:, TS],
+        "TA": ta - KELVIN,
+        "CO2_DENSITY": means[:, CO2],
+        "H2O_DENSITY": means[:, H2O],
+        "PA": pa,
+        "RHO": rho,
+        "COV_W_TS": cov_w_ts,
+        "COV_W_CO2": cov_r[:, W, CO2],
+        "COV_W_H2O": cov_r[:, W, H2O],
+        "MO_LENGTH": obukhov,
+    }
+    if config.measurement_height is not None:
+        with np.errstate(divide="ignore"):
+            out["ZL"] = config.measurement_height / obukhov
+    out["YAW"] = np.degrees(yaw)
+    out["PITCH"] = np.degrees(pitch)
+
+    result = pd.DataFrame(out, index=periods)
+    short = n < config.min_valid_fraction * config.samples_per_period
+    result.loc[short, :] = np.nan
+    result["N_SAMPLES"] = n
+    return result
+
+
+__all__ = [
+    "HighFreqConfig",
+    "read_high_freq",
+    "reshape_periods",
+    "period_moments",
+    "double_rotation",
+    "air_temperature",
+    "compute_fluxes",
+    "fluxes_from_moments",
+]
@@ -0,0 +1,203 @@
+"""
+Time lag between the sonic anemometer and the gas analyser.
+
+The scalar signal of an open- or closed-path IRGA reaches the logger later
+than the vertical wind it should be paired with. As in the EasyFlux-DL step
+"Find the Maximum Covariance Values of All the Lags", the lag is chosen per
+averaging period as the one that maximises the absolute covariance of
+``w`` and the scalar.
+
+Covariances at all lags are computed for every period at once from FFT
+cross-correlations, O(S log S) per period instead of O(S x lags). Missing
+samples are handled by correlating indicator arrays, so each lag is
+normalised by the number of valid pairs it actually has.
+"""
+
+from __future__ import annotations
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+def _deviations(x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Deviations from the row means with NaN replaced by 0, and the mask."""
+    valid = np.isfinite(x)
+    filled = np.where(valid, x, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = filled.sum(axis=-1, keepdims=True) / valid.sum(axis=-1, keepdims=True)
+    return np.where(valid, x - mean, 0.0), valid.astype(float)
+
+
+def _lag_range(min_lag: Optional[int], max_lag: int) -> np.ndarray:
+    min_lag = -max_lag if min_lag is None else min_lag
+    if min_lag > max_lag:
+        raise ValueError(f"min_lag {min_lag} is larger than max_lag {max_lag}")
+    return np.arange(min_lag, max_lag + 1)
+
+
+def lagged_covariance(
+    x: np.ndarray,
+    y: np.ndarray,
+    max_lag: int,
+    min_lag: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Covariance of `x` and lagged `y` for a range of lags, via FFT.
+
+    ``cov[p, j]`` is the mean of ``x'[p, t] * y'[p, t + lags[j]]`` over the
+    pairs where both samples are valid, with deviations taken from each
+    row's own mean. A positive lag pairs `x` with later samples of `y`.
+
+    Parameters
+    ----------
+    x, y : np.ndarray
+        ``(n_periods, n_samples)`` arrays (or 1-D for a single period);
+        NaN marks missing samples.
+    max_lag : int
+        Largest lag [samples].
+    min_lag : int, optional
+        Smallest lag [samples]; ``-max_lag`` if omitted.
+
+    Returns
+    -------
+    lags : np.ndarray
+        The lags, ``min_lag..max_lag``.
+    cov : np.ndarray
+        ``(n_periods, n_lags)`` covariances; NaN where a lag has no pairs.
+    """
+    lags = _lag_range(min_lag, max_lag)
+    a, ma = _deviations(np.atleast_2d(np.asarray(x, dtype=float)))
+    b, mb = _deviations(np.atleast_2d(np.asarray(y, dtype=float)))
+    n = a.shape[-1]
+    n_fft = 1 << int(np.ceil(np.log2(n + np.abs(lags).max() + 1)))
+
+    def _xcorr(p, q):
+        # sum_t p[t] q[t + lag], read at index lag (negative lags wrap)
+        spec = np.conj(np.fft.rfft(p, n_fft)) * np.fft.rfft(q, n_fft)
+        return np.fft.irfft(spec, n_fft)[:, lags % n_fft]
+
+    sums = _xcorr(a, b)
+    pairs = np.rint(_xcorr(ma, mb))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = np.where(pairs > 0, sums / pairs, np.nan)
+    return lags, cov
+
+
+def lagged_covariance_direct(
+    x: np.ndarray,
+    y: np.ndarray,
+    max_lag: int,
+    min_lag: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Same as :func:`lagged_covariance`, computed lag by lag.
+
+    Kept as the reference for tests and benchmarks; it costs O(S) per lag.
+    """
+    lags = _lag_range(min_lag, max_lag)
+    a, ma = _deviations(np.atleast_2d(np.asarray(x, dtype=float)))
+    b, mb = _deviations(np.atleast_2d(np.asarray(y, dtype=float)))
+    n = a.shape[-1]
+    cov = np.full((a.shape[0], len(lags)), np.nan)
+    for j, lag in enumerate(lags):
+        if abs(lag) >= n:
+            continue
+        if lag >= 0:
+            sa, sb = slice(0, n - lag), slice(lag, n)
+        else:
+            sa, sb = slice(-lag, n), slice(0, n + lag)
+        pairs = (ma[:, sa] * mb[:, sb]).sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cov[:, j] = np.where(
+                pairs > 0, (a[:, sa] * b[:, sb]).sum(axis=1) / pairs, np.nan
+            )
+    return lags, cov
+
+
+def find_lag(
+    x: np.ndarray,
+    y: np.ndarray,
+    max_lag: int,
+    min_lag: Optional[int] = None,
+    default_lag: int = 0,
+    edge_fallback: bool = True,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Lag of maximum absolute covariance for every period.
+
+    Parameters
+    ----------
+    x, y : np.ndarray
+        ``(n_periods, n_samples)`` arrays, e.g. vertical wind and CO2.
+    max_lag : int
+        Largest lag searched [samples].
+    min_lag : int, optional
+        Smallest lag searched [samples]; ``-max_lag`` if omitted. Use 0 to
+        search only for delays of `y`.
+    default_lag : int, optional
+        Lag used where the search fails: no finite covariance in the
+        window or, with `edge_fallback`, a maximum on the window edge,
+        which means the true lag lies outside it. Defaults to 0.
+    edge_fallback : bool, optional
+        Whether a maximum on the window edge falls back to `default_lag`.
+        Defaults to True.
+
+    Returns
+    -------
+    lag : np.ndarray
+        ``(n_periods,)`` chosen lag [samples].
+    cov : np.ndarray
+        ``(n_periods,)`` covariance at the chosen lag.
+    """
+    lags, cov = lagged_covariance(x, y, max_lag, min_lag)
+    score = np.where(np.isfinite(cov), np.abs(cov), -1.0)
+    best = score.argmax(axis=1)
+    failed = score.max(axis=1) < 0
+    if edge_fallback and len(lags) > 1:
+        failed |= (best == 0) | (best == len(lags) - 1)
+
+    lag = np.where(failed, default_lag, lags[best])
+    at_default = np.clip(default_lag - lags[0], 0, len(lags) - 1)
+    chosen = np.where(failed, at_default, best)
+    value = np.take_along_axis(cov, chosen[:, np.newaxis], axis=1)[:, 0]
+    if not lags[0] <= default_lag <= lags[-1]:
+        # the default lies outside the searched window
+        _, fallback = lagged_covariance(x, y, default_lag, default_lag)
+        value = np.where(failed, fallback[:, 0], value)
+    return lag, value
+
+
+def shift_samples(values: np.ndarray, lag: np.ndarray) -> np.ndarray:
+    """
+    Shift each period's samples earlier by its lag.
+
+    ``out[p, t] = values[p, t + lag[p]]``; samples shifted in from outside
+    the period are NaN.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        ``(n_periods, n_samples)`` array.
+    lag : np.ndarray
+        ``(n_periods,)`` lags [samples].
+
+    Returns
+    -------
+    np.ndarray
+        The shifted array.
+    """
+    values = np.asarray(values, dtype=float)
+    n = values.shape[1]
+    idx = np.arange(n)[np.newaxis, :] + np.asarray(lag)[:, np.newaxis]
+    inside = (idx >= 0) & (idx < n)
+    out = np.take_along_axis(values, np.clip(idx, 0, n - 1), axis=1)
+    return np.where(inside, out, np.nan)
+
+
+__all__ = [
+    "lagged_covariance",
+    "lagged_covariance_direct",
+    "find_lag",
+    "shift_samples",
+]
@@ -0,0 +1,694 @@
+"""
+One-pass statistics for high-frequency files larger than memory.
+
+Raw files are read in chunks and every chunk is reduced to per-period
+central moment sums, which are merged into running accumulators with the
+pairwise update of Chan et al. (1979), extended to third and fourth moments
+by Pébay (2008). Per-sample Welford updates are the one-sample case of the
+same formulas. Memory is bounded by the chunk size plus a few numbers per
+open averaging period, and accumulators built from different parts of a
+file merge exactly, so a file can be split between workers.
+
+References:
+    Chan, T.F., Golub, G.H. & LeVeque, R.J. (1979). Updating formulae and a
+        pairwise algorithm for computing sample variances. Technical Report
+        STAN-CS-79-773, Stanford University.
+    Pébay, P. (2008). Formulas for robust, one-pass parallel computation of
+        covariances and arbitrary-order statistical moments. Sandia Report
+        SAND2008-6212.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from micromet import tob1
+from micromet.highfreq.fluxes import VARIABLES, HighFreqConfig, fluxes_from_moments
+
+DEFAULT_CHUNKSIZE = 100_000
+NA_VALUES = ["NAN", "NaN", "nan", "-9999", ""]
+TOA5_PREFIX = "TOA5"
+
+
+@dataclass
+class Moments:
+    """
+    Central moment sums of ``k`` variables for a batch of periods.
+
+    Attributes
+    ----------
+    n : np.ndarray
+        ``(P,)`` sample counts.
+    mean : np.ndarray
+        ``(P, k)`` means (zero for empty periods).
+    m2 : np.ndarray
+        ``(P, k, k)`` sums of products of deviations from the mean.
+    m3, m4 : np.ndarray
+        ``(P, k)`` sums of third and fourth powers of deviations.
+    """
+
+    n: np.ndarray
+    mean: np.ndarray
+    m2: np.ndarray
+    m3: np.ndarray
+    m4: np.ndarray
+
+    @classmethod
+    def empty(cls, n_periods: int, k: int) -> "Moments":
+        """Accumulators holding no samples."""
+        return cls(
+            np.zeros(n_periods, dtype=np.int64),
+            np.zeros((n_periods, k)),
+            np.zeros((n_periods, k, k)),
+            np.zeros((n_periods, k)),
+            np.zeros((n_periods, k)),
+        )
+
+    @classmethod
+    def from_samples(
+        cls, x: np.ndarray, keys: np.ndarray
+    ) -> Tuple[np.ndarray, "Moments"]:
+        """
+        Reduce samples to moment sums per period key.
+
+        Samples with any non-finite variable are skipped, so all moments of
+        a period come from the same samples.
+
+        Parameters
+        ----------
+        x : np.ndarray
+            ``(m, k)`` samples.
+        keys : np.ndarray
+            ``(m,)`` integer period key of each sample.
+
+        Returns
+        -------
+        keys : np.ndarray
+            Sorted unique keys that have samples.
+        moments : Moments
+            One row per returned key.
+        """
+        valid = np.isfinite(x).all(axis=1)
+        x, keys = x[valid], keys[valid]
+        k = x.shape[1]
+        if not len(keys):
+            return keys, cls.empty(0, k)
+        if (keys[1:] < keys[:-1]).any():
+            order = np.argsort(keys, kind="stable")
+            x, keys = x[order], keys[order]
+
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        n = np.diff(np.r_[starts, len(keys)])
+        mean = np.add.reduceat(x, starts, axis=0) / n[:, np.newaxis]
+        d = x - np.repeat(mean, n, axis=0)
+        d2 = d * d
+
+        iu, ju = np.triu_indices(k)
+        upper = np.add.reduceat(d[:, iu] * d[:, ju], starts, axis=0)
+        m2 = np.empty((len(starts), k, k))
+        m2[:, iu, ju] = upper
+        m2[:, ju, iu] = upper
+        m3 = np.add.reduceat(d2 * d, starts, axis=0)
+        m4 = np.add.reduceat(d2 * d2, starts, axis=0)
+        return keys[starts], cls(n, mean, m2, m3, m4)
+
+    def merge(self, other: "Moments") -> "Moments":
+        """
+        Combine with accumulators of the same periods from other samples.
+
+        Parameters
+        ----------
+        other : Moments
+            Accumulators aligned row by row with this one.
+
+        Returns
+        -------
+        Moments
+            Moments of the union of both sample sets.
+        """
+        na = self.n[:, np.newaxis].astype(float)
+        nb = other.n[:, np.newaxis].astype(float)
+        n = na + nb
+        safe = np.where(n > 0, n, 1.0)
+        delta = other.mean - self.mean
+        va = np.diagonal(self.m2, axis1=1, axis2=2)
+        vb = np.diagonal(other.m2, axis1=1, axis2=2)
+
+        mean = self.mean + delta * nb / safe
+        m2 = (
+            self.m2
+            + other.m2
+            + delta[:, :, np.newaxis]
+            * delta[:, np.newaxis, :]
+            * (na * nb / safe)[:, :, np.newaxis]
+        )
+        m3 = (
+            self.m3
+            + other.m3
+            + delta**3 * na * nb * (na - nb) / safe**2
+            + 3.0 * delta * (na * vb - nb * va) / safe
+        )
+        m4 = (
+            self.m4
+            + other.m4
+            + delta**4 * na * nb * (na * na - na * nb + nb * nb) / safe**3
+            + 6.0 * delta**2 * (na * na * vb + nb * nb * va) / safe**2
+            + 4.0 * delta * (na * other.m3 - nb * self.m3) / safe
+        )
+        return Moments(self.n + other.n, mean, m2, m3, m4)
+
+    def take(self, index) -> "Moments":
+        """Select periods by position or boolean mask."""
+        return Moments(
+            self.n[index],
+            self.mean[index],
+            self.m2[index],
+            self.m3[index],
+            self.m4[index],
+        )
+
+    def place(self, positions: np.ndarray, size: int) -> "Moments":
+        """Scatter these rows to `positions` of ``size`` empty accumulators."""
+        out = Moments.empty(size, self.mean.shape[1])
+        out.n[positions] = self.n
+        out.mean[positions] = self.mean
+        out.m2[positions] = self.m2
+        out.m3[positions] = self.m3
+        out.m4[positions] = self.m4
+        return out
+
+    @property
+    def covariance(self) -> np.ndarray:
+        """``(P, k, k)`` population covariance matrices."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self.m2 / self.n[:, np.newaxis, np.newaxis]
+
+    @property
+    def variance(self) -> np.ndarray:
+        """``(P, k)`` population variances."""
+        return np.diagonal(self.covariance, axis1=1, axis2=2)
+
+    @property
+    def skewness(self) -> np.ndarray:
+        """``(P, k)`` population skewness."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self.m3 / self.n[:, np.newaxis] / self.variance**1.5
+
+    @property
+    def kurtosis(self) -> np.ndarray:
+        """``(P, k)`` population excess kurtosis."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self.m4 / self.n[:, np.newaxis] / self.variance**2 - 3.0
+
+
+class StreamingMoments:
+    """
+    Per-period moment accumulators fed with chunks of raw samples.
+
+    Chunks must arrive in time order. A period is finished, and handed back
+    by :meth:`update`, as soon as a sample from a later period has been
+    seen; :meth:`flush` hands back the rest.
+
+    Parameters
+    ----------
+    columns : sequence of str
+        Columns to accumulate.
+    period : str, optional
+        Averaging period as a pandas offset alias. Defaults to ``"30min"``.
+    sample_rate : float, optional
+        Sampling frequency [Hz]; needed for chunks without a DatetimeIndex,
+        which are assigned to periods by sample count.
+    start : pd.Timestamp, optional
+        Start of the first period for untimed samples. Periods are then
+        labelled by end time instead of by number.
+    sample_offset : int, optional
+        Number of untimed samples that precede the first chunk, for
+        accumulators that start part way into a file. None if unknown, in
+        which case untimed chunks are rejected. Defaults to 0.
+    emit : bool, optional
+        If False, :meth:`update` keeps every period open, as needed for
+        partial accumulators that are merged later. Defaults to True.
+    """
+
+    def __init__(
+        self,
+        columns: Sequence[str],
+        period: str = "30min",
+        sample_rate: Optional[float] = None,
+        start: Optional[pd.Timestamp] = None,
+        sample_offset: Optional[int] = 0,
+        emit: bool = True,
+    ):
+        self.columns = list(columns)
+        self.period = pd.Timedelta(period)
+        self.sample_rate = sample_rate
+        self.start = None if start is None else pd.Timestamp(start)
+        self.emit = emit
+        self._samples = sample_offset
+        self._timed: Optional[bool] = None
+        self._unit = "ns"
+        self._keys = np.empty(0, dtype=np.int64)
+        self._acc = Moments.empty(0, len(self.columns))
+        self._last_key: Optional[int] = None
+
+    def _period_keys(self, chunk: pd.DataFrame) -> np.ndarray:
+        """Integer key of the period each sample belongs to."""
+        timed = isinstance(chunk.index, pd.DatetimeIndex)
+        if self._timed is None:
+            self._timed = timed
+        elif self._timed != timed:
+            raise ValueError("Cannot mix timestamped and untimed chunks")
+        if timed:
+            self._unit = chunk.index.unit
+            # periods are labelled by their end and include it
+            ns = chunk.index.as_unit("ns").asi8
+            return -(-ns // self.period.value)
+        if not self.sample_rate:
+            raise ValueError("Chunks without timestamps need a sample_rate")
+        if self._samples is None:
+            raise ValueError(
+                "Untimed text files can only be read in parallel with timestamps"
+            )
+        spp = int(round(self.period.total_seconds() * self.sample_rate))
+        keys = np.arange(self._samples, self._samples + len(chunk)) // spp
+        self._samples += len(chunk)
+        return keys
+
+    def _add(self, keys: np.ndarray, moments: Moments) -> None:
+        """Merge moment rows for `keys` into the open accumulators."""
+        union = np.union1d(self._keys, keys)
+        if len(union) == len(self._keys):
+            mine = self._acc
+        else:
+            mine = self._acc.place(np.searchsorted(union, self._keys), len(union))
+        theirs = moments.place(np.searchsorted(union, keys), len(union))
+        self._keys, self._acc = union, mine.merge(theirs)
+
+    def _pop(self, mask: np.ndarray) -> Tuple[np.ndarray, Moments]:
+        keys, moments = self._keys[mask], self._acc.take(mask)
+        self._keys, self._acc = self._keys[~mask], self._acc.take(~mask)
+        return keys, moments
+
+    def labels(self, keys: np.ndarray) -> pd.Index:
+        """Period labels for integer period keys."""
+        if self._timed:
+            ends = pd.to_datetime(keys * self.period.value, unit="ns")
+            return pd.DatetimeIndex(ends, name="TIMESTAMP_END").as_unit(self._unit)
+        if self.start is not None:
+            ends = self.start + self.period * (keys + 1)
+            return pd.DatetimeIndex(ends, name="TIMESTAMP_END")
+        return pd.Index(keys, name="period")
+
+    def update_moments(self, chunk: pd.DataFrame) -> Tuple[pd.Index, Moments]:
+        """
+        Add a chunk of samples; return the moments of finished periods.
+
+        Parameters
+        ----------
+        chunk : pd.DataFrame
+            Raw samples holding `columns`.
+
+        Returns
+        -------
+        labels : pd.Index
+            Labels of the finished periods.
+        moments : Moments
+            Their moment sums.
+        """
+        keys = self._period_keys(chunk)
+        x = chunk[self.columns].to_numpy(dtype=float, na_value=np.nan)
+        self._add(*Moments.from_samples(x, keys))
+        if len(keys):
+            last = int(keys.max())
+            self._last_key = (
+                last if self._last_key is None else max(self._last_key, last)
+            )
+        if not self.emit or self._last_key is None:
+            return self.labels(self._keys[:0]), self._acc.take(slice(0, 0))
+        keys, moments = self._pop(self._keys < self._last_key)
+        return self.labels(keys), moments
+
+    def flush_moments(self) -> Tuple[pd.Index, Moments]:
+        """Return and clear the moments of every open period."""
+        keys, moments = self._pop(np.ones(len(self._keys), dtype=bool))
+        return self.labels(keys), moments
+
+    def update(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """Add a chunk of samples; return statistics of finished periods."""
+        return self.frame(*self.update_moments(chunk))
+
+    def flush(self) -> pd.DataFrame:
+        """Return and clear statistics of every open period."""
+        return self.frame(*self.flush_moments())
+
+    def merge(self, other: "StreamingMoments") -> "StreamingMoments":
+        """
+        Merge another accumulator of the same columns into this one.
+
+        Used to combine partial accumulators built in parallel from
+        different parts of a file. Returns self.
+        """
+        if other.columns != self.columns or other.period != self.period:
+            raise ValueError("Accumulators differ in columns or period")
+        if self._timed is None:
+            self._timed, self._unit = other._timed, other._unit
+        self._add(other._keys, other._acc)
+        if other._last_key is not None:
+            self._last_key = (
+                other._last_key
+                if self._last_key is None
+                else max(self._last_key, other._last_key)
+            )
+        return self
+
+    def frame(self, labels: pd.Index, moments: Moments) -> pd.DataFrame:
+        """
+        Tabulate moments as statistics, one row per period.
+
+        Columns are ``N``, then ``<col>_MEAN``, ``<col>_VAR``, ``<col>_SKEW``
+        and ``<col>_KURT`` per column and ``COV_<a>_<b>`` per pair. All are
+        population statistics; kurtosis is excess kurtosis.
+        """
+        out = {"N": moments.n}
+        var, skew, kurt = moments.variance, moments.skewness, moments.kurtosis
+        for j, col in enumerate(self.columns):
+            out[f"{col}_MEAN"] = moments.mean[:, j]
+            out[f"{col}_VAR"] = var[:, j]
+            out[f"{col}_SKEW"] = skew[:, j]
+            out[f"{col}_KURT"] = kurt[:, j]
+        cov = moments.covariance
+        for i, j in zip(*np.triu_indices(len(self.columns), 1)):
+            out[f"COV_{self.columns[i]}_{self.columns[j]}"] = cov[:, i, j]
+        return pd.DataFrame(out, index=labels)
+
+
+class _RangeReader(io.RawIOBase):
+    """Raw binary stream over a file that ends at byte `end`."""
+
+    def __init__(self, raw, end: int):
+        self.raw = raw
+        self.end = end
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        size = min(len(buffer), self.end - self.raw.tell())
+        if size <= 0:
+            return 0
+        data = self.raw.read(size)
+        buffer[: len(data)] = data
+        return len(data)
+
+
+def _text_layout(file: Path) -> Tuple[List[str], int]:
+    """Column names and byte offset of the first data row of a text file."""
+    with file.open("rb") as fp:
+        first = fp.readline()
+        names = next(csv.reader([first.decode("utf-8-sig")]))
+        if names and names[0] == TOA5_PREFIX:
+            names = next(csv.reader([fp.readline().decode("utf-8")]))
+            fp.readline()  # units
+            fp.readline()  # processing
+        return names, fp.tell()
+
+
+def _split_text(file: Path, data_start: int, parts: int) -> List[Tuple[int, int]]:
+    """Cut the data rows of a text file into byte ranges on line boundaries."""
+    size = file.stat().st_size
+    bounds = [data_start]
+    with file.open("rb") as fp:
+        for i in range(1, parts):
+            guess = data_start + (size - data_start) * i // parts
+            if guess <= bounds[-1]:
+                continue
+            fp.seek(guess)
+            fp.readline()
+            if fp.tell() >= size:
+                break
+            bounds.append(fp.tell())
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def split_high_freq(file: Union[str, Path], parts: int) -> List[Tuple[int, int]]:
+    """
+    Divide a raw file into ranges that can be read independently.
+
+    Parameters
+    ----------
+    file : str or Path
+        A TOB1 or CSV/TOA5 file.
+    parts : int
+        Desired number of ranges; fewer are returned for small files.
+
+    Returns
+    -------
+    list of (int, int)
+        Record ranges for TOB1 files, byte ranges of whole lines otherwise.
+        Pass one to :func:`iter_high_freq` as `part`.
+    """
+    file = Path(file)
+    parts = max(1, int(parts))
+    if tob1.is_tob1(file):
+        n = tob1.tob1_record_count(file, tob1.read_tob1_header(file))
+        bounds = sorted({n * i // parts for i in range(parts + 1)})
+        return list(zip(bounds[:-1], bounds[1:]))
+    return _split_text(file, _text_layout(file)[1], parts)
+
+
+def iter_high_freq(
+    file: Union[str, Path],
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    part: Optional[Tuple[int, int]] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Read a raw high-frequency file in chunks of at most `chunksize` rows.
+
+    TOB1 files are memory-mapped; CSV files with a single header row and
+    TOA5 files are parsed incrementally. A ``TIMESTAMP`` column becomes the
+    index, as in :func:`micromet.highfreq.read_high_freq`.
+
+    Parameters
+    ----------
+    file : str or Path
+        The raw file.
+    chunksize : int, optional
+        Maximum rows per chunk. Defaults to 100,000.
+    part : tuple of int, optional
+        A range from :func:`split_high_freq`; the whole file if omitted.
+
+    Yields
+    ------
+    pd.DataFrame
+        Consecutive chunks of samples.
+    """
+    file = Path(file)
+    if tob1.is_tob1(file):
+        lo, hi = part or (0, None)
+        chunks = tob1.iter_tob1(file, chunksize=chunksize, start=lo, stop=hi)
+        for chunk in chunks:
+            if "TIMESTAMP" in chunk.columns:
+                chunk = chunk.set_index(pd.DatetimeIndex(chunk.pop("TIMESTAMP")))
+            yield chunk
+        return
+
+    names, data_start = _text_layout(file)
+    lo, hi = part or (data_start, file.stat().st_size)
+    with file.open("rb") as fp:
+        fp.seek(lo)
+        reader = pd.read_csv(
+            io.BufferedReader(_RangeReader(fp, hi)),
+            names=names,
+            header=None,
+            na_values=NA_VALUES,
+            chunksize=chunksize,
+        )
+        for chunk in reader:
+            if "TIMESTAMP" in chunk.columns:
+                stamps = pd.to_datetime(chunk.pop("TIMESTAMP"), format="ISO8601")
+                chunk = chunk.set_index(pd.DatetimeIndex(stamps))
+            yield chunk
+
+
+def _accumulate(
+    file: Path,
+    part: Tuple[int, int],
+    offset: Optional[int],
+    chunksize: int,
+    **kwargs,
+) -> StreamingMoments:
+    acc = StreamingMoments(sample_offset=offset, emit=False, **kwargs)
+    for chunk in iter_high_freq(file, chunksize=chunksize, part=part):
+        acc.update_moments(chunk)
+    return acc
+
+
+def stream_moments(
+    file: Union[str, Path],
+    columns: Sequence[str],
+    period: str = "30min",
+    sample_rate: Optional[float] = None,
+    start: Optional[pd.Timestamp] = None,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    workers: int = 1,
+) -> Iterator[Tuple[StreamingMoments, pd.Index, Moments]]:
+    """
+    Stream per-period moments out of a raw file.
+
+    With ``workers > 1`` the file is split with :func:`split_high_freq`,
+    each part is reduced on a thread and the partial accumulators are
+    merged, so all periods are produced together at the end.
+
+    Parameters
+    ----------
+    file : str or Path
+        A TOB1 or CSV/TOA5 file.
+    columns, period, sample_rate, start
+        As in :class:`StreamingMoments`.
+    chunksize : int, optional
+        Rows read at a time per worker. Defaults to 100,000.
+    workers : int, optional
+        Number of parts read in parallel. Defaults to 1.
+
+    Yields
+    ------
+    accumulator : StreamingMoments
+        The accumulator, for labelling and tabulating.
+    labels : pd.Index
+        Labels of finished periods.
+    moments : Moments
+        Their moment sums.
+    """
+    file = Path(file)
+    options = dict(columns=columns, period=period, sample_rate=sample_rate, start=start)
+    if workers <= 1:
+        acc = StreamingMoments(**options)
+        for chunk in iter_high_freq(file, chunksize=chunksize):
+            labels, moments = acc.update_moments(chunk)
+            if len(labels):
+                yield acc, labels, moments
+    else:
+        parts = split_high_freq(file, workers)
+        if tob1.is_tob1(file):
+            offsets = [lo for lo, _ in parts]
+        else:
+            # row counts of text parts are unknown until read
+            offsets = [0 if i == 0 else None for i in range(len(parts))]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            partials = list(
+                pool.map(
+                    lambda job: _accumulate(file, job[0], job[1], chunksize, **options),
+                    zip(parts, offsets),
+                )
+            )
+        acc = partials[0]
+        for partial in partials[1:]:
+            acc.merge(partial)
+    labels, moments = acc.flush_moments()
+    if len(labels):
+        yield acc, labels, moments
+
+
+def stream_statistics(
+    file: Union[str, Path],
+    columns: Sequence[str],
+    period: str = "30min",
+    sample_rate: Optional[float] = None,
+    start: Optional[pd.Timestamp] = None,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    workers: int = 1,
+) -> Iterator[pd.DataFrame]:
+    """
+    Stream per-period means, variances, covariances, skewness and kurtosis.
+
+    Parameters are as in :func:`stream_moments`.
+
+    Yields
+    ------
+    pd.DataFrame
+        Finished periods as they become available, in the layout of
+        :meth:`StreamingMoments.frame`.
+    """
+    for acc, labels, moments in stream_moments(
+        file, columns, period, sample_rate, start, chunksize, workers
+    ):
+        yield acc.frame(labels, moments)
+
+
+def stream_fluxes(
+    file: Union[str, Path],
+    config: Optional[HighFreqConfig] = None,
+    start: Optional[pd.Timestamp] = None,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    workers: int = 1,
+) -> Iterator[pd.DataFrame]:
+    """
+    Compute fluxes from a raw file without loading it into memory.
+
+    Parameters
+    ----------
+    file : str or Path
+        A TOB1 or CSV/TOA5 file of raw samples.
+    config : HighFreqConfig, optional
+        Layout and site settings, as in
+        :func:`micromet.highfreq.compute_fluxes`.
+    start, chunksize, workers
+        As in :func:`stream_moments`.
+
+    Yields
+    ------
+    pd.DataFrame
+        Flux rows of finished periods, as from
+        :func:`micromet.highfreq.compute_fluxes`.
+
+    Raises
+    ------
+    ValueError
+        If ``config.max_lag`` is set; the lag search needs every sample of
+        a period at once, use :func:`micromet.highfreq.compute_fluxes`.
+    """
+    config = config or HighFreqConfig()
+    if config.max_lag is not None:
+        raise ValueError("stream_fluxes cannot search IRGA lags; use compute_fluxes")
+    columns = [config.columns[name] for name in VARIABLES]
+    if config.pressure_column:
+        columns.append(config.pressure_column)
+    k = len(VARIABLES)
+    for _, labels, moments in stream_moments(
+        file,
+        columns,
+        config.averaging_period,
+        config.sample_rate,
+        start,
+        chunksize,
+        workers,
+    ):
+        pressure = moments.mean[:, k] if config.pressure_column else None
+        yield fluxes_from_moments(
+            labels,
+            moments.mean[:, :k],
+            moments.covariance[:, :k, :k],
+            moments.n,
+            config,
+            pressure=pressure,
+        )
+
+
+__all__ = [
+    "Moments",
+    "StreamingMoments",
+    "split_high_freq",
+    "iter_high_freq",
+    "stream_moments",
+    "stream_statistics",
+    "stream_fluxes",
+]
@@ -46,10 +46,14 @@ from __future__ import annotations
 import argparse
 import json
 import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from dataclasses import dataclass, field, asdict
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
 
 import pandas as pd
 import numpy as np
@@ -57,7 +61,7 @@ import numpy as np
 from micromet.reader import AmerifluxDataProcessor
 from micromet.format.reformatter import Reformatter
 from micromet.qaqc import variable_limits
-from micromet.report import gap_summary, validate, graphs
+from micromet.report import gap_summary, validate
 from micromet.utils import (
     logger_check,
     read_site_config,
@@ -93,6 +97,8 @@ class PipelineConfig:
         Expected data frequency (e.g., '30min').
     output_format : str
         Output file format ('csv', 'parquet', 'feather').
+    reformat_engine : str
+        Reformatter execution engine ('pandas' or 'columnar').
     """
     
     check_timestamps: bool = True
@@ -103,6 +109,7 @@ class PipelineConfig:
     var_limits_csv: Optional[Path] = None
     expected_freq: str = '30min'
     output_format: str = 'csv'
+    reformat_engine: str = 'pandas'
     
     def to_dict(self) -> dict:
         """Convert configuration to dictionary."""
@@ -141,7 +148,9 @@ class ProcessingResult:
     error_message : str or None
         Error message if processing failed.
     reports : dict
-        Dictionary of generated reports.
+        Dictionary of generated reports. `to_dict` lists each DataFrame
+        report by its row count and columns; the reports themselves are
+        saved as CSV next to the output.
     """
     
     site_id: str
@@ -163,6 +172,12 @@ class ProcessingResult:
         d['input_file'] = str(d['input_file'])
         if d['output_file'] is not None:
             d['output_file'] = str(d['output_file'])
+        # DataFrames are not JSON serializable; summarize them instead
+        d['reports'] = {
+            name: {'n_rows': len(report), 'columns': [str(c) for c in report.columns]}
+            if isinstance(report, pd.DataFrame) else str(report)
+            for name, report in self.reports.items()
+        }
         return d
     
     def summary(self) -> str:
@@ -233,6 +248,7 @@ class Pipeline:
         site_id: Optional[str] = None,
         output_dir: Optional[Union[str, Path]] = None,
         data_type: str = 'eddy',
+        output_tag: Optional[str] = None,
     ) -> ProcessingResult:
         """
         Process a single data file through the complete pipeline.
@@ -247,6 +263,10 @@ class Pipeline:
             Directory for output files. If None, uses input file directory.
         data_type : str, optional
             Type of data ('eddy' or 'met'). Defaults to 'eddy'.
+        output_tag : str, optional
+            Label included in the output and report file names so files from
+            the same station do not overwrite each other. Defaults to the
+            input file stem.
         
         Returns
         -------
@@ -255,6 +275,8 @@ class Pipeline:
         """
         start_time = datetime.now()
         input_file = Path(input_file)
+        if output_tag is None:
+            output_tag = input_file.stem
         
         # Extract site_id if not provided
         if site_id is None:
@@ -299,12 +321,12 @@ class Pipeline:
             if output_dir:
                 self.logger.info("Step 5/5: Saving output...")
                 output_file = self._save_output(
-                    df_clean, site_id, Path(output_dir), data_type
+                    df_clean, site_id, Path(output_dir), data_type, output_tag
                 )
                 
                 # Save reports
                 if reports and self.config.generate_reports:
-                    self._save_reports(reports, site_id, Path(output_dir))
+                    self._save_reports(reports, site_id, Path(output_dir), output_tag)
             else:
                 self.logger.info("Step 5/5: Skipping save (no output_dir)")
             
@@ -351,6 +373,8 @@ class Pipeline:
         output_dir: Union[str, Path],
         pattern: str = "*Flux*.dat",
         data_type: str = 'eddy',
+        workers: Optional[int] = 1,
+        executor: str = 'process',
     ) -> List[ProcessingResult]:
         """
         Process multiple files in a directory.
@@ -365,11 +389,18 @@ class Pipeline:
             Glob pattern for finding input files. Defaults to "*Flux*.dat".
         data_type : str, optional
             Type of data ('eddy' or 'met'). Defaults to 'eddy'.
+        workers : int or None, optional
+            Number of files to process concurrently. ``1`` (default) processes
+            files sequentially in this process; ``None`` uses ``os.cpu_count()``.
+        executor : str, optional
+            Pool used when ``workers > 1``: ``'process'`` (default) or
+            ``'thread'``.
         
         Returns
         -------
         list of ProcessingResult
-            Results for all processed files.
+            Results for all processed files, in sorted file order regardless
+            of the order in which they completed.
         """
         input_dir = Path(input_dir)
         output_dir = Path(output_dir)
@@ -384,18 +415,17 @@ class Pipeline:
         
         self.logger.info(f"Found {len(files)} files to process")
         
-        results = []
-        for i, file in enumerate(files, 1):
-            self.logger.info(f"\n{'='*60}")
-            self.logger.info(f"File {i}/{len(files)}: {file.name}")
-            self.logger.info(f"{'='*60}")
-            
-            result = self.process_file(
-                input_file=file,
-                output_dir=output_dir,
-                data_type=data_type
-            )
-            results.append(result)
+        results = list(self.iter_process_files(
+            files,
+            output_dir=output_dir,
+            data_type=data_type,
+            workers=workers,
+            executor=executor,
+        ))
+        
+        # Restore file order so the summary does not depend on completion order
+        order = {Path(f): i for i, f in enumerate(files)}
+        results.sort(key=lambda r: order.get(Path(r.input_file), len(order)))
         
         # Generate batch summary
         self._log_batch_summary(results)
@@ -403,6 +433,99 @@ class Pipeline:
         
         return results
     
+    def iter_process_files(
+        self,
+        files: Sequence[Union[str, Path]],
+        output_dir: Optional[Union[str, Path]] = None,
+        data_type: str = 'eddy',
+        workers: Optional[int] = 1,
+        executor: str = 'process',
+    ) -> Iterator[ProcessingResult]:
+        """
+        Process files and yield each ProcessingResult as soon as it finishes.
+        
+        With ``workers > 1`` the files are fanned out over a process or thread
+        pool. Every task builds its own Pipeline (and therefore its own
+        reader) with a logger named after the worker, so no reader state is
+        shared between concurrently processed files.
+        
+        Parameters
+        ----------
+        files : sequence of str or Path
+            Input files to process.
+        output_dir : str or Path, optional
+            Directory for output files.
+        data_type : str, optional
+            Type of data ('eddy' or 'met'). Defaults to 'eddy'.
+        workers : int or None, optional
+            Number of concurrent workers. ``1`` (default) runs sequentially;
+            ``None`` uses ``os.cpu_count()``.
+        executor : str, optional
+            ``'process'`` (default) or ``'thread'``.
+        
+        Yields
+        ------
+        ProcessingResult
+            Results in completion order (file order when sequential).
+        """
+        if executor not in ('process', 'thread'):
+            raise ValueError("executor must be 'process' or 'thread'")
+        
+        files = [Path(f) for f in files]
+        # Fix every file's output name up front so concurrent workers never
+        # write to the same path
+        tags = _output_tags(files)
+        n_workers = (os.cpu_count() or 1) if workers is None else int(workers)
+        n_workers = max(1, min(n_workers, len(files) or 1))
+        
+        if n_workers == 1:
+            for i, (file, tag) in enumerate(zip(files, tags), 1):
+                self.logger.info(f"\n{'='*60}")
+                self.logger.info(f"File {i}/{len(files)}: {file.name}")
+                self.logger.info(f"{'='*60}")
+                
+                yield self.process_file(
+                    input_file=file,
+                    output_dir=output_dir,
+                    data_type=data_type,
+                    output_tag=tag
+                )
+            return
+        
+        pool_cls = ProcessPoolExecutor if executor == 'process' else ThreadPoolExecutor
+        self.logger.info(f"Processing {len(files)} files with {n_workers} {executor} workers")
+        
+        with pool_cls(max_workers=n_workers) as pool:
+            futures = {
+                pool.submit(
+                    _process_file_worker,
+                    self.config,
+                    file,
+                    output_dir,
+                    data_type,
+                    tag,
+                    self.logger.name,
+                    self.logger.getEffectiveLevel(),
+                ): file
+                for file, tag in zip(files, tags)
+            }
+            for i, future in enumerate(as_completed(futures), 1):
+                file = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # Worker died outside process_file (e.g. broken pool)
+                    self.logger.error(f"✗ Worker failed on {file.name}: {e}")
+                    result = ProcessingResult(
+                        site_id=self._extract_site_id(file),
+                        success=False,
+                        input_file=file,
+                        error_message=str(e)
+                    )
+                status = "done" if result.success else "FAILED"
+                self.logger.info(f"File {i}/{len(files)} {status}: {file.name}")
+                yield result
+    
     def process_station(
         self,
         site_id: str,
@@ -482,7 +605,8 @@ class Pipeline:
                 site_id=site_id,
                 check_timestamps=self.config.check_timestamps,
                 drop_soil=self.config.drop_soil,
-                var_limits_csv=self.config.var_limits_csv
+                var_limits_csv=self.config.var_limits_csv,
+                engine=self.config.reformat_engine
             )
         except (FileNotFoundError, KeyError):
             self.logger.warning(
@@ -491,7 +615,8 @@ class Pipeline:
             reformatter = Reformatter(
                 check_timestamps=False,  # Can't check without site config
                 drop_soil=self.config.drop_soil,
-                var_limits_csv=self.config.var_limits_csv
+                var_limits_csv=self.config.var_limits_csv,
+                engine=self.config.reformat_engine
             )
         
         # Process the data
@@ -583,13 +708,14 @@ class Pipeline:
         df: pd.DataFrame,
         site_id: str,
         output_dir: Path,
-        data_type: str
+        data_type: str,
+        output_tag: str
     ) -> Path:
         """Save processed data to file."""
         output_dir.mkdir(parents=True, exist_ok=True)
         
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"{site_id}_{data_type}_processed_{timestamp}"
+        filename = f"{site_id}_{data_type}_{output_tag}_processed_{timestamp}"
         
         if self.config.output_format == 'csv':
             output_file = output_dir / f"{filename}.csv"
@@ -610,7 +736,8 @@ class Pipeline:
         self,
         reports: Dict[str, pd.DataFrame],
         site_id: str,
-        output_dir: Path
+        output_dir: Path,
+        output_tag: str
     ) -> None:
         """Save QA/QC reports to files."""
         report_dir = output_dir / 'reports' / site_id
@@ -620,7 +747,7 @@ class Pipeline:
         
         for name, report_df in reports.items():
             if isinstance(report_df, pd.DataFrame) and not report_df.empty:
-                filename = report_dir / f"{name}_{timestamp}.csv"
+                filename = report_dir / f"{name}_{output_tag}_{timestamp}.csv"
                 report_df.to_csv(filename, index=False)
                 self.logger.debug(f"  Saved {name} report to {filename}")
     
@@ -685,6 +812,53 @@ class Pipeline:
         self.logger.info(f"\nBatch summary saved to {summary_file}")
 
 
+# =============================================================================
+# Parallel Workers
+# =============================================================================
+
+def _worker_logger(base_name: str, level: int) -> logging.Logger:
+    """Return a per-worker child of ``base_name`` named after the process or thread."""
+    proc = multiprocessing.current_process()
+    if proc.name == 'MainProcess':
+        worker = threading.current_thread().name
+    else:
+        worker = proc.name
+    logger = logging.getLogger(f"{base_name}.{worker}")
+    logger.setLevel(level)
+    return logger
+
+
+def _output_tags(files: Sequence[Path]) -> List[str]:
+    """Unique output label per input: the file stem, numbered when stems repeat."""
+    counts = {}
+    for file in files:
+        counts[file.stem] = counts.get(file.stem, 0) + 1
+    return [
+        file.stem if counts[file.stem] == 1 else f"{file.stem}_{i}"
+        for i, file in enumerate(files, 1)
+    ]
+
+
+def _process_file_worker(
+    config: PipelineConfig,
+    input_file: Path,
+    output_dir: Optional[Union[str, Path]],
+    data_type: str,
+    output_tag: str,
+    logger_name: str,
+    log_level: int,
+) -> ProcessingResult:
+    """Process one file in a pool worker with its own Pipeline and logger."""
+    logger = _worker_logger(logger_name, log_level)
+    pipeline = Pipeline(config=config, logger=logger)
+    return pipeline.process_file(
+        input_file=input_file,
+        output_dir=output_dir,
+        data_type=data_type,
+        output_tag=output_tag
+    )
+
+
 # =============================================================================
 # Convenience Functions
 # =============================================================================
@@ -721,6 +895,8 @@ def process_station(
 def batch_process(
     input_dir: Union[str, Path],
     output_dir: Union[str, Path],
+    workers: Optional[int] = 1,
+    executor: str = 'process',
     **kwargs
 ) -> List[ProcessingResult]:
     """
@@ -732,6 +908,10 @@ def batch_process(
         Input directory.
     output_dir : str or Path
         Output directory.
+    workers : int or None, optional
+        Number of concurrent workers (see `Pipeline.batch_process`).
+    executor : str, optional
+        ``'process'`` (default) or ``'thread'``.
     **kwargs
         Additional arguments passed to Pipeline constructor.
     
@@ -741,7 +921,9 @@ def batch_process(
         Results for all processed files.
     """
     pipeline = Pipeline(**kwargs)
-    return pipeline.batch_process(input_dir, output_dir)
+    return pipeline.batch_process(
+        input_dir, output_dir, workers=workers, executor=executor
+    )
 
 
 # =============================================================================
@@ -764,6 +946,9 @@ Examples:
   # Batch process all files
   python -m micromet.pipeline --batch --input data/ --output results/
   
+  # Batch process on 8 worker processes
+  python -m micromet.pipeline --batch --input data/ --output results/ --workers 8
+  
   # With custom settings
   python -m micromet.pipeline --site US-UTW --input data/ --output results/ \\
       --no-timestamp-check --keep-soil --format parquet
@@ -798,6 +983,14 @@ Examples:
                        help='Generate diagnostic plots')
     parser.add_argument('--format', choices=['csv', 'parquet', 'feather'],
                        default='csv', help='Output file format (default: csv)')
+    parser.add_argument('--engine', choices=['pandas', 'columnar'], default='pandas',
+                       help='Reformatter execution engine (default: pandas)')
+    
+    # Parallelism
+    parser.add_argument('--workers', '-w', type=int, default=1,
+                       help='Number of files to process concurrently in batch mode (default: 1)')
+    parser.add_argument('--executor', choices=['process', 'thread'], default='process',
+                       help='Worker pool type for --workers > 1 (default: process)')
     
     # Logging
     parser.add_argument('--verbose', '-v', action='store_true',
@@ -826,7 +1019,8 @@ Examples:
         drop_soil=not args.keep_soil,
         generate_reports=not args.no_reports,
         generate_plots=args.plots,
-        output_format=args.format
+        output_format=args.format,
+        reformat_engine=args.engine
     )
     
     # Create pipeline
@@ -849,7 +1043,9 @@ Examples:
         results = pipeline.batch_process(
             input_dir=input_path,
             output_dir=output_path,
-            data_type=args.data_type
+            data_type=args.data_type,
+            workers=args.workers,
+            executor=args.executor
         )
         
     else:
@@ -58,6 +58,100 @@ def set_range_to_nan(
 
     return df_copy
 
+def lagged_correlation_batch(x, y, lags):
+    """
+    Lagged Pearson correlation for every row of two 2-D arrays, via FFT.
+
+    ``out[i, j]`` equals ``pd.Series(x[i]).corr(pd.Series(y[i]).shift(lags[j]))``:
+    each lag uses only the pairs where both values are present, with means
+    and variances taken over those pairs. The masked sums n, sum(x),
+    sum(y), sum(x^2), sum(y^2) and sum(xy) for every lag come from FFT
+    cross-correlations of the zero-filled rows and their validity
+    indicators, so a row costs O(N log N) instead of O(N) per lag.
+
+    Parameters:
+    - x, y (np.ndarray): Arrays of shape (n_rows, N), or 1-D for one row;
+      NaN marks missing values.
+    - lags (array-like of int): Shifts applied to `y` along the last axis.
+
+    Returns:
+    - np.ndarray: Correlations of shape (n_rows, len(lags)); NaN where fewer
+      than two pairs overlap or either side is constant.
+    """
+    lags = np.asarray(lags, dtype=int)
+    x = np.atleast_2d(np.asarray(x, dtype=float))
+    y = np.atleast_2d(np.asarray(y, dtype=float))
+    if x.shape != y.shape:
+        raise ValueError("x and y must have the same shape")
+    if not len(lags) or not x.size:
+        return np.full((x.shape[0], len(lags)), np.nan)
+
+    def standardise(a):
+        # Correlation is unchanged and the sums stay well conditioned for
+        # the variance cancellation below
+        mask = np.isfinite(a)
+        count = np.maximum(mask.sum(axis=1, keepdims=True), 1)
+        filled = np.where(mask, a, 0.0)
+        mean = filled.sum(axis=1, keepdims=True) / count
+        dev = np.where(mask, a - mean, 0.0)
+        std = np.sqrt((dev * dev).sum(axis=1, keepdims=True) / count)
+        return dev / np.where(std > 0, std, 1.0), mask.astype(float)
+
+    x, m1 = standardise(x)
+    y, m2 = standardise(y)
+
+    n_fft = 1 << int(np.ceil(np.log2(x.shape[1] + np.abs(lags).max() + 1)))
+    idx = lags % n_fft
+    rfft = np.fft.rfft
+
+    def xcorr(p, q_spec):
+        # sum_t p[t] * q[t - lag]
+        return np.fft.irfft(rfft(p, n_fft) * np.conj(q_spec), n_fft)[:, idx]
+
+    spec_y = rfft(y, n_fft)
+    spec_yy = rfft(y * y, n_fft)
+    spec_m2 = rfft(m2, n_fft)
+    n = np.rint(xcorr(m1, spec_m2))
+    sx = xcorr(x, spec_m2)
+    sxx = xcorr(x * x, spec_m2)
+    sy = xcorr(m1, spec_y)
+    syy = xcorr(m1, spec_yy)
+    sxy = xcorr(x, spec_y)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        var_x = n * sxx - sx * sx
+        var_y = n * syy - sy * sy
+        corr = (n * sxy - sx * sy) / np.sqrt(var_x * var_y)
+    # Round-off leaves tiny variances where the overlap is really constant
+    tiny = 1e-9 * n * n
+    corr[(n < 2) | (var_x <= tiny) | (var_y <= tiny)] = np.nan
+    return np.clip(corr, -1.0, 1.0)
+
+def lagged_correlation(s1, s2, lags):
+    """
+    Pearson correlation of `s1` with `s2` shifted by each lag, via FFT.
+
+    Equivalent to ``[s1.corr(s2.shift(lag)) for lag in lags]`` for equally
+    spaced series, computed in O(N log N) with
+    :func:`lagged_correlation_batch`.
+
+    Parameters:
+    - s1, s2 (pd.Series or array-like): Equally spaced, aligned series of the
+      same length; NaN marks missing values.
+    - lags (array-like of int): Shifts applied to `s2`, as in ``Series.shift``.
+
+    Returns:
+    - pd.Series: Correlation indexed by lag; NaN where fewer than two pairs
+      overlap or either side is constant.
+    """
+    lags = np.asarray(lags, dtype=int)
+    x = np.asarray(s1, dtype=float)
+    y = np.asarray(s2, dtype=float)
+    if len(x) != len(y):
+        raise ValueError("s1 and s2 must have the same length")
+    corr = lagged_correlation_batch(x, y, lags)[0]
+    return pd.Series(corr, index=pd.Index(lags, name='lag'))
+
 # find optimal shift between two sets of data, using your desired frequency and 
 # min and max lags to inspect
 # created to align met data with very bad timestamps (e.g., off by months)
@@ -125,11 +219,11 @@ def find_optimal_shift(
     # Combine the two directional searches
     lags = np.concatenate([negative_lags, positive_lags])
     
-    # Calculate correlation for each lag
-    # pd.Series.corr() handles NaNs resulting from the shift operation.
-    correlations = [s1_full.corr(s2_full.shift(lag)) for lag in lags]
+    # Calculate correlation for each lag in one FFT pass; like
+    # s1_full.corr(s2_full.shift(lag)) it skips pairs with a NaN on either side.
+    correlations = lagged_correlation(s1_full, s2_full, lags).to_numpy()
 
-    if all(pd.isna(correlations)):
+    if np.isnan(correlations).all():
         print("Warning: All correlations resulted in NaN. Data may be constant or invalid.")
         return 0, np.nan
 
@@ -31,7 +31,6 @@ from typing import Dict, Iterable, Optional, Tuple
 
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
 
 from datetime import datetime
 import pytz
@@ -914,6 +913,8 @@ def plot_summary(
     dict
         A dictionary of matplotlib Figure handles for the generated plots.
     """
+    import matplotlib.pyplot as plt
+
     figs = {}
     data = summary.copy()
     if which_year is not None:
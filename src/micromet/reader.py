@@ -1,27 +1,33 @@
 """
 This module provides the AmerifluxDataProcessor class for reading and parsing
-AmeriFlux-style CSV files (TOA5 or AmeriFlux output) into a pandas DataFrame.
+AmeriFlux-style CSV files (TOA5 or AmeriFlux output) and Campbell TOB1 binary
+files into a pandas DataFrame.
 """
 
 from __future__ import annotations
 
+import importlib.util
 import logging
 from pathlib import Path
-from typing import Optional, Union
+from typing import Dict, List, Optional, Sequence, Union
 
 import numpy as np
 import pandas as pd
 
+import micromet.format.reformatter_vars as reformatter_vars
+from micromet import tob1
 from micromet.utils import logger_check
 from micromet.station_info import site_folders, loggerids
 
+_HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
 
 class AmerifluxDataProcessor:
     """
     A class for reading and parsing AmeriFlux-style CSV files.
 
-    This class is designed to handle Campbell Scientific TOA5 files or
-    standard AmeriFlux output files, parsing them into a pandas DataFrame.
+    This class is designed to handle Campbell Scientific TOA5 or TOB1 files
+    or standard AmeriFlux output files, parsing them into a pandas DataFrame.
 
     Parameters
     ----------
@@ -42,6 +48,10 @@ class AmerifluxDataProcessor:
     _TOA5_PREFIX = "TOA5"
     _HEADER_PREFIX = "TIMESTAMP_START"
     NA_VALUES = ["-9999", "NAN", "NaN", "nan", np.nan, -9999.0]
+    # String form of NA_VALUES for the C and pyarrow engines
+    _FAST_NA_VALUES = ["-9999", "-9999.0", "NAN", "NaN", "nan", ""]
+    # Columns holding 12-digit YYYYMMDDHHMM stamps kept as integers
+    _STAMP_COLUMNS = ("TIMESTAMP_START", "TIMESTAMP_END")
 
     def __init__(
         self,
@@ -58,24 +68,34 @@ class AmerifluxDataProcessor:
         """
         self.logger = logger_check(logger)
         self.skip_rows = 0
+        self.units: List[str] = []
 
-    def to_dataframe(self, file: Union[str, Path]) -> pd.DataFrame:
+    def to_dataframe(self, file: Union[str, Path], fast: bool = False) -> pd.DataFrame:
         """
         Read an AmeriFlux-style CSV file and return it as a pandas DataFrame.
 
         This method first determines the header structure of the file and
-        then reads the data into a DataFrame, handling missing values.
+        then reads the data into a DataFrame, handling missing values. TOB1
+        binary files are decoded with `micromet.tob1.read_tob1`.
 
         Parameters
         ----------
         file : str or Path
             The path to the CSV file to be read.
+        fast : bool, optional
+            If True, use `read_fast` with its defaults. Defaults to False.
 
         Returns
         -------
         pd.DataFrame
             A DataFrame containing the parsed data from the file.
         """
+        if fast:
+            return self.read_fast(file)
+        file = Path(file)
+        if tob1.is_tob1(file):
+            self.logger.debug("Reading TOB1 file %s", file)
+            return tob1.read_tob1(file)
         self._determine_header_rows(file)  # type: ignore
         self.logger.debug("Reading %s", file)
         df = pd.read_csv(
@@ -86,6 +106,137 @@ class AmerifluxDataProcessor:
         )
         return df
 
+    def read_fast(
+        self,
+        file: Union[str, Path],
+        float_dtype: str = "float64",
+        skip_drop_cols: bool = True,
+        engine: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """
+        Read a TOA5 or AmeriFlux file with an explicit dtype map.
+
+        The column types are decided from the header instead of being sniffed
+        from the data: for TOA5 files the units row marks ``TS`` columns as
+        timestamps and ``RN`` columns as integer record numbers, AmeriFlux
+        ``TIMESTAMP_START``/``TIMESTAMP_END`` stamps are read as integers and
+        every other column as `float_dtype`. Columns that the reformatter
+        would drop through ``reformatter_vars.config["drop_cols"]`` are not
+        parsed at all. If the explicit types do not fit the data (e.g. a
+        string column), the file is re-read with `to_dataframe`. TOB1 files
+        are already typed and are decoded with `micromet.tob1.read_tob1`.
+
+        Parameters
+        ----------
+        file : str or Path
+            The path to the file to be read.
+        float_dtype : str, optional
+            Dtype of measurement columns ('float64' or 'float32').
+            Defaults to 'float64'.
+        skip_drop_cols : bool, optional
+            If True, do not read columns listed in the reformatter's
+            ``drop_cols``. Defaults to True.
+        engine : str, optional
+            ``pd.read_csv`` engine. Defaults to 'pyarrow' when pyarrow is
+            installed and 'c' otherwise.
+
+        Returns
+        -------
+        pd.DataFrame
+            A DataFrame containing the parsed data from the file.
+        """
+        file = Path(file)
+        if tob1.is_tob1(file):
+            df = tob1.read_tob1(file)
+            if skip_drop_cols:
+                df = df.drop(columns=self._drop_col_names(df.columns))
+            return df
+        self._determine_header_rows(file)
+        names = list(self.names)
+        dtypes, ts_cols = self._dtype_map(names, self.units, float_dtype)
+
+        if engine is None:
+            engine = "pyarrow" if _HAS_PYARROW else "c"
+
+        dropped = self._drop_col_names(names) if skip_drop_cols else []
+        ts_cols = [c for c in ts_cols if c not in dropped]
+        # pyarrow cannot combine ``names`` with ``usecols``; it parses the
+        # dropped columns and they are removed after the read instead
+        usecols = None
+        if dropped and engine != "pyarrow":
+            usecols = [c for c in names if c not in dropped]
+            dtypes = {c: t for c, t in dtypes.items() if c in usecols}
+        n_skip = (
+            len(self.skip_rows) if isinstance(self.skip_rows, list) else self.skip_rows
+        )
+
+        self.logger.debug("Fast reading %s with the %s engine", file, engine)
+        try:
+            df = pd.read_csv(
+                file,
+                skiprows=n_skip,
+                header=None,
+                names=names,
+                usecols=usecols,
+                dtype=dtypes,
+                na_values=self._FAST_NA_VALUES,
+                keep_default_na=False,
+                engine=engine,
+            )
+        except (ValueError, TypeError) as e:
+            self.logger.debug(f"Fast read of {file} failed ({e}); using to_dataframe")
+            df = self.to_dataframe(file)
+            return df.drop(columns=dropped, errors="ignore")
+
+        if usecols is None and dropped:
+            df = df.drop(columns=dropped)
+        for col in ts_cols:
+            df[col] = pd.to_datetime(df[col], format="ISO8601", errors="coerce")
+        return df
+
+    def _dtype_map(
+        self, names: Sequence[str], units: Sequence[str], float_dtype: str
+    ) -> tuple[Dict[str, str], List[str]]:
+        """
+        Build the explicit read dtypes for `read_fast`.
+
+        Returns the dtype map and the list of columns to parse as datetimes
+        (read as strings first).
+        """
+        dtypes: Dict[str, str] = {}
+        ts_cols: List[str] = []
+        for i, name in enumerate(names):
+            unit = units[i] if i < len(units) else ""
+            if name in self._STAMP_COLUMNS:
+                dtypes[name] = "int64"
+            elif unit == "TS":
+                dtypes[name] = "str"
+                ts_cols.append(name)
+            elif unit == "RN" or name == "RECORD":
+                dtypes[name] = "int64"
+            else:
+                dtypes[name] = float_dtype
+        return dtypes, ts_cols
+
+    @staticmethod
+    def _drop_col_names(names: Sequence[str]) -> List[str]:
+        """
+        Raw columns that ``reformatter_vars.config["drop_cols"]`` discards.
+
+        Mirrors the default path: ``rename_columns`` strips and uppercases
+        the raw names, then ``drop_extras`` matches ``drop_cols`` exactly.
+        """
+        config = reformatter_vars.config
+        drop = {str(c) for c in config.get("drop_cols", [])}
+        renamed = set(config.get("renames_eddy", {})) | set(
+            config.get("renames_met", {})
+        )
+        return [
+            c
+            for c in names
+            if str(c).strip().upper() in drop and str(c).strip() not in renamed
+        ]
+
     def _determine_header_rows(self, file: Path) -> None:
         """
         Determine the header structure of the input file.
@@ -107,14 +258,17 @@ class AmerifluxDataProcessor:
         with file.open("r") as fp:
             first_line = fp.readline().strip().replace('"', "").split(",")
             second_line = fp.readline().strip().replace('"', "").split(",")
+            third_line = fp.readline().strip().replace('"', "").split(",")
         if first_line[0] == self._HEADER_PREFIX:
             self.logger.debug(f"Header row detected: {first_line}")
             self.skip_rows = 1
             self.names = first_line
+            self.units = []
         elif first_line[0] == self._TOA5_PREFIX:
             self.logger.debug(f"TOA5 header detected: {first_line}")
             self.skip_rows = [0, 1, 2, 3]
             self.names = second_line
+            self.units = third_line
         else:
             raise RuntimeError(f"Header line not recognized: {first_line}")
         self.logger.debug(f"Skip rows for set to {self.skip_rows}")
@@ -17,10 +17,15 @@ References:
     Nemes, G. (2007). Approximation of the Gamma function (Stirling-type).
 """
 
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterator, Optional, Tuple, Dict, Union
+
 import numpy as np
 import pandas as pd
 from dataclasses import dataclass, field
-from typing import Optional, Tuple, Dict
 
 # ---------------------------------------------------------------------------
 # Physical & numerical constants
@@ -694,13 +699,549 @@ def calc_footprint(
         return footprint_kormann_meixner(ustar, z, zl, ws_rslt, upwnd_dist, cfg.n_int)
 
 
+# ---------------------------------------------------------------------------
+#  Array engine: every period at once
+# ---------------------------------------------------------------------------
+# The scalar models above walk the integration one sub-interval at a time.
+# The array engine evaluates the same sub-intervals for a block of periods
+# on a (periods x steps) grid: positions and cumulative footprints are
+# running sums along the step axis, and loop exits ("while" conditions and
+# "break" statements) become per-period counts of executed steps. Results
+# agree with the scalar functions to floating-point round-off.
+
+FOOTPRINT_CHUNK_SIZE = 2048  # periods evaluated per block
+_FETCH_COLUMNS = {
+    "FETCH_MAX_new": "fetch_max",
+    "FETCH_90_new": "fetch_90",
+    "FETCH_55_new": "fetch_55",
+    "FETCH_40_new": "fetch_40",
+    "FP_DIST_INTRST_new": "fp_dist_intrst",
+    "FP_EQUATION_new": "fp_equation",
+}
+_THRESHOLDS = {"fp_40": 0.4, "fp_55": 0.55, "fp_90": 0.9}
+
+
+@dataclass
+class _Steps:
+    """Integration sub-intervals of one segment, shaped (periods, steps)."""
+
+    x_L: np.ndarray
+    x_R: np.ndarray
+    intv: np.ndarray
+    fp_R: np.ndarray
+    cum: np.ndarray
+    cum_prev: np.ndarray
+
+
+@dataclass
+class _State:
+    """Per-period integration state carried from one segment to the next."""
+
+    x_R: np.ndarray
+    fp_R: np.ndarray
+    cum: np.ndarray
+    cum_prev: np.ndarray
+    upwnd: np.ndarray
+    win: np.ndarray
+    values: Dict[str, np.ndarray]
+    found: Dict[str, np.ndarray]
+
+    @classmethod
+    def start(cls, x0: np.ndarray, upwnd: np.ndarray) -> "_State":
+        n = len(x0)
+        return cls(
+            x_R=x0.astype(float),
+            fp_R=np.zeros(n),
+            cum=np.zeros(n),
+            cum_prev=np.zeros(n),
+            upwnd=upwnd,
+            win=np.zeros(n),
+            values={k: np.zeros(n) for k in _THRESHOLDS},
+            found={k: np.zeros(n, dtype=bool) for k in _THRESHOLDS},
+        )
+
+    def take(self, rows: np.ndarray) -> "_State":
+        """Copy of the state for a subset of periods."""
+        return _State(
+            x_R=self.x_R[rows],
+            fp_R=self.fp_R[rows],
+            cum=self.cum[rows],
+            cum_prev=self.cum_prev[rows],
+            upwnd=self.upwnd[rows],
+            win=self.win[rows],
+            values={k: v[rows] for k, v in self.values.items()},
+            found={k: v[rows] for k, v in self.found.items()},
+        )
+
+    def put(self, rows: np.ndarray, sub: "_State") -> None:
+        """Write back a state produced by `take`."""
+        for name in ("x_R", "fp_R", "cum", "cum_prev", "win"):
+            getattr(self, name)[rows] = getattr(sub, name)
+        for key in self.values:
+            self.values[key][rows] = sub.values[key]
+            self.found[key][rows] = sub.found[key]
+
+
+def _integrate(
+    density,
+    state: _State,
+    intv: np.ndarray,
+    n_steps: int,
+    boole: bool,
+    rows=slice(None),
+) -> _Steps:
+    """Evaluate `n_steps` trapezoid or Boole sub-intervals from `state`.
+
+    `rows` selects the periods of `density` that `state` holds.
+    """
+    n = len(state.x_R)
+    iv = np.broadcast_to(np.asarray(intv, dtype=float).reshape(-1, 1), (n, n_steps))
+    x = np.cumsum(np.column_stack([state.x_R, iv]), axis=1)
+    x_L, x_R = x[:, :-1], x[:, 1:]
+    fp_R = density(x_R, rows)
+    fp_L = np.column_stack([state.fp_R, fp_R[:, :-1]])
+    if boole:
+        fp_m1 = density(x_L + 0.25 * iv, rows)
+        fp_m2 = density(x_L + 0.50 * iv, rows)
+        fp_m3 = density(x_L + 0.75 * iv, rows)
+        area = (
+            iv
+            * (7.0 * fp_L + 32.0 * fp_m1 + 12.0 * fp_m2 + 32.0 * fp_m3 + 7.0 * fp_R)
+            / 90.0
+        )
+    else:
+        area = iv * (fp_L + fp_R) / 2.0
+    cum = np.cumsum(np.column_stack([state.cum, area]), axis=1)
+    return _Steps(x_L, x_R, iv, fp_R, cum[:, 1:], cum[:, :-1])
+
+
+def _first_crossing(
+    steps: _Steps, threshold: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """First step whose cumulative footprint reaches `threshold`.
+
+    Returns (has_crossing, step_index, interpolated distance).
+    """
+    cross = steps.cum >= threshold
+    has = cross.any(axis=1)
+    idx = cross.argmax(axis=1)
+    rows = np.arange(len(idx))
+    cum = steps.cum[rows, idx]
+    value = steps.x_R[rows, idx] - steps.intv[rows, idx] * (cum - threshold) / (
+        cum - steps.cum_prev[rows, idx]
+    )
+    return has, idx, value
+
+
+def _advance(state: _State, steps: _Steps, n_exec: np.ndarray) -> None:
+    """Fold the first `n_exec` steps of each period into `state`."""
+    n, n_steps = steps.x_R.shape
+    rows = np.arange(n)
+    executed = np.arange(n_steps)[None, :] < n_exec[:, None]
+
+    for key, threshold in _THRESHOLDS.items():
+        has, idx, value = _first_crossing(steps, threshold)
+        new = has & (idx < n_exec) & ~state.found[key]
+        state.values[key] = np.where(new, value, state.values[key])
+        state.found[key] |= new
+
+    upwnd = state.upwnd[:, None]
+    hit = executed & (steps.x_L < upwnd) & (upwnd <= steps.x_R)
+    has = hit.any(axis=1)
+    last = n_steps - 1 - hit[:, ::-1].argmax(axis=1)
+    win = 100.0 * (
+        steps.cum_prev[rows, last]
+        + (steps.cum[rows, last] - steps.cum_prev[rows, last])
+        * (state.upwnd - steps.x_L[rows, last])
+        / steps.intv[rows, last]
+    )
+    state.win = np.where(has, win, state.win)
+
+    ran = n_exec > 0
+    end = np.maximum(n_exec - 1, 0)
+    for name in ("x_R", "fp_R", "cum", "cum_prev"):
+        current = getattr(state, name)
+        setattr(state, name, np.where(ran, getattr(steps, name)[rows, end], current))
+
+
+def _segment_3(density, state: _State, intv: np.ndarray, n_int: int) -> None:
+    """Trapezoid segment past the peak, left once FETCH_90 is positive."""
+    steps = _integrate(density, state, intv, 2 * n_int, boole=False)
+    has, idx, value = _first_crossing(steps, 0.9)
+    done = state.found["fp_90"]
+    n_exec = np.full(len(intv), 2 * n_int)
+    n_exec = np.where(has & ~done & (value > 0), idx + 1, n_exec)
+    n_exec = np.where(done & (state.values["fp_90"] > 0), 1, n_exec)
+    _advance(state, steps, n_exec)
+
+
+def _segment_4(
+    density,
+    state: _State,
+    step: np.ndarray,
+    x_max: np.ndarray,
+    reach: np.ndarray,
+    max_steps: int = 256,
+) -> None:
+    """Boole segment run while FETCH_90 is not reached and x_R - x_max < reach.
+
+    Steps are evaluated in blocks of at most `max_steps`; only periods that
+    are still inside the loop after a block are carried into the next one.
+    """
+    step = np.broadcast_to(step, state.x_R.shape)
+    active = np.arange(len(state.x_R))
+    while active.size:
+        sub = state.take(active)
+        x_max_a, reach_a, step_a = x_max[active], reach[active], step[active]
+        needed = np.ceil((reach_a - (sub.x_R - x_max_a)) / step_a) + 1
+        n_steps = int(min(np.nanmax(np.clip(needed, 1, None), initial=1), max_steps))
+        steps = _integrate(density, sub, step_a, n_steps, True, rows=active)
+        ok = (steps.cum_prev < 0.9) & (
+            (steps.x_L - x_max_a[:, None]) < reach_a[:, None]
+        )
+        n_exec = np.logical_and.accumulate(ok, axis=1).sum(axis=1)
+        _advance(sub, steps, n_exec)
+        state.put(active, sub)
+        more = (n_exec == n_steps) & (sub.cum < 0.9) & ((sub.x_R - x_max_a) < reach_a)
+        active = active[more]
+
+    late = ~state.found["fp_90"] & (state.cum >= 0.9)
+    value = state.x_R - step * (state.cum - 0.9) / np.maximum(
+        state.cum - state.cum_prev, 1e-30
+    )
+    state.values["fp_90"] = np.where(late, value, state.values["fp_90"])
+    state.found["fp_90"] |= late
+
+
+def _fill_win(state: _State, rows: np.ndarray) -> None:
+    """Cumulative footprint at the last node when the target was not crossed."""
+    fallback = np.where(state.cum < 1.0, np.minimum(100.0 * state.cum, 99.0), 99.0)
+    state.win = np.where(rows & (state.win == 0.0), fallback, state.win)
+
+
+def _pbl_height_kljun_array(obukhov: np.ndarray) -> np.ndarray:
+    """Array version of `_pbl_height_kljun`."""
+    L = obukhov
+    return np.select(
+        [
+            (L <= 0.0) & (L < -1013.3),
+            (L <= 0.0) & (L <= -650.0),
+            (L <= 0.0) & (L <= -30.0),
+            (L <= 0.0) & (L <= -5.0),
+            L <= 0.0,
+            L > 1316.4,
+            L >= 1000.0,
+            L >= 130.0,
+            L >= 84.0,
+        ],
+        [
+            1000.0,
+            1200.0 - 200.0 * ((L + 650.0) / (-1013.3 + 650.0)),
+            1500.0 - 300.0 * ((L + 30.0) / (-650.0 + 30.0)),
+            2000.0 - 500.0 * ((L + 5.0) / (-30.0 + 5.0)),
+            2000.0 + 20.0 * (L + 5.0),
+            1000.0,
+            800.0 + 200.0 * ((L - 1000.0) / (1316.4 - 1000.0)),
+            250.0 + 550.0 * ((L - 130.0) / (1000.0 - 130.0)),
+            200.0 + 50.0 * ((L - 84.0) / (130.0 - 84.0)),
+        ],
+        default=200.0 - (84.0 - L) * (50.0 / 46.0),
+    )
+
+
+def footprint_kljun_array(
+    u_star: np.ndarray,
+    sigma_w: np.ndarray,
+    z: np.ndarray,
+    obukhov: np.ndarray,
+    z0: np.ndarray,
+    upwnd_dist: np.ndarray,
+    n_int: int = NMBR_INT_INTERV_SEGMENT,
+) -> Dict[str, np.ndarray]:
+    """Array version of `footprint_kljun` for many periods at once.
+
+    All inputs broadcast to one length. Returns a dict of arrays keyed
+    ``fetch_max``, ``fetch_90``, ``fetch_55``, ``fetch_40`` and
+    ``fp_dist_intrst``.
+    """
+    u_star, sigma_w, z, obukhov, z0, upwnd = (
+        np.asarray(a, dtype=float).ravel()
+        for a in np.broadcast_arrays(u_star, sigma_w, z, obukhov, z0, upwnd_dist)
+    )
+    ln_z0_term = 3.418 - np.log(z0)
+    k1 = 0.175 / ln_z0_term
+    k2 = 3.68254
+    k3 = 4.277 * ln_z0_term
+    k4 = 1.685 * ln_z0_term
+
+    zh_ratio = z / _pbl_height_kljun_array(obukhov)
+    suz = ((sigma_w / u_star) ** 0.8) / z
+    k1_suz_zh = k1 * suz * (1.0 - zh_ratio)
+
+    x_max = (k3 - k4) / suz
+    x_infl_L = x_max * (k3 * ((np.sqrt(k2) - 1.0) / np.sqrt(k2)) - k4) / (k3 - k4)
+    x_infl_R = x_max * (k3 * ((np.sqrt(k2) + 1.0) / np.sqrt(k2)) - k4) / (k3 - k4)
+
+    a, s, c3, c4 = (v[:, None] for v in (k1_suz_zh, suz, k3, k4))
+
+    def density(x, rows=slice(None)):
+        t = (s[rows] * x + c4[rows]) / c3[rows]
+        return a[rows] * (t**k2) * np.exp(k2 * (1.0 - t))
+
+    x0 = -k4 / suz
+    state = _State.start(x0, upwnd)
+    for intv in ((x_infl_L - x0) / n_int, (x_max - x_infl_L) / n_int):
+        _advance(
+            state,
+            _integrate(density, state, intv, n_int, False),
+            np.full(len(x0), n_int),
+        )
+    _segment_3(density, state, (x_infl_R - x_max) / n_int, n_int)
+    _segment_4(density, state, 4.0 * z, x_max, 200.0 * z)
+
+    fp_90_missing = ~state.found["fp_90"] & (state.cum < 0.9)
+
+    # Segment 5: extend to the upwind distance of interest
+    run = state.x_R < upwnd
+    near = run & ((upwnd - state.x_R) < 100.0 * z)
+    gap = np.where(near, upwnd - state.x_R, 0.0)
+    count = np.where(near, np.maximum(np.floor(gap / (4.0 * z)), 1), 0).astype(int)
+    if near.any():
+        steps = _integrate(
+            density, state, gap / np.maximum(count, 1), count.max(), True
+        )
+        _advance(state, steps, count)
+    _fill_win(state, near)
+    state.win = np.where(run & ~near, 99.0, state.win)
+
+    fetch_90 = state.values["fp_90"]
+    fetch_90 = np.where(fp_90_missing & ~state.found["fp_90"], np.nan, fetch_90)
+    return {
+        "fetch_max": x_max,
+        "fetch_90": fetch_90,
+        "fetch_55": state.values["fp_55"],
+        "fetch_40": state.values["fp_40"],
+        "fp_dist_intrst": state.win,
+    }
+
+
+def footprint_kormann_meixner_array(
+    u_star: np.ndarray,
+    z: np.ndarray,
+    stability: np.ndarray,
+    u_total: np.ndarray,
+    upwnd_dist: np.ndarray,
+    n_int: int = NMBR_INT_INTERV_SEGMENT,
+) -> Dict[str, np.ndarray]:
+    """Array version of `footprint_kormann_meixner` for many periods at once.
+
+    All inputs broadcast to one length. Returns a dict of arrays keyed like
+    `footprint_kljun_array`.
+    """
+    u_star, z, stability, u_total, upwnd = (
+        np.asarray(a, dtype=float).ravel()
+        for a in np.broadcast_arrays(u_star, z, stability, u_total, upwnd_dist)
+    )
+    k = K_VON_KARMAN
+    stable = stability > 0
+    stab_s = np.minimum(stability, 4.0)
+    stab_u = np.maximum(stability, -4.0)
+    m_km = np.where(
+        stable,
+        (u_star / (k * u_total)) * (1.0 + 5.0 * stab_s),
+        (u_star / (k * u_total)) / ((1.0 - 16.0 * stab_u) ** 0.25),
+    )
+    n_km = np.where(
+        stable,
+        1.0 / (1.0 + 5.0 * stab_s),
+        (1.0 - 24.0 * stab_u) / (1.0 - 16.0 * stab_u),
+    )
+    phi_c = np.where(stable, 1.0 + 5.0 * stab_s, 1.0 / np.sqrt(1.0 - 16.0 * stab_u))
+
+    wnd_const = u_total / (z**m_km)
+    r_km = 2.0 + m_km - n_km
+    kp = (k * u_star * z ** (1.0 - n_km)) / phi_c
+    xi = wnd_const / (kp * r_km * r_km)
+    mu = (m_km + 1.0) / r_km
+
+    xgz = ((xi**mu) * (z ** (m_km + 1.0))) / _gamma_nemes(mu)
+    xz = xi * (z**r_km)
+
+    x_max = xz / (mu + 1.0)
+    x_infl_L = x_max * (1.0 - 1.0 / np.sqrt(mu + 2.0))
+    x_infl_R = x_max * (1.0 + 1.0 / np.sqrt(mu + 2.0))
+
+    g, c, p = xgz[:, None], xz[:, None], (mu + 1.0)[:, None]
+
+    def density(x, rows=slice(None)):
+        return np.where(x <= 0, 0.0, g[rows] * np.exp(-c[rows] / x) / (x ** p[rows]))
+
+    state = _State.start(np.zeros(len(x_max)), upwnd)
+    for intv in (x_infl_L / n_int, (x_max - x_infl_L) / n_int):
+        _advance(
+            state,
+            _integrate(density, state, intv, n_int, False),
+            np.full(len(x_max), n_int),
+        )
+    _segment_3(density, state, (x_infl_R - x_max) / n_int, n_int)
+    _segment_4(density, state, 5.0 * z, x_max, 1000.0 * z)
+
+    # Segment 5: 100 coarse steps, left once past the upwind distance with
+    # FETCH_90 beyond the peak
+    run = (state.x_R < upwnd) | ~state.found["fp_90"]
+    if run.any():
+        steps = _integrate(density, state, 10.0 * z, 100, True)
+        has, idx, value = _first_crossing(steps, 0.9)
+        step_no = np.arange(100)[None, :]
+        fp_90 = np.where(
+            state.found["fp_90"][:, None],
+            state.values["fp_90"][:, None],
+            np.where(has[:, None] & (step_no >= idx[:, None]), value[:, None], 0.0),
+        )
+        stop = (steps.x_R > upwnd[:, None]) & (fp_90 > x_max[:, None])
+        n_exec = np.where(stop.any(axis=1), stop.argmax(axis=1) + 1, 100)
+        _advance(state, steps, np.where(run, n_exec, 0))
+    _fill_win(state, run)
+    unreached = run & (state.cum < 0.9) & ~state.found["fp_90"]
+
+    return {
+        "fetch_max": x_max,
+        "fetch_90": np.where(unreached, state.x_R, state.values["fp_90"]),
+        "fetch_55": state.values["fp_55"],
+        "fetch_40": state.values["fp_40"],
+        "fp_dist_intrst": state.win,
+    }
+
+
+def _get_upwind_dist_array(
+    wd_sonic: np.ndarray, dist_intrst: Dict[str, float]
+) -> np.ndarray:
+    """Array version of `_get_upwind_dist`."""
+    return np.select(
+        [wd_sonic <= 60.0, wd_sonic <= 170.0, wd_sonic < 190.0, wd_sonic < 300.0],
+        [
+            dist_intrst["60_300"],
+            dist_intrst["60_170"],
+            dist_intrst["170_190"],
+            dist_intrst["190_300"],
+        ],
+        default=dist_intrst["60_300"],
+    )
+
+
+def calc_footprint_array(
+    ustar: np.ndarray,
+    w_sigma: np.ndarray,
+    zl: np.ndarray,
+    mo_length: np.ndarray,
+    ws_rslt: np.ndarray,
+    wd_compass: np.ndarray,
+    cfg: SiteConfig,
+    chunk_size: int = FOOTPRINT_CHUNK_SIZE,
+) -> Dict[str, np.ndarray]:
+    """Array version of `calc_footprint` for a series of periods.
+
+    Parameters
+    ----------
+    ustar, w_sigma, zl, mo_length, ws_rslt, wd_compass : array-like
+        One value per averaging period, as in `calc_footprint`.
+    cfg : SiteConfig
+        Site configuration.
+    chunk_size : int
+        Periods evaluated per block; bounds the size of the
+        (periods x steps) work arrays.
+
+    Returns
+    -------
+    dict of np.ndarray
+        ``fetch_max``, ``fetch_90``, ``fetch_55``, ``fetch_40``,
+        ``fp_dist_intrst`` (float) and ``fp_equation`` (object).
+    """
+    ustar, w_sigma, zl, mo_length, ws_rslt, wd_compass = (
+        np.asarray(a, dtype=float).ravel()
+        for a in np.broadcast_arrays(ustar, w_sigma, zl, mo_length, ws_rslt, wd_compass)
+    )
+    n = len(ustar)
+    z = float(cfg.z)
+    out = {
+        k: np.full(n, np.nan)
+        for k in ("fetch_max", "fetch_90", "fetch_55", "fetch_40", "fp_dist_intrst")
+    }
+    out["fp_equation"] = np.full(n, "", dtype=object)
+
+    valid = ~(np.isnan(ustar) | np.isnan(zl) | np.isnan(mo_length))
+    with np.errstate(invalid="ignore"):
+        upwnd = _get_upwind_dist_array(
+            wd_compass_to_sonic(wd_compass, cfg.sonic_azimuth), cfg.dist_intrst
+        )
+        kljun = valid & (zl >= -200.0) & (zl <= 1.0) & (ustar >= 0.2) & (z >= 1.0)
+    km = valid & ~kljun
+    out["fp_equation"][kljun] = "Kljun et al"
+    out["fp_equation"][km] = "KormannMeixner"
+
+    # Periods the scalar models return early for keep NaN results
+    kljun &= ~np.isnan(w_sigma)
+    km &= ~np.isnan(ws_rslt)
+
+    with np.errstate(all="ignore"):
+        for rows, is_kljun in (
+            (np.flatnonzero(kljun), True),
+            (np.flatnonzero(km), False),
+        ):
+            for start in range(0, len(rows), chunk_size):
+                part = rows[start : start + chunk_size]
+                if is_kljun:
+                    res = footprint_kljun_array(
+                        ustar[part],
+                        w_sigma[part],
+                        z,
+                        mo_length[part],
+                        cfg.z0,
+                        upwnd[part],
+                        cfg.n_int,
+                    )
+                else:
+                    res = footprint_kormann_meixner_array(
+                        ustar[part], z, zl[part], ws_rslt[part], upwnd[part], cfg.n_int
+                    )
+                for key, values in res.items():
+                    out[key][part] = values
+    return out
+
+
 # ---------------------------------------------------------------------------
 #  Batch processing: apply to a DataFrame
 # ---------------------------------------------------------------------------
 
 
+DEFAULT_COL_MAP = {
+    "ustar": "USTAR_1_1_1",
+    "w_sigma": "W_SIGMA_1_1_1",
+    "zl": "ZL_1_1_1",
+    "mo_length": "MO_LENGTH_1_1_1",
+    "ws_rslt": "WS_1_1_1",
+    "wd": "WD_1_1_1",
+}
+FETCH_BLOCK_SIZE = 20_000  # rows per block for chunked recalculation
+
+
+def _input_arrays(df: pd.DataFrame, cm: Dict[str, str]) -> Dict[str, np.ndarray]:
+    """Pull the model inputs out of `df` as float arrays."""
+    return {
+        "ustar": df[cm["ustar"]].to_numpy(dtype=float),
+        "w_sigma": df[cm["w_sigma"]].to_numpy(dtype=float),
+        "zl": df[cm["zl"]].to_numpy(dtype=float),
+        "mo_length": df[cm["mo_length"]].to_numpy(dtype=float),
+        "ws_rslt": df[cm["ws_rslt"]].to_numpy(dtype=float),
+        "wd_compass": df[cm["wd"]].to_numpy(dtype=float),
+    }
+
+
 def recalculate_fetch(
-    df: pd.DataFrame, cfg: SiteConfig, col_map: Optional[Dict[str, str]] = None
+    df: pd.DataFrame,
+    cfg: SiteConfig,
+    col_map: Optional[Dict[str, str]] = None,
+    engine: str = "array",
 ) -> pd.DataFrame:
     """Recalculate FETCH values for an entire DataFrame.
 
@@ -713,6 +1254,10 @@ def recalculate_fetch(
     col_map : dict, optional
         Mapping from internal names to column names in `df`.
         Defaults assume AmeriFlux-style naming with _1_1_1 suffixes.
+    engine : {'array', 'scalar'}
+        ``'array'`` evaluates all periods at once with
+        `calc_footprint_array`; ``'scalar'`` calls `calc_footprint` row by
+        row. Both give the same results to floating-point round-off.
 
     Returns
     -------
@@ -721,17 +1266,17 @@ def recalculate_fetch(
         FETCH_MAX_new, FETCH_90_new, FETCH_55_new, FETCH_40_new,
         FP_DIST_INTRST_new, FP_EQUATION_new
     """
-    default_map = {
-        "ustar": "USTAR_1_1_1",
-        "w_sigma": "W_SIGMA_1_1_1",
-        "zl": "ZL_1_1_1",
-        "mo_length": "MO_LENGTH_1_1_1",
-        "ws_rslt": "WS_1_1_1",
-        "wd": "WD_1_1_1",
-    }
-    cm = {**default_map, **(col_map or {})}
+    cm = {**DEFAULT_COL_MAP, **(col_map or {})}
+    if engine not in ("array", "scalar"):
+        raise ValueError(f"Unknown engine {engine!r}; use 'array' or 'scalar'")
 
     out = df.copy()
+    if engine == "array":
+        res = calc_footprint_array(**_input_arrays(df, cm), cfg=cfg)
+        for col, key in _FETCH_COLUMNS.items():
+            out[col] = res[key]
+        return out
+
     results = []
 
     for idx, row in df.iterrows():
@@ -754,3 +1299,141 @@ def recalculate_fetch(
     out["FP_EQUATION_new"] = [r.fp_equation for r in results]
 
     return out
+
+
+# ---------------------------------------------------------------------------
+#  Chunked / parallel processing
+# ---------------------------------------------------------------------------
+
+
+def _fetch_block(
+    arrays: Dict[str, np.ndarray], cfg: SiteConfig
+) -> Dict[str, np.ndarray]:
+    """Worker entry point: footprint results for one block of periods."""
+    with np.errstate(all="ignore"):
+        return calc_footprint_array(**arrays, cfg=cfg)
+
+
+def _block_bounds(df: pd.DataFrame, block_size: int, freq: Optional[str]):
+    """Yield (start, stop) row positions of consecutive blocks."""
+    n = len(df)
+    if freq is not None:
+        if not isinstance(df.index, pd.DatetimeIndex):
+            raise TypeError("freq requires a DatetimeIndex")
+        keys = df.index.to_period(freq).asi8
+        cuts = np.flatnonzero(np.diff(keys)) + 1
+        edges = np.concatenate([[0], cuts, [n]])
+    else:
+        edges = np.append(np.arange(0, n, block_size), n)
+    for start, stop in zip(edges[:-1], edges[1:]):
+        if stop > start:
+            yield int(start), int(stop)
+
+
+def iter_recalculate_fetch(
+    df: pd.DataFrame,
+    cfg: SiteConfig,
+    col_map: Optional[Dict[str, str]] = None,
+    block_size: int = FETCH_BLOCK_SIZE,
+    freq: Optional[str] = None,
+    workers: Optional[int] = 1,
+    executor: str = "process",
+) -> Iterator[pd.DataFrame]:
+    """Recalculate FETCH values block by block.
+
+    The input is split into consecutive blocks of rows (or of time periods
+    when `freq` is given). Only the six model input columns of a block are
+    sent to a worker, and each finished block is yielded, in input order, as
+    a slice of `df` with the columns added by `recalculate_fetch`. At most
+    ``2 * workers`` blocks are in flight, so memory use does not grow with
+    the record length.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Input data (NaN-cleaned, i.e. -9999 already replaced).
+    cfg : SiteConfig
+        Site configuration with updated parameters.
+    col_map : dict, optional
+        Mapping from internal names to column names in `df`.
+    block_size : int
+        Rows per block when `freq` is not given.
+    freq : str, optional
+        Pandas period alias (e.g. ``'M'``) splitting a time-sorted
+        DatetimeIndex into calendar blocks.
+    workers : int or None
+        Number of parallel workers. ``1`` (default) runs in-process;
+        ``None`` uses ``os.cpu_count()``.
+    executor : {'process', 'thread'}
+        Pool type used when ``workers > 1``.
+
+    Yields
+    ------
+    pd.DataFrame
+        One processed block at a time.
+    """
+    if executor not in ("process", "thread"):
+        raise ValueError(f"Unknown executor {executor!r}; use 'process' or 'thread'")
+    cm = {**DEFAULT_COL_MAP, **(col_map or {})}
+    n_workers = (os.cpu_count() or 1) if workers is None else int(workers)
+
+    def finish(start: int, stop: int, res: Dict[str, np.ndarray]) -> pd.DataFrame:
+        block = df.iloc[start:stop].copy()
+        for col, key in _FETCH_COLUMNS.items():
+            block[col] = res[key]
+        return block
+
+    bounds = _block_bounds(df, block_size, freq)
+    if n_workers <= 1:
+        for start, stop in bounds:
+            arrays = _input_arrays(df.iloc[start:stop], cm)
+            yield finish(start, stop, _fetch_block(arrays, cfg))
+        return
+
+    pool_cls = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+    with pool_cls(max_workers=n_workers) as pool:
+        pending = deque()
+        for start, stop in bounds:
+            arrays = _input_arrays(df.iloc[start:stop], cm)
+            pending.append((start, stop, pool.submit(_fetch_block, arrays, cfg)))
+            if len(pending) >= 2 * n_workers:
+                start_, stop_, future = pending.popleft()
+                yield finish(start_, stop_, future.result())
+        while pending:
+            start_, stop_, future = pending.popleft()
+            yield finish(start_, stop_, future.result())
+
+
+def recalculate_fetch_to_csv(
+    df: pd.DataFrame,
+    cfg: SiteConfig,
+    path: Union[str, Path],
+    **kwargs,
+) -> int:
+    """Stream `iter_recalculate_fetch` blocks to a CSV file.
+
+    The header is written with the first block and later blocks are
+    appended, so only the blocks in flight are held in memory.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Input data.
+    cfg : SiteConfig
+        Site configuration.
+    path : str or Path
+        Output CSV file; overwritten if it exists.
+    **kwargs
+        Passed to `iter_recalculate_fetch`.
+
+    Returns
+    -------
+    int
+        Number of rows written.
+    """
+    path = Path(path)
+    rows = 0
+    for i, block in enumerate(iter_recalculate_fetch(df, cfg, **kwargs)):
+        block.to_csv(path, mode="w" if i == 0 else "a", header=i == 0)
+        rows += len(block)
+    return rows
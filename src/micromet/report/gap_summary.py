@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 from pandas.tseries.frequencies import to_offset
 
@@ -83,44 +84,42 @@ def summarize_gaps(
         # Reindex to full timeline
         dfr = dfx.reindex(full_idx)
 
-        for col in columns:
-            col_na = dfr[col].isna()
-            if not col_na.any():
-                continue  # no gaps for this column
-
-            # Label contiguous runs (True/False) and keep only True-runs (gaps)
-            run_id = (col_na != col_na.shift(1)).cumsum()
-            for rid, run_mask in col_na.groupby(run_id):
-                if not run_mask.iloc[0]:
-                    continue  # this run is of non-NaNs
-
-                run_times = run_mask.index
-                gap_start = run_times[0]
-                gap_end = run_times[-1]
-                n_steps = int(run_mask.sum())
-
-                # Determine the kind of gap: missing timestamps vs NaNs vs mixed
-                row_missing_in_run = missing_row_mask.loc[run_times]
-                if row_missing_in_run.all():
-                    kind = "MissingTimestamp"
-                elif not row_missing_in_run.any():
-                    kind = "NaN"
-                else:
-                    kind = "Mixed"
-
-                records.append(
-                    {
-                        "STATIONID": stn,
-                        "COLUMN": col,
-                        "GAP_START": gap_start,
-                        "GAP_END": gap_end,
-                        "N_STEPS_MISSING": n_steps,
-                        "HOURS_MISSING": n_steps * hours_per_step,
-                        "GAP_KIND": kind,
-                    }
-                )
+        # Run-length encode the NaN bit-matrix of all columns at once: a +1
+        # step in the padded matrix opens a gap, a -1 step closes it.
+        na = dfr[columns].isna().to_numpy()
+        edges = np.diff(np.pad(na.T.astype(np.int8), ((0, 0), (1, 1))), axis=1)
+        col_idx, starts = np.nonzero(edges == 1)
+        _, ends = np.nonzero(edges == -1)
+        if starts.size == 0:
+            continue
+        n_steps = ends - starts
+
+        # Missing timestamps per gap from a prefix sum of the row mask
+        missing_cum = np.concatenate(
+            [[0], np.cumsum(missing_row_mask.to_numpy(dtype=np.int64))]
+        )
+        n_missing_rows = missing_cum[ends] - missing_cum[starts]
+        kind = np.where(
+            n_missing_rows == n_steps,
+            "MissingTimestamp",
+            np.where(n_missing_rows == 0, "NaN", "Mixed"),
+        )
+
+        records.append(
+            pd.DataFrame(
+                {
+                    "STATIONID": [stn] * len(starts),
+                    "COLUMN": [columns[i] for i in col_idx],
+                    "GAP_START": full_idx[starts],
+                    "GAP_END": full_idx[ends - 1],
+                    "N_STEPS_MISSING": n_steps.astype(int),
+                    "HOURS_MISSING": n_steps * hours_per_step,
+                    "GAP_KIND": kind.tolist(),
+                }
+            )
+        )
 
-    out = pd.DataFrame.from_records(records)
+    out = pd.concat(records, ignore_index=True) if records else pd.DataFrame()
     if not out.empty:
         out = out.sort_values(["STATIONID", "COLUMN", "GAP_START"]).reset_index(
             drop=True
@@ -141,6 +140,27 @@ def summarize_gaps(
     return out
 
 
+FILL_COLUMNS = [
+    "TARGET_DATASET",
+    "SOURCE_DATASET",
+    "STATIONID",
+    "COLUMN",
+    "TARGET_GAP_START",
+    "TARGET_GAP_END",
+    "FILLABLE_START",
+    "FILLABLE_END",
+    "N_STEPS_FILLABLE",
+    "HOURS_FILLABLE",
+    "TARGET_N_STEPS_MISSING",
+    "COVERAGE_RATIO",
+    "TARGET_GAP_KIND",
+]
+
+# Sentinels for the open ends of a dataset's coverage
+_MIN_NS = np.iinfo(np.int64).min
+_MAX_NS = np.iinfo(np.int64).max
+
+
 def compare_gap_summaries(
     gaps_a: pd.DataFrame,
     gaps_b: pd.DataFrame,
@@ -181,140 +201,220 @@ def compare_gap_summaries(
             - COVERAGE_RATIO    (steps_fillable / TARGET_N_STEPS_MISSING)
             - TARGET_GAP_KIND
     """
+    return compare_gap_summaries_multi(
+        {"A": gaps_a, "B": gaps_b}, expected_freq=expected_freq, min_steps=min_steps
+    )
+
+
+def compare_gap_summaries_multi(
+    gaps: dict[str, pd.DataFrame],
+    expected_freq: str = "30min",
+    min_steps: int = 1,
+) -> pd.DataFrame:
+    """
+    Compare any number of gap summaries and report, for every ordered pair
+    of datasets, where the source has data inside the target's gaps.
+
+    Each (target, source) pair is solved with one sorted sweep over all
+    station/column pairs: the source's gaps are merged per key, their
+    complement (the source's coverage) is built, and every target gap is
+    intersected with the coverage intervals found by binary search.
+
+    Parameters
+    ----------
+    gaps : dict[str, pd.DataFrame]
+        Gap summaries from `summarize_gaps` keyed by dataset label
+        (e.g. ``{"eddy": ..., "met": ..., "met2": ...}``).
+    expected_freq : str, default "30min"
+        Sampling frequency of the summaries' time grid.
+    min_steps : int, default 1
+        Only report fillable segments with at least this many steps.
+
+    Returns
+    -------
+    pd.DataFrame
+        Same columns as `compare_gap_summaries`, with the dataset labels in
+        TARGET_DATASET and SOURCE_DATASET.
+    """
     req = {"STATIONID", "COLUMN", "GAP_START", "GAP_END", "N_STEPS_MISSING"}
-    for name, g in [("gaps_a", gaps_a), ("gaps_b", gaps_b)]:
+    for name, g in gaps.items():
         missing = req - set(g.columns)
         if missing:
             raise KeyError(f"{name} missing required columns: {missing}")
 
-    # Normalize dtypes and sort
-    def _prep(g):
-        g = g.copy()
-        g["GAP_START"] = pd.to_datetime(g["GAP_START"])
-        g["GAP_END"] = pd.to_datetime(g["GAP_END"])
-        if "GAP_KIND" not in g.columns:
-            g["GAP_KIND"] = "Unknown"
-        return g.sort_values(
-            ["STATIONID", "COLUMN", "GAP_START", "GAP_END"]
-        ).reset_index(drop=True)
-
-    gaps_a = _prep(gaps_a)
-    gaps_b = _prep(gaps_b)
-
     freq_td = pd.Timedelta(to_offset(expected_freq))
     hours_per_step = freq_td / pd.Timedelta(hours=1)
+    step_ns = freq_td.value
 
-    # Build a quick lookup: for each (station, column), list of (start, end) gaps
-    def _build_lookup(g):
-        d = {}
-        for (stn, col), sub in g.groupby(["STATIONID", "COLUMN"], sort=False):
-            d[(stn, col)] = list(zip(sub["GAP_START"], sub["GAP_END"]))
-        return d
-
-    gapsB_lookup = _build_lookup(gaps_b)
-    gapsA_lookup = _build_lookup(gaps_a)
-
-    def _steps_inclusive(s, e):
-        # number of discrete samples on the regular grid from s..e inclusive
-        return int(((e - s) // freq_td) + 1)
-
-    def _subtract_interval(base, subtracts):
-        """Given a base [a0,a1] (inclusive, on grid) and a list of
-        subtract intervals (inclusive), return list of remaining
-        inclusive intervals on the same grid."""
-        a0, a1 = base
-        if a0 > a1:
-            return []
-        # Clip subtracts to base
-        cl = []
-        for s, e in subtracts:
-            s1 = max(s, a0)
-            e1 = min(e, a1)
-            if s1 <= e1:
-                cl.append((s1, e1))
-        if not cl:
-            return [(a0, a1)]
-        cl.sort(key=lambda x: x[0])
-
-        segs = []
-        cur = a0
-        for s, e in cl:
-            # segment before s (subtract is inclusive)
-            before_end = s - freq_td
-            if cur <= before_end:
-                segs.append((cur, before_end))
-            # skip the subtracted run
-            cur = e + freq_td
-            if cur > a1:
-                break
-        if cur <= a1:
-            segs.append((cur, a1))
-        return segs
-
-    def _direction_fill(target_gaps, source_lookup, target_label, source_label):
-        """Compute fillable segments where `source` can fill `target`."""
-        out_rows = []
-        for _, r in target_gaps.iterrows():
-            key = (r["STATIONID"], r["COLUMN"])
-            base = (r["GAP_START"], r["GAP_END"])
-            subtracts = source_lookup.get(key, [])
-            fill_segments = _subtract_interval(base, subtracts)
-            for fs, fe in fill_segments:
-                steps = _steps_inclusive(fs, fe)
-                if steps < min_steps:
-                    continue
-                out_rows.append(
+    prepared = {label: _prep_gaps(g) for label, g in gaps.items()}
+    # One integer code per (station, column) shared by all datasets
+    all_keys = pd.concat(
+        [g[["STATIONID", "COLUMN"]] for g in prepared.values()], ignore_index=True
+    )
+    key_index = pd.MultiIndex.from_frame(all_keys).unique()
+    codes = {
+        label: key_index.get_indexer(
+            pd.MultiIndex.from_frame(g[["STATIONID", "COLUMN"]])
+        )
+        for label, g in prepared.items()
+    }
+
+    parts = []
+    for target, tgaps in prepared.items():
+        for source in prepared:
+            if source == target or tgaps.empty:
+                continue
+            sgaps = prepared[source]
+            t_idx, fill_start, fill_end = _fillable_segments(
+                codes[target],
+                _to_ns(tgaps["GAP_START"]),
+                _to_ns(tgaps["GAP_END"]),
+                codes[source],
+                _to_ns(sgaps["GAP_START"]),
+                _to_ns(sgaps["GAP_END"]),
+                step_ns,
+            )
+            steps = (fill_end - fill_start) // step_ns + 1
+            keep = steps >= min_steps
+            t_idx, fill_start, fill_end, steps = (
+                t_idx[keep],
+                fill_start[keep],
+                fill_end[keep],
+                steps[keep],
+            )
+            if not len(t_idx):
+                continue
+            rows = tgaps.iloc[t_idx]
+            n_missing = rows["N_STEPS_MISSING"].to_numpy().astype(int)
+            parts.append(
+                pd.DataFrame(
                     {
-                        "TARGET_DATASET": target_label,
-                        "SOURCE_DATASET": source_label,
-                        "STATIONID": r["STATIONID"],
-                        "COLUMN": r["COLUMN"],
-                        "TARGET_GAP_START": r["GAP_START"],
-                        "TARGET_GAP_END": r["GAP_END"],
-                        "FILLABLE_START": fs,
-                        "FILLABLE_END": fe,
-                        "N_STEPS_FILLABLE": steps,
+                        "TARGET_DATASET": target,
+                        "SOURCE_DATASET": source,
+                        "STATIONID": rows["STATIONID"].to_numpy(),
+                        "COLUMN": rows["COLUMN"].to_numpy(),
+                        "TARGET_GAP_START": rows["GAP_START"].to_numpy(),
+                        "TARGET_GAP_END": rows["GAP_END"].to_numpy(),
+                        "FILLABLE_START": _from_ns(fill_start, tgaps["GAP_START"]),
+                        "FILLABLE_END": _from_ns(fill_end, tgaps["GAP_START"]),
+                        "N_STEPS_FILLABLE": steps.astype(int),
                         "HOURS_FILLABLE": steps * hours_per_step,
-                        "TARGET_N_STEPS_MISSING": int(r["N_STEPS_MISSING"]),
-                        "COVERAGE_RATIO": steps / int(r["N_STEPS_MISSING"]),
-                        "TARGET_GAP_KIND": r.get("GAP_KIND", "Unknown"),
+                        "TARGET_N_STEPS_MISSING": n_missing,
+                        "COVERAGE_RATIO": steps / n_missing,
+                        "TARGET_GAP_KIND": rows["GAP_KIND"].to_numpy(),
                     }
                 )
-        if not out_rows:
-            return pd.DataFrame(
-                columns=[
-                    "TARGET_DATASET",
-                    "SOURCE_DATASET",
-                    "STATIONID",
-                    "COLUMN",
-                    "TARGET_GAP_START",
-                    "TARGET_GAP_END",
-                    "FILLABLE_START",
-                    "FILLABLE_END",
-                    "N_STEPS_FILLABLE",
-                    "HOURS_FILLABLE",
-                    "TARGET_N_STEPS_MISSING",
-                    "COVERAGE_RATIO",
-                    "TARGET_GAP_KIND",
-                ]
             )
-        return (
-            pd.DataFrame(out_rows)
-            .sort_values(["STATIONID", "COLUMN", "TARGET_GAP_START", "FILLABLE_START"])
-            .reset_index(drop=True)
-        )
 
-    # B can fill A (subtract A's gaps by B's gaps)
-    fill_B_to_A = _direction_fill(
-        gaps_a, gapsB_lookup, target_label="A", source_label="B"
-    )
-    # A can fill B
-    fill_A_to_B = _direction_fill(
-        gaps_b, gapsA_lookup, target_label="B", source_label="A"
-    )
-
-    # Combine
-    combined = pd.concat([fill_B_to_A, fill_A_to_B], ignore_index=True)
+    if not parts:
+        return pd.DataFrame(columns=FILL_COLUMNS)
+    combined = pd.concat(parts, ignore_index=True)
     return combined.sort_values(
-        ["STATIONID", "COLUMN", "TARGET_DATASET", "TARGET_GAP_START", "FILLABLE_START"]
+        [
+            "STATIONID",
+            "COLUMN",
+            "TARGET_DATASET",
+            "TARGET_GAP_START",
+            "FILLABLE_START",
+            "SOURCE_DATASET",
+        ]
     ).reset_index(drop=True)
+
+
+def _prep_gaps(g: pd.DataFrame) -> pd.DataFrame:
+    """Normalize dtypes and sort a gap summary."""
+    g = g.copy()
+    g["GAP_START"] = pd.to_datetime(g["GAP_START"])
+    g["GAP_END"] = pd.to_datetime(g["GAP_END"])
+    if "GAP_KIND" not in g.columns:
+        g["GAP_KIND"] = "Unknown"
+    return g.sort_values(["STATIONID", "COLUMN", "GAP_START", "GAP_END"]).reset_index(
+        drop=True
+    )
+
+
+def _to_ns(times: pd.Series) -> np.ndarray:
+    """Datetimes as int64 nanoseconds (UTC for tz-aware input)."""
+    return pd.DatetimeIndex(times).as_unit("ns").asi8
+
+
+def _from_ns(values: np.ndarray, like: pd.Series) -> pd.DatetimeIndex:
+    """Inverse of `_to_ns`, restoring the unit and time zone of `like`."""
+    idx = pd.DatetimeIndex(values.view("M8[ns]"))
+    if like.dt.tz is not None:
+        idx = idx.tz_localize("UTC").tz_convert(like.dt.tz)
+    return idx.as_unit(like.dt.unit)
+
+
+def _fillable_segments(
+    t_key: np.ndarray,
+    t_start: np.ndarray,
+    t_end: np.ndarray,
+    s_key: np.ndarray,
+    s_start: np.ndarray,
+    s_end: np.ndarray,
+    step: int,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Intersect target gaps with the coverage of a source.
+
+    All times are int64 nanoseconds and intervals are inclusive on a grid
+    of `step`. Returns, per fillable segment, the row of the target gap and
+    the segment's inclusive start and end.
+    """
+    # Merge overlapping or touching source gaps per key
+    order = np.lexsort((s_start, s_key))
+    s_key, s_start, s_end = s_key[order], s_start[order], s_end[order]
+    run_end = pd.Series(s_end).groupby(s_key).cummax().to_numpy()
+    new_block = np.ones(len(s_key), dtype=bool)
+    if len(s_key) > 1:
+        same_key = s_key[1:] == s_key[:-1]
+        new_block[1:] = ~same_key | (s_start[1:] > run_end[:-1] + step)
+    first = np.flatnonzero(new_block)
+    u_key = s_key[first]
+    u_start = s_start[first]
+    u_end = np.maximum.reduceat(run_end, first) if len(first) else run_end[:0]
+
+    # Source coverage: the complement of its merged gaps within each key
+    last_in_key = np.ones(len(u_key), dtype=bool)
+    last_in_key[:-1] = u_key[1:] != u_key[:-1]
+    first_in_key = np.ones(len(u_key), dtype=bool)
+    first_in_key[1:] = u_key[1:] != u_key[:-1]
+    next_start = np.empty_like(u_start)
+    next_start[:-1] = u_start[1:]
+    after_hi = np.where(last_in_key, _MAX_NS, next_start - step)
+    no_source = np.setdiff1d(np.unique(t_key), u_key)
+    c_key = np.concatenate([u_key[first_in_key], u_key, no_source])
+    c_lo = np.concatenate(
+        [
+            np.full(first_in_key.sum(), _MIN_NS),
+            u_end + step,
+            np.full(len(no_source), _MIN_NS),
+        ]
+    )
+    c_hi = np.concatenate(
+        [u_start[first_in_key] - step, after_hi, np.full(len(no_source), _MAX_NS)]
+    )
+    valid = c_lo <= c_hi
+    c_key, c_lo, c_hi = c_key[valid], c_lo[valid], c_hi[valid]
+    order = np.lexsort((c_lo, c_key))
+    c_key, c_lo, c_hi = c_key[order], c_lo[order], c_hi[order]
+
+    # Rank all times so (key, time) pairs sort as single integers
+    times, inverse = np.unique(
+        np.concatenate([t_start, t_end, c_lo, c_hi]), return_inverse=True
+    )
+    n_t, n_c = len(t_start), len(c_lo)
+    rank_ts, rank_te = inverse[:n_t], inverse[n_t : 2 * n_t]
+    rank_lo, rank_hi = inverse[2 * n_t : 2 * n_t + n_c], inverse[2 * n_t + n_c :]
+    width = len(times) + 1
+    lo_idx = np.searchsorted(c_key * width + rank_hi, t_key * width + rank_ts, "left")
+    hi_idx = np.searchsorted(c_key * width + rank_lo, t_key * width + rank_te, "right")
+    counts = np.maximum(hi_idx - lo_idx, 0)
+
+    t_idx = np.repeat(np.arange(n_t), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    c_idx = np.repeat(lo_idx, counts) + offsets
+    fill_start = np.maximum(t_start[t_idx], c_lo[c_idx])
+    fill_end = np.minimum(t_end[t_idx], c_hi[c_idx])
+    return t_idx, fill_start, fill_end
@@ -3,8 +3,8 @@
 
 import pandas as pd
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 from typing import List, Dict, Union, Optional
-import plotly.graph_objects as go
 
 
 # validate test variables to equal 0, 1, 2
@@ -458,13 +458,23 @@ def review_lags(data1, data2, max_lag=4):
       meaning it only correlates non-NA values that align by date/time index.
       Shifting `data2` introduces NAs at the start/end, automatically reducing 
       the sample size, which is an expected behavior of lagged correlation.
+    - When both series share the same index, all lags are evaluated in one
+      FFT pass (see `lagged_correlation_batch`).
     """
+    # data_cleaning pulls in scikit-learn, so import it only when needed
+    from micromet.qaqc.data_cleaning import lagged_correlation_batch
+
     try:
         lags = np.arange(-max_lag, max_lag + 1)
-        cross_correlations = []
-        for lag in lags:
-            corr = data1.corr(data2.shift(lag))
-            cross_correlations.append(corr)
+        if data1.index.equals(data2.index):
+            cross_correlations = list(lagged_correlation_batch(
+                data1.to_numpy(dtype=float), data2.to_numpy(dtype=float), lags
+            )[0])
+        else:
+            cross_correlations = []
+            for lag in lags:
+                corr = data1.corr(data2.shift(lag))
+                cross_correlations.append(corr)
         
         ccf_series = pd.Series(cross_correlations, index=lags)
         optimal_lag = ccf_series.abs().idxmax()
@@ -615,6 +625,8 @@ def detect_sectional_offsets_indexed(
     - DataFrame with lag information per window.
     """
 
+    from micromet.qaqc.data_cleaning import lagged_correlation_batch
+
     # Resample both series to ensure regular intervals
     s1 = df1[value_col1].resample(freq).mean()
     s2 = df2[value_col2].resample(freq).mean()
@@ -633,42 +645,82 @@ def detect_sectional_offsets_indexed(
     if len(s1) == 0:
         return pd.DataFrame()
 
-    # Create window start times
+    # Each window is the label slice s.loc[start:end]: a run of positions
+    # [lo, hi) in the cleaned series
     window_starts = pd.date_range(s1.index.min(), s1.index.max(), freq=window_size)
-    results = []
+    ends = window_starts + pd.to_timedelta(window_size)
+    lo = s1.index.searchsorted(window_starts, side='left')
+    hi = s1.index.searchsorted(ends, side='right')
+
+    # Skip short or empty windows
+    keep = (hi - lo) >= max_lag * 2
+    window_starts, lo, hi = window_starts[keep], lo[keep], hi[keep]
+    if not len(lo):
+        return pd.DataFrame()
 
-    for start in window_starts:
-        end = start + pd.to_timedelta(window_size)
-        
-        # Select the segment from the cleaned (aligned and dropped NA) series
-        seg1 = s1.loc[start:end] 
-        seg2 = s2.loc[start:end]
+    # Lay all windows out as rows of one 2-D array: a strided view of the
+    # NaN-padded series, with positions past each window's end masked
+    width = int((hi - lo).max())
+    inside = np.arange(width) < (hi - lo)[:, np.newaxis]
+
+    def windows(values):
+        padded = np.concatenate([values, np.full(width, np.nan)])
+        rows = np.lib.stride_tricks.sliding_window_view(padded, width)[lo]
+        return np.where(inside, rows, np.nan)
+
+    # Correlations of every window at every lag in one batched FFT pass;
+    # identical to seg1.corr(seg2.shift(lag)) per window
+    lags = np.arange(-max_lag, max_lag + 1)
+    correlations = lagged_correlation_batch(
+        windows(s1.to_numpy(dtype=float)), windows(s2.to_numpy(dtype=float)), lags
+    )
 
-        # Check for sufficient data points in the window
-        if len(seg1) < max_lag * 2 or len(seg2) < max_lag * 2:
-            continue  # Skip short or empty windows
+    found = ~np.isnan(correlations).all(axis=1)
+    if not found.any():
+        return pd.DataFrame()
+    correlations = correlations[found]
+    best = np.nanargmax(correlations, axis=1)
 
-        lags = np.arange(-max_lag, max_lag + 1)
-        
-        # Calculate correlations. pd.Series.corr() automatically handles NaNs
-        # that might arise from shifting (e.g., when aligning a lagged series)
-        correlations = [seg1.corr(seg2.shift(lag)) for lag in lags]
+    result_df = pd.DataFrame({
+        'window_start': window_starts[found],
+        'best_lag': lags[best],
+        'correlation': correlations[np.arange(len(best)), best],
+    })
 
-        if all(pd.isna(correlations)):
-            continue
+    return result_df
 
-        best_lag = lags[np.nanargmax(correlations)]
-        best_corr = np.nanmax(correlations)
+def _sectional_offsets_job(args):
+    name, df1, df2, kwargs = args
+    return name, detect_sectional_offsets_indexed(df1, df2, **kwargs)
 
-        results.append({
-            'window_start': start,
-            'best_lag': best_lag,
-            'correlation': best_corr
-        })
+# run detect_sectional_offsets_indexed for many station pairs
+def detect_sectional_offsets_pairs(
+    pairs, value_col1, value_col2,
+    freq='h', max_lag=24, window_size='7D', workers=1
+):
+    """
+    Runs `detect_sectional_offsets_indexed` for several pairs of data frames,
+    e.g. every station against its redundant met logger.
 
-    result_df = pd.DataFrame(results)
+    Parameters:
+    - pairs: dict mapping a name to a (df1, df2) tuple.
+    - value_col1, value_col2, freq, max_lag, window_size: as in
+      `detect_sectional_offsets_indexed`, applied to every pair.
+    - workers: number of processes; pairs are spread over a process pool
+      when greater than 1.
 
-    return result_df
+    Returns:
+    - dict mapping each name to its DataFrame of lag information per window.
+    """
+    kwargs = dict(
+        value_col1=value_col1, value_col2=value_col2,
+        freq=freq, max_lag=max_lag, window_size=window_size,
+    )
+    jobs = [(name, df1, df2, kwargs) for name, (df1, df2) in pairs.items()]
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return dict(pool.map(_sectional_offsets_job, jobs))
+    return dict(map(_sectional_offsets_job, jobs))
 
 # plots the results of detect_sectional_offsets_indexed
 def plot_sectional_lags_plotly(corr_check, height=400):
@@ -676,6 +728,8 @@ def plot_sectional_lags_plotly(corr_check, height=400):
     Plots the results of the detect_sectional_offsets_indexed function,
     showing the best lag for each timeperiod
     """
+    import plotly.graph_objects as go
+
     fig = go.Figure()
 
     fig.add_trace(go.Scatter(
@@ -1,17 +1,68 @@
 import requests
 import datetime
 import logging
-from typing import Union, Tuple, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, Union, Tuple, Optional
 
+import urllib3
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
+from urllib3.util.retry import Retry
 import pandas as pd
 from io import BytesIO
 import configparser
+import io
 import sqlalchemy
+from sqlalchemy import text
 from micromet.format.reformatter import Reformatter
 from micromet.utils import logger_check
 micromet_version = "0.2.1"
 
+# (connect, read) timeouts in seconds for logger requests
+DEFAULT_TIMEOUT = (10.0, 300.0)
+# HTTP statuses worth retrying; loggers answer 503 while busy
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Upper bound on concurrent logger downloads in process_station_data
+MAX_DOWNLOAD_WORKERS = 8
+# Time span requested per DataQuery and rows parsed per chunk when streaming
+DEFAULT_STREAM_WINDOW = "7D"
+DEFAULT_CHUNK_ROWS = 5000
+# Errors that end a streamed download early and trigger a resume
+STREAM_ERRORS = (requests.exceptions.RequestException, urllib3.exceptions.HTTPError)
+# Unique key of the amflux tables used to merge uploads in the database
+# (see sql/set_amflux_upsert_keys.sql)
+UPSERT_KEYS = ("stationid", "timestamp_end")
+# Materialized merge of amfluxeddy and amfluxmet, keyed on UPSERT_KEYS. Met
+# columns that also exist in amfluxeddy are stored with a "met_" prefix,
+# except for the shared timestamp columns.
+MERGED_TABLE = "amflux_merged"
+MERGED_SOURCES = ("eddy", "met")
+MERGED_SHARED_COLUMNS = ("timestamp_start", "datetime_start")
+
+
+class _StreamReader:
+    """
+    File-like view of a streamed HTTP body for `pd.read_csv`.
+
+    `read` returns whatever has arrived instead of blocking until the
+    requested size is filled, so rows are parsed as they come in and a
+    dropped connection loses at most the data of one socket read.
+    """
+
+    def __init__(self, raw):
+        raw.decode_content = True
+        self.raw = raw
+        self._read = getattr(raw, "read1", raw.read)
+
+    def read(self, size: int = -1) -> bytes:
+        return self._read(size if size and size > 0 else None)
+
+    def tell(self) -> int:
+        return self.raw.tell()
+
+    def __iter__(self):
+        return iter(self.raw)
 
 
 class StationDataDownloader:
@@ -27,6 +78,17 @@ class StationDataDownloader:
         A configuration object containing station details and credentials.
     logger : logging.Logger, optional
         A logger for logging messages. If None, a new logger is created.
+    timeout : float or tuple of float, optional
+        Request timeout in seconds, or a ``(connect, read)`` pair.
+        Defaults to `DEFAULT_TIMEOUT`.
+    retries : int, optional
+        Number of retries for failed connections, reads and retryable HTTP
+        statuses. Defaults to 3.
+    backoff_factor : float, optional
+        Exponential backoff factor between retries. Defaults to 1.0.
+    pool_maxsize : int, optional
+        Maximum number of pooled connections per logger host.
+        Defaults to 2.
 
     Attributes
     ----------
@@ -36,12 +98,22 @@ class StationDataDownloader:
         The logger instance.
     logger_credentials : requests.auth.HTTPBasicAuth
         The authentication credentials for the logger.
+
+    Notes
+    -----
+    One `requests.Session` is kept per logger host and port, so repeated
+    requests to a logger reuse its connection. Call `close` (or use the
+    downloader as a context manager) to release the sessions.
     """
 
     def __init__(
         self,
         config: Union[configparser.ConfigParser, dict],
         logger: logging.Logger = None,
+        timeout: Union[float, Tuple[float, float]] = DEFAULT_TIMEOUT,
+        retries: int = 3,
+        backoff_factor: float = 1.0,
+        pool_maxsize: int = 2,
     ):
         """
         Initialize the StationDataDownloader.
@@ -54,6 +126,14 @@ class StationDataDownloader:
         logger : logging.Logger, optional
             A logger for logging messages. If None, a new logger is
             created.
+        timeout : float or tuple of float, optional
+            Request timeout in seconds, or a ``(connect, read)`` pair.
+        retries : int, optional
+            Number of retries for failed requests. Defaults to 3.
+        backoff_factor : float, optional
+            Exponential backoff factor between retries. Defaults to 1.0.
+        pool_maxsize : int, optional
+            Maximum number of pooled connections per logger host.
         """
         self.config = config
         self.logger = logger_check(logger)
@@ -61,6 +141,106 @@ class StationDataDownloader:
         self.logger_credentials = HTTPBasicAuth(
             config["LOGGER"]["login"], config["LOGGER"]["pw"]
         )
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.pool_maxsize = pool_maxsize
+        self._sessions: Dict[Tuple[str, int], requests.Session] = {}
+        self._session_lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        """Close all pooled logger sessions."""
+        with self._session_lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
+
+    def _session(self, station: str, loggertype: str = "eddy") -> requests.Session:
+        """
+        Return the pooled session for a station's logger host.
+
+        Parameters
+        ----------
+        station : str
+            The identifier for the station.
+        loggertype : str, optional
+            The type of logger ('eddy' or 'met'). Defaults to 'eddy'.
+
+        Returns
+        -------
+        requests.Session
+            A session with authentication and retry-with-backoff mounted.
+        """
+        host = (self.config[station]["ip"], self._get_port(station, loggertype))
+        with self._session_lock:
+            session = self._sessions.get(host)
+            if session is None:
+                retry = Retry(
+                    total=self.retries,
+                    connect=self.retries,
+                    read=self.retries,
+                    status=self.retries,
+                    backoff_factor=self.backoff_factor,
+                    status_forcelist=RETRY_STATUSES,
+                    allowed_methods=frozenset({"GET"}),
+                    raise_on_status=False,
+                )
+                adapter = HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=self.pool_maxsize,
+                    max_retries=retry,
+                )
+                session = requests.Session()
+                session.auth = self.logger_credentials
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._sessions[host] = session
+        return session
+
+    def _get(
+        self, station: str, loggertype: str, path: str, params: dict, **kwargs
+    ) -> requests.Response:
+        """
+        Send a GET request to a station's logger through its pooled session.
+
+        Parameters
+        ----------
+        station : str
+            The identifier for the station.
+        loggertype : str
+            The type of logger ('eddy' or 'met').
+        path : str
+            URL path on the logger, e.g. ``"tables.html"``.
+        params : dict
+            Query parameters.
+        **kwargs
+            Passed to `requests.Session.get`, e.g. ``stream=True``.
+
+        Returns
+        -------
+        requests.Response
+            The response after any retries.
+        """
+        ip = self.config[station]["ip"]
+        port = self._get_port(station, loggertype)
+        url = f"http://{ip}:{port}/{path}"
+        return self._session(station, loggertype).get(
+            url, params=params, timeout=self.timeout, **kwargs
+        )
+
+    @staticmethod
+    def _table_name(loggertype: str) -> str:
+        """Return the logger table holding AmeriFlux output for `loggertype`."""
+        if loggertype == "eddy":
+            return "Flux_AmeriFluxFormat"
+        return "Statistics_AmeriFlux"
 
     def _get_port(self, station: str, loggertype: str = "eddy") -> int:
         """
@@ -103,18 +283,13 @@ class StationDataDownloader:
             A tuple containing the logger's current time as a string and
             the system's current time as a string.
         """
-        ip = self.config[station]["ip"]
-        port = self._get_port(station, loggertype)
-        clk_url = f"http://{ip}:{port}/?"
         clk_args = {
             "command": "ClockCheck",
             "uri": "dl",
             "format": "json",
         }
 
-        clktimeresp = requests.get(
-            clk_url, params=clk_args, auth=self.logger_credentials
-        ).json()
+        clktimeresp = self._get(station, loggertype, "", clk_args).json()
 
         clktime = clktimeresp.get("time")
         comptime = f"{datetime.datetime.now():%Y-%m-%d %H:%M:%S}"
@@ -175,13 +350,8 @@ class StationDataDownloader:
             size of the data packet in MB, and the HTTP status code.
         """
 
-        ip = self.config[station]["ip"]
-        port = self._get_port(station, loggertype)
-        tabletype = (
-            "Flux_AmeriFluxFormat" if loggertype == "eddy" else "Statistics_AmeriFlux"
-        )
+        tabletype = self._table_name(loggertype)
 
-        url = f"http://{ip}:{port}/tables.html?"
         params = {
             "command": "DataQuery",
             "mode": f"{mode}",
@@ -203,7 +373,7 @@ class StationDataDownloader:
         else:
             params["p2"] = p2
 
-        response = requests.get(url, params=params, auth=self.logger_credentials)
+        response = self._get(station, loggertype, "tables.html", params)
 
         if response.status_code == 200:
             raw_data = pd.read_csv(BytesIO(response.content), skiprows=[0, 2, 3])
@@ -213,6 +383,97 @@ class StationDataDownloader:
             self.logger.error(f"Error downloading from station: {response.status_code}")
             return None, None, response.status_code
 
+    def iter_station_chunks(
+        self,
+        station: str,
+        loggertype: str = "eddy",
+        start: Union[str, datetime.datetime, None] = None,
+        end: Union[str, datetime.datetime, None] = None,
+        window: Union[str, pd.Timedelta] = DEFAULT_STREAM_WINDOW,
+        chunksize: int = DEFAULT_CHUNK_ROWS,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Stream a logger table in bounded time windows.
+
+        The span from `start` to `end` is split into windows of `window`,
+        each requested as a ``date-range`` DataQuery. Every response is
+        parsed incrementally from the socket in chunks of `chunksize` rows,
+        so at most one chunk is held in memory at a time.
+
+        Parameters
+        ----------
+        station : str
+            The identifier for the station.
+        loggertype : str, optional
+            The type of logger ('eddy' or 'met'). Defaults to 'eddy'.
+        start : str or datetime, optional
+            First timestamp to request (inclusive). Defaults to 10 days
+            before now, as in `download_from_station`.
+        end : str or datetime, optional
+            Last timestamp to request (exclusive). Defaults to now.
+        window : str or pd.Timedelta, optional
+            Time span requested per DataQuery. Defaults to
+            `DEFAULT_STREAM_WINDOW`.
+        chunksize : int, optional
+            Number of rows per yielded DataFrame. Defaults to
+            `DEFAULT_CHUNK_ROWS`.
+
+        Yields
+        ------
+        pd.DataFrame
+            Raw table rows. ``attrs["pack_size"]`` holds the MB received
+            from the logger while the chunk was parsed.
+
+        Raises
+        ------
+        requests.HTTPError
+            If the logger answers a window with a non-200 status.
+        """
+        end = pd.Timestamp.now() if end is None else pd.Timestamp(end)
+        if start is None:
+            start = end - pd.Timedelta(days=10)
+        window_starts = pd.date_range(pd.Timestamp(start), end, freq=window)
+        for w_start in window_starts:
+            w_end = min(w_start + pd.Timedelta(window), end)
+            if w_end > w_start:
+                yield from self._stream_window(
+                    station, loggertype, w_start, w_end, chunksize
+                )
+
+    def _stream_window(
+        self,
+        station: str,
+        loggertype: str,
+        start: pd.Timestamp,
+        end: pd.Timestamp,
+        chunksize: int,
+    ) -> Iterator[pd.DataFrame]:
+        """Request one time window and yield its rows as they arrive."""
+        params = {
+            "command": "DataQuery",
+            "mode": "date-range",
+            "format": "toA5",
+            "uri": f"dl:{self._table_name(loggertype)}",
+            "p1": f"{start:%Y-%m-%dT%H:%M:%S}",
+            "p2": f"{end:%Y-%m-%dT%H:%M:%S}",
+        }
+        response = self._get(station, loggertype, "tables.html", params, stream=True)
+        with response:
+            response.raise_for_status()
+            body = _StreamReader(response.raw)
+            try:
+                reader = pd.read_csv(body, skiprows=[0, 2, 3], chunksize=chunksize)
+            except pd.errors.EmptyDataError:
+                return
+            received = 0
+            with reader:
+                for chunk in reader:
+                    if chunk.empty:
+                        continue
+                    chunk.attrs["pack_size"] = (body.tell() - received) * 1e-6
+                    received = body.tell()
+                    yield chunk
+
 
 class StationDataProcessor(StationDataDownloader):
     """
@@ -230,6 +491,9 @@ class StationDataProcessor(StationDataDownloader):
         A SQLAlchemy engine for database connections.
     logger : logging.Logger, optional
         A logger for logging messages.
+    **kwargs
+        Connection options passed to `StationDataDownloader`
+        (``timeout``, ``retries``, ``backoff_factor``, ``pool_maxsize``).
 
     Attributes
     ----------
@@ -242,6 +506,7 @@ class StationDataProcessor(StationDataDownloader):
         config: Union[configparser.ConfigParser, dict],
         engine: sqlalchemy.engine.base.Engine,
         logger: logging.Logger = None,
+        **kwargs,
     ):
         """
         Initialize the StationDataProcessor.
@@ -254,12 +519,15 @@ class StationDataProcessor(StationDataDownloader):
             A SQLAlchemy engine for database connections.
         logger : logging.Logger, optional
             A logger for logging messages.
+        **kwargs
+            Connection options passed to `StationDataDownloader`.
         """
 
-        super().__init__(config, logger)
+        super().__init__(config, logger, **kwargs)
         self.config = config
         self.engine = engine
         self.logger = logger_check(logger)
+        self._merged_map: Optional[Dict[str, Dict[str, str]]] = None
 
     def get_station_data(
         self,
@@ -285,7 +553,9 @@ class StationDataProcessor(StationDataDownloader):
         loggertype : str, optional
             The type of logger ('eddy' or 'met'). Defaults to 'eddy'.
         config_path : str, optional
-            The path to the reformatter configuration file.
+            Unused; the `Reformatter` always reads the packaged
+            ``reformatter_vars`` configuration. Kept for backward
+            compatibility.
         var_limits_csv : str, optional
             The path to the variable limits CSV file.
         drop_soil : bool, optional
@@ -307,13 +577,11 @@ class StationDataProcessor(StationDataDownloader):
         if status_code == 200:
             if raw_data is not None and reformat:
                 am_data = Reformatter(
-                    config_path=config_path,
                     var_limits_csv=var_limits_csv,
                     drop_soil=drop_soil,
+                    logger=self.logger,
                 )
-                am_df = am_data.prepare(raw_data)
-                # am_data = Reformatter(raw_data)
-                # am_df = am_data.et_data
+                am_df, _ = am_data.prepare(raw_data, data_type=loggertype)
             else:
                 am_df = raw_data
 
@@ -391,11 +659,12 @@ class StationDataProcessor(StationDataDownloader):
         pd.DataFrame
             A DataFrame containing only the new records.
         """
-        table = f"amflux{loggertype}"
-        query = f"SELECT {field} FROM {table} WHERE stationid = '{station}';"
+        quote = self.engine.dialect.identifier_preparer.quote
+        table = quote(f"amflux{loggertype}")
+        query = text(f"SELECT {quote(field)} FROM {table} WHERE stationid = :station")
 
-        exist = pd.read_sql(query, con=self.engine)
-        existing = exist["timestamp_end"].values
+        exist = pd.read_sql(query, con=self.engine, params={"station": station})
+        existing = exist[field].values
 
         return self.remove_existing_records(df, field, existing, self.logger)
 
@@ -415,10 +684,13 @@ class StationDataProcessor(StationDataDownloader):
         datetime.datetime
             The latest timestamp found in the database for the station.
         """
-        table = f"amflux{loggertype}"
-        query = f"SELECT MAX(timestamp_end) AS max_value FROM {table} WHERE stationid = '{station}';"
+        table = self.engine.dialect.identifier_preparer.quote(f"amflux{loggertype}")
+        query = text(
+            f"SELECT MAX(timestamp_end) AS max_value FROM {table} "
+            "WHERE stationid = :station"
+        )
 
-        df = pd.read_sql(query, con=self.engine)
+        df = pd.read_sql(query, con=self.engine, params={"station": station})
         return df["max_value"].iloc[0]
 
     def database_columns(self, dat: str) -> list:
@@ -446,40 +718,54 @@ class StationDataProcessor(StationDataDownloader):
         site_folders: dict,
         config_path: str = "./data/reformatter_vars.yml",
         var_limits_csv: str = "./data/extreme_values.csv",
+        max_workers: Optional[int] = None,
     ) -> None:
         """
         Process and upload data for all specified stations.
 
-        This method iterates through a dictionary of site folders,
-        fetches data for each station, processes it, and uploads it
-        to the database.
+        Eddy and met tables of all stations are downloaded concurrently on
+        a thread pool; each table is filtered against the database and
+        uploaded as soon as its download finishes. A station that fails or
+        times out is logged and skipped without holding up the others.
 
         Parameters
         ----------
         site_folders : dict
             A dictionary mapping station IDs to folder names.
         config_path : str, optional
-            The path to the reformatter configuration file.
-            Defaults to "./data/reformatter_vars.yml".
+            Unused; see `get_station_data`. Kept for backward compatibility.
         var_limits_csv : str, optional
             The path to the variable limits CSV file.
             Defaults to "./data/extreme_values.csv".
+        max_workers : int, optional
+            Number of concurrent downloads. Defaults to one per table, up
+            to `MAX_DOWNLOAD_WORKERS`. Use 1 to download serially.
         """
-        for stationid, name in site_folders.items():
+        tasks = []
+        for stationid in site_folders:
             station = self.get_station_id(stationid)
-            self.logger.info(f"Processing station: {stationid}")
             for dat in ["eddy", "met"]:
-                if dat not in self.config[station]:
-                    continue
-
+                if dat in self.config[station]:
+                    tasks.append((stationid, station, dat))
+        if not tasks:
+            return
+
+        workers = max_workers or min(MAX_DOWNLOAD_WORKERS, len(tasks))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(
+                    self._fetch_station_data,
+                    stationid,
+                    station,
+                    dat,
+                    var_limits_csv,
+                ): (stationid, station, dat)
+                for stationid, station, dat in tasks
+            }
+            for future in as_completed(futures):
+                stationid, station, dat = futures[future]
                 try:
-                    stationtime, comptime = self.get_times(station, loggertype=dat)
-                    am_df, pack_size = self.get_station_data(
-                        station,
-                        loggertype=dat,
-                        config_path=config_path,
-                        var_limits_csv=var_limits_csv,
-                    )
+                    stationtime, comptime, am_df, pack_size = future.result()
                 except Exception as e:
                     self.logger.error(f"Error fetching data for {stationid}: {e}")
                     continue
@@ -488,34 +774,223 @@ class StationDataProcessor(StationDataDownloader):
                     self.logger.warning(f"No data for {stationid}")
                     continue
 
-                am_cols = self.database_columns(dat)
-
-                am_df_filt = self.compare_sql_to_station(am_df, station, loggertype=dat)
-                self.logger.info(f"Filtered {len(am_df_filt)} records")
-                stats = self._prepare_upload_stats(
-                    am_df_filt,
-                    stationid,
-                    dat,
-                    pack_size,
-                    len(am_df),
-                    len(am_df_filt),
-                    stationtime,
-                    comptime,
+                self._store_station_data(
+                    am_df, stationid, station, dat, pack_size, stationtime, comptime
                 )
 
-                # Upload data
-                am_df_filt = am_df_filt.rename(columns=str.lower)
+    def _fetch_station_data(
+        self,
+        stationid: str,
+        station: str,
+        dat: str,
+        var_limits_csv: str,
+    ) -> Tuple[Optional[str], str, Optional[pd.DataFrame], Optional[float]]:
+        """
+        Download one logger table; runs on the download thread pool.
 
-                # Check for columns that are not in the database
-                upload_cols = []
+        Returns
+        -------
+        tuple
+            The logger time, system time, processed DataFrame and packet
+            size in MB.
+        """
+        self.logger.info(f"Processing station: {stationid} ({dat})")
+        stationtime, comptime = self.get_times(station, loggertype=dat)
+        am_df, pack_size = self.get_station_data(
+            station,
+            loggertype=dat,
+            var_limits_csv=var_limits_csv,
+        )
+        return stationtime, comptime, am_df, pack_size
 
-                for col in am_df_filt.columns:
-                    if col in am_cols:
-                        upload_cols.append(col)
+    def _store_station_data(
+        self,
+        am_df: pd.DataFrame,
+        stationid: str,
+        station: str,
+        dat: str,
+        pack_size: float,
+        stationtime: str,
+        comptime: str,
+    ) -> int:
+        """
+        Upsert a downloaded table and record its upload statistics.
 
-                self._upload_to_database(am_df_filt[upload_cols], stats, dat)
+        Parameters
+        ----------
+        am_df : pd.DataFrame
+            The processed station data.
+        stationid : str
+            The full station identifier.
+        station : str
+            The short station identifier.
+        dat : str
+            The type of data ('eddy' or 'met').
+        pack_size : float
+            The size of the data packet in MB.
+        stationtime : str
+            The timestamp from the station's logger.
+        comptime : str
+            The timestamp from the system running the script.
 
-                self._print_processing_summary(station, stats, self.logger)
+        Returns
+        -------
+        int
+            Number of rows sent to the database.
+        """
+        am_cols = self.database_columns(dat)
+
+        # Rows already in the database are merged by the upsert, so the
+        # whole download is sent without pulling existing keys first;
+        # uploaddf_len is filled in with the rows the upsert actually added
+        stats = self._prepare_upload_stats(
+            am_df,
+            stationid,
+            dat,
+            pack_size,
+            len(am_df),
+            stationtime=stationtime,
+            comptime=comptime,
+        )
+
+        # Upload data
+        am_df_up = am_df.rename(columns=str.lower)
+        if "stationid" not in am_df_up.columns:
+            am_df_up.insert(0, "stationid", station)
+
+        # Check for columns that are not in the database
+        upload_cols = []
+
+        for col in am_df_up.columns:
+            if col in am_cols:
+                upload_cols.append(col)
+
+        inserted, updated = self._upload_to_database(am_df_up[upload_cols], stats, dat)
+        self.logger.info(f"Inserted {inserted} new records, updated {updated}")
+
+        self._print_processing_summary(station, stats, self.logger)
+        return len(am_df_up)
+
+    def stream_station_data(
+        self,
+        stationid: str,
+        loggertype: str = "eddy",
+        start: Union[str, datetime.datetime, None] = None,
+        end: Union[str, datetime.datetime, None] = None,
+        window: Union[str, pd.Timedelta] = DEFAULT_STREAM_WINDOW,
+        chunksize: int = DEFAULT_CHUNK_ROWS,
+        reformat: bool = True,
+        var_limits_csv: Optional[str] = None,
+        drop_soil: bool = False,
+        max_attempts: int = 3,
+    ) -> int:
+        """
+        Download, reformat and upload a station table chunk by chunk.
+
+        Intended for backfills after long outages: the table is streamed
+        with `iter_station_chunks` and every chunk is reformatted and
+        uploaded before the next one is read. The last uploaded timestamp
+        is kept as a checkpoint, so when the connection drops the download
+        resumes from the checkpoint instead of from `start`.
+
+        Parameters
+        ----------
+        stationid : str
+            The full station identifier (e.g., 'US-UTD').
+        loggertype : str, optional
+            The type of logger ('eddy' or 'met'). Defaults to 'eddy'.
+        start : str or datetime, optional
+            First timestamp to request. Defaults to the latest timestamp
+            already in the database.
+        end : str or datetime, optional
+            Last timestamp to request (exclusive). Defaults to now.
+        window : str or pd.Timedelta, optional
+            Time span requested per DataQuery.
+        chunksize : int, optional
+            Number of rows parsed, reformatted and uploaded at a time.
+        reformat : bool, optional
+            Whether to pass each chunk through the `Reformatter`.
+            Defaults to True.
+        var_limits_csv : str, optional
+            The path to the variable limits CSV file for the `Reformatter`.
+        drop_soil : bool, optional
+            Whether to drop soil-related data. Defaults to False.
+        max_attempts : int, optional
+            Number of consecutive failed attempts, without any chunk being
+            uploaded in between, before the error is raised. Defaults to 3.
+
+        Returns
+        -------
+        int
+            Number of rows uploaded.
+        """
+        station = self.get_station_id(stationid)
+        checkpoint = start
+        if checkpoint is None:
+            checkpoint = self.get_max_date(station, loggertype)
+        stationtime, comptime = self.get_times(station, loggertype=loggertype)
+        reformatter = None
+        if reformat:
+            reformatter = Reformatter(
+                var_limits_csv=var_limits_csv, drop_soil=drop_soil, logger=self.logger
+            )
+
+        uploaded = 0
+        attempts = 0
+        while True:
+            try:
+                for chunk in self.iter_station_chunks(
+                    station, loggertype, checkpoint, end, window, chunksize
+                ):
+                    chunk_end = self._last_timestamp(chunk)
+                    am_df = chunk
+                    if reformatter is not None:
+                        am_df, _ = reformatter.prepare(chunk, data_type=loggertype)
+                    uploaded += self._store_station_data(
+                        am_df,
+                        stationid,
+                        station,
+                        loggertype,
+                        chunk.attrs.get("pack_size"),
+                        stationtime,
+                        comptime,
+                    )
+                    if chunk_end is not None:
+                        checkpoint = chunk_end
+                    attempts = 0
+                return uploaded
+            except STREAM_ERRORS as e:
+                attempts += 1
+                if attempts >= max_attempts:
+                    raise
+                self.logger.warning(
+                    f"Download of {stationid} {loggertype} interrupted ({e}); "
+                    f"resuming from {checkpoint}"
+                )
+
+    @staticmethod
+    def _last_timestamp(df: pd.DataFrame) -> Optional[pd.Timestamp]:
+        """
+        Return the latest record timestamp in a raw logger chunk.
+
+        Uses the TOA5 ``TIMESTAMP`` column, or ``TIMESTAMP_END`` in
+        ``YYYYMMDDhhmm`` form when there is none.
+        """
+        if "TIMESTAMP" in df.columns:
+            stamps = pd.to_datetime(df["TIMESTAMP"], errors="coerce")
+        elif "TIMESTAMP_END" in df.columns:
+            stamps = pd.to_datetime(
+                pd.to_numeric(df["TIMESTAMP_END"], errors="coerce")
+                .dropna()
+                .astype("int64")
+                .astype(str),
+                format="%Y%m%d%H%M",
+                errors="coerce",
+            )
+        else:
+            return None
+        last = stamps.max()
+        return None if pd.isna(last) else last
 
     def _prepare_upload_stats(
         self,
@@ -524,9 +999,9 @@ class StationDataProcessor(StationDataDownloader):
         tabletype: str,
         pack_size: float,
         raw_len: int,
-        filtered_len: int,
-        stationtime: str,
-        comptime: str,
+        filtered_len: Optional[int] = None,
+        stationtime: str = None,
+        comptime: str = None,
     ) -> dict:
         """
         Prepare a dictionary of statistics about the data upload.
@@ -543,8 +1018,9 @@ class StationDataProcessor(StationDataDownloader):
             The size of the data packet in MB.
         raw_len : int
             The number of rows in the raw data.
-        filtered_len : int
-            The number of rows after filtering.
+        filtered_len : int, optional
+            The number of new rows added to the database. When None it is
+            set by `_upload_to_database` from the upsert counts.
         stationtime : str
             The timestamp from the station's logger.
         comptime : str
@@ -568,10 +1044,15 @@ class StationDataProcessor(StationDataDownloader):
             "micromet_version": micromet_version,
         }
 
-    def _upload_to_database(self, df: pd.DataFrame, stats: dict, dat: str) -> None:
+    def _upload_to_database(
+        self, df: pd.DataFrame, stats: dict, dat: str
+    ) -> Tuple[int, int]:
         """
         Upload data and statistics to the database.
 
+        ``stats["uploaddf_len"]`` is set to the number of rows the upsert
+        inserted, i.e. the rows that were not yet in the database.
+
         Parameters
         ----------
         df : pd.DataFrame
@@ -581,11 +1062,304 @@ class StationDataProcessor(StationDataDownloader):
         dat : str
             The type of data ('eddy' or 'met'), used to determine the
             table name.
+
+        Returns
+        -------
+        tuple of int
+            Rows inserted and rows updated, as from `upsert_records`.
         """
-        df.to_sql(f"amflux{dat}", con=self.engine, if_exists="append", index=False)
+        inserted, updated = self.upsert_records(df, f"amflux{dat}")
+        stats["uploaddf_len"] = inserted
         pd.DataFrame([stats]).to_sql(
             "uploadstats", con=self.engine, if_exists="append", index=False
         )
+        self._refresh_uploaded(df, dat)
+        return inserted, updated
+
+    def upsert_records(
+        self,
+        df: pd.DataFrame,
+        table: str,
+        keys: Tuple[str, ...] = UPSERT_KEYS,
+    ) -> Tuple[int, int]:
+        """
+        Insert rows into `table`, updating rows whose `keys` already exist.
+
+        Deduplication happens in the database through
+        ``INSERT ... ON CONFLICT (keys) DO UPDATE``, which needs a unique
+        index on `keys`. On PostgreSQL the frame is first loaded into a
+        temporary staging table with ``COPY``; other databases (SQLite)
+        receive a single parameterized executemany.
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            Rows to upload; column names must match the table.
+        table : str
+            Name of the target table.
+        keys : tuple of str, optional
+            Columns of the unique key. Defaults to `UPSERT_KEYS`.
+
+        Returns
+        -------
+        tuple of int
+            Number of rows inserted and number of existing rows updated.
+            PostgreSQL reports them per row through ``RETURNING (xmax = 0)``;
+            elsewhere the inserts are the change in the table's row count.
+
+        Raises
+        ------
+        ValueError
+            If a key column is missing from `df`.
+        """
+        missing = [key for key in keys if key not in df.columns]
+        if missing:
+            raise ValueError(f"Upsert key columns missing from data: {missing}")
+        # a batch may not touch the same key twice; the newest row wins
+        df = df.drop_duplicates(subset=list(keys), keep="last")
+        if df.empty:
+            return 0, 0
+
+        quote = self.engine.dialect.identifier_preparer.quote
+        cols = [str(col) for col in df.columns]
+        col_sql = ", ".join(quote(col) for col in cols)
+        updates = [quote(col) for col in cols if col not in keys]
+        if updates:
+            action = "DO UPDATE SET " + ", ".join(
+                f"{col} = EXCLUDED.{col}" for col in updates
+            )
+        else:
+            action = "DO NOTHING"
+        conflict = f"ON CONFLICT ({', '.join(quote(key) for key in keys)}) {action}"
+
+        with self.engine.begin() as conn:
+            if self.engine.dialect.name == "postgresql":
+                stage = quote(f"{table}_stage")
+                conn.exec_driver_sql(
+                    f"CREATE TEMP TABLE {stage} "
+                    f"(LIKE {quote(table)} INCLUDING DEFAULTS) ON COMMIT DROP"
+                )
+                self._copy_into(
+                    conn, df, f"COPY {stage} ({col_sql}) FROM STDIN WITH (FORMAT csv)"
+                )
+                # xmax is 0 for freshly inserted rows and set for updated
+                # ones; rows skipped by DO NOTHING are not returned
+                flags = conn.exec_driver_sql(
+                    f"INSERT INTO {quote(table)} ({col_sql}) "
+                    f"SELECT {col_sql} FROM {stage} {conflict} "
+                    "RETURNING (xmax = 0)"
+                ).scalars().all()
+                inserted = sum(bool(flag) for flag in flags)
+                return inserted, len(flags) - inserted
+            else:
+                names = [f"p{i}" for i in range(len(cols))]
+                stmt = text(
+                    f"INSERT INTO {quote(table)} ({col_sql}) "
+                    f"VALUES ({', '.join(':' + name for name in names)}) {conflict}"
+                )
+                values = df.astype(object).where(df.notna(), None)
+                records = [
+                    dict(zip(names, row)) for row in values.itertuples(index=False)
+                ]
+                count = text(f"SELECT COUNT(*) FROM {quote(table)}")
+                before = conn.execute(count).scalar()
+                conn.execute(stmt, records)
+                inserted = conn.execute(count).scalar() - before
+        return inserted, (len(df) - inserted) if updates else 0
+
+    def create_merged_table(self) -> None:
+        """
+        Create the materialized eddy/met merge table and fill it.
+
+        The table `MERGED_TABLE` has the columns of ``amfluxeddy`` and
+        ``amfluxmet`` with the source column types and a primary key on
+        `UPSERT_KEYS`. It replaces the ``amflux_merged_view`` join for
+        reads and is kept current by `refresh_merged` after each upload.
+        Existing tables are left as they are and only refreshed.
+        """
+        metadata = sqlalchemy.MetaData()
+        sources = {
+            dat: sqlalchemy.Table(f"amflux{dat}", metadata, autoload_with=self.engine)
+            for dat in MERGED_SOURCES
+        }
+        self._merged_map = None
+        columns = [
+            sqlalchemy.Column(key, sources["eddy"].c[key].type, nullable=False)
+            for key in UPSERT_KEYS
+        ]
+        added = set(UPSERT_KEYS)
+        for dat, mapping in self._merged_columns().items():
+            for src, dst in mapping.items():
+                if dst not in added:
+                    columns.append(sqlalchemy.Column(dst, sources[dat].c[src].type))
+                    added.add(dst)
+        sqlalchemy.Table(
+            MERGED_TABLE,
+            metadata,
+            *columns,
+            sqlalchemy.PrimaryKeyConstraint(*UPSERT_KEYS),
+        )
+        metadata.create_all(self.engine, checkfirst=True)
+        self.refresh_merged()
+
+    def refresh_merged(
+        self,
+        station: Optional[str] = None,
+        start=None,
+        end=None,
+        sources: Tuple[str, ...] = MERGED_SOURCES,
+    ) -> None:
+        """
+        Upsert rows of the source tables into the merge table.
+
+        Only rows of `station` with ``start <= timestamp_end <= end`` are
+        copied, so a refresh after an upload touches just the uploaded
+        interval. Each source updates only its own columns of the merged
+        rows, which gives the same result as a full outer join.
+
+        Parameters
+        ----------
+        station : str, optional
+            Station to refresh. Defaults to all stations.
+        start, end : optional
+            Inclusive ``timestamp_end`` bounds, in the representation of the
+            ``timestamp_end`` column. Default to unbounded.
+        sources : tuple of str, optional
+            Source tables to refresh ('eddy', 'met'). Defaults to both.
+        """
+        quote = self.engine.dialect.identifier_preparer.quote
+        where, params = self._merged_filter(station, start, end)
+        keys = ", ".join(quote(key) for key in UPSERT_KEYS)
+        mapping = self._merged_columns()
+        with self.engine.begin() as conn:
+            for dat in sources:
+                cols = mapping[dat]
+                src_sql = ", ".join([keys] + [quote(src) for src in cols])
+                dst_sql = ", ".join([keys] + [quote(dst) for dst in cols.values()])
+                if cols:
+                    action = "DO UPDATE SET " + ", ".join(
+                        f"{quote(dst)} = EXCLUDED.{quote(dst)}" for dst in cols.values()
+                    )
+                else:
+                    action = "DO NOTHING"
+                conn.execute(
+                    text(
+                        f"INSERT INTO {quote(MERGED_TABLE)} ({dst_sql}) "
+                        f"SELECT {src_sql} FROM {quote(f'amflux{dat}')} "
+                        f"WHERE {where} ON CONFLICT ({keys}) {action}"
+                    ),
+                    params,
+                )
+
+    def read_merged(
+        self,
+        station: Optional[str] = None,
+        start=None,
+        end=None,
+        columns: Optional[list] = None,
+    ) -> pd.DataFrame:
+        """
+        Read the merged eddy/met product for a date range.
+
+        Parameters
+        ----------
+        station : str, optional
+            Station to read. Defaults to all stations.
+        start, end : optional
+            Inclusive ``timestamp_end`` bounds, in the representation of the
+            ``timestamp_end`` column. Default to unbounded.
+        columns : list of str, optional
+            Columns to read in addition to the keys. Defaults to all.
+
+        Returns
+        -------
+        pd.DataFrame
+            Merged rows ordered by station and ``timestamp_end``.
+        """
+        quote = self.engine.dialect.identifier_preparer.quote
+        if columns is None:
+            select = "*"
+        else:
+            select = ", ".join(
+                quote(col)
+                for col in list(UPSERT_KEYS)
+                + [col for col in columns if col not in UPSERT_KEYS]
+            )
+        where, params = self._merged_filter(station, start, end)
+        query = text(
+            f"SELECT {select} FROM {quote(MERGED_TABLE)} WHERE {where} "
+            "ORDER BY stationid, timestamp_end"
+        )
+        return pd.read_sql(query, con=self.engine, params=params)
+
+    def _merged_columns(self) -> Dict[str, Dict[str, str]]:
+        """Map each source table's non-key columns to merge table columns."""
+        if self._merged_map is None:
+            inspector = sqlalchemy.inspect(self.engine)
+            names = {
+                dat: [c["name"] for c in inspector.get_columns(f"amflux{dat}")]
+                for dat in MERGED_SOURCES
+            }
+            eddy = set(names["eddy"])
+            self._merged_map = {
+                "eddy": {col: col for col in names["eddy"] if col not in UPSERT_KEYS},
+                "met": {
+                    col: (
+                        col
+                        if col not in eddy or col in MERGED_SHARED_COLUMNS
+                        else f"met_{col}"
+                    )
+                    for col in names["met"]
+                    if col not in UPSERT_KEYS
+                },
+            }
+        return self._merged_map
+
+    @staticmethod
+    def _merged_filter(station, start, end) -> Tuple[str, dict]:
+        """Build the WHERE clause and parameters for a station/date range."""
+        clauses, params = ["1 = 1"], {}
+        for clause, name, value in (
+            ("stationid = :station", "station", station),
+            ("timestamp_end >= :start", "start", start),
+            ("timestamp_end <= :end", "end", end),
+        ):
+            if value is not None:
+                clauses.append(clause)
+                params[name] = value.item() if hasattr(value, "item") else value
+        return " AND ".join(clauses), params
+
+    def _refresh_uploaded(self, df: pd.DataFrame, dat: str) -> None:
+        """Refresh the merge table for the intervals just uploaded."""
+        if df.empty or dat not in MERGED_SOURCES:
+            return
+        if not sqlalchemy.inspect(self.engine).has_table(MERGED_TABLE):
+            return
+        for station, rows in df.groupby("stationid"):
+            self.refresh_merged(
+                station,
+                rows["timestamp_end"].min(),
+                rows["timestamp_end"].max(),
+                sources=(dat,),
+            )
+
+    @staticmethod
+    def _copy_into(conn, df: pd.DataFrame, copy_sql: str) -> None:
+        """Stream `df` as CSV through a PostgreSQL ``COPY ... FROM STDIN``."""
+        buffer = io.StringIO()
+        df.to_csv(buffer, index=False, header=False)
+        buffer.seek(0)
+        cursor = conn.connection.cursor()
+        try:
+            if hasattr(cursor, "copy_expert"):
+                # psycopg2
+                cursor.copy_expert(copy_sql, buffer)
+            else:
+                # psycopg 3
+                with cursor.copy(copy_sql) as copy:
+                    copy.write(buffer.getvalue())
+        finally:
+            cursor.close()
 
     @staticmethod
     def _print_processing_summary(
@@ -0,0 +1,344 @@
+"""
+Decoder for Campbell Scientific TOB1 binary data files.
+
+A TOB1 file starts with five ASCII header lines (environment, field names,
+units, processing and data types) followed by fixed-width binary records.
+The record block is memory-mapped through a NumPy structured dtype built
+from the data type line, so no text parsing of the data takes place.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+TOB1_PREFIX = "TOB1"
+HEADER_LINES = 5
+
+# Campbell data loggers count seconds from 1990-01-01 00:00:00
+CAMPBELL_EPOCH = pd.Timestamp("1990-01-01")
+
+# Campbell TOB1 data types and their binary layout. LONG/ULONG/IEEE4 are
+# written in the logger's native (little-endian) order; FP2, INT/UINT and
+# NSec are big-endian "final storage" types.
+TOB1_TYPES = {
+    "IEEE4": "<f4",
+    "IEEE4L": "<f4",
+    "IEEE4B": ">f4",
+    "IEEE8": "<f8",
+    "IEEE8L": "<f8",
+    "IEEE8B": ">f8",
+    "FP2": ">u2",
+    "LONG": "<i4",
+    "ULONG": "<u4",
+    "SHORT": "<i2",
+    "USHORT": "<u2",
+    "INT2": ">i2",
+    "UINT2": ">u2",
+    "INT4": ">i4",
+    "UINT4": ">u4",
+    "BOOL": "u1",
+    "BOOL2": "<u2",
+    "BOOL4": "<u4",
+    "SECNANO": [("s", "<i4"), ("ns", "<i4")],
+    "NSEC": [("s", ">i4"), ("ns", ">i4")],
+}
+
+_ASCII_RE = re.compile(r"^ASCII\((?P<size>\d+)\)$", re.IGNORECASE)
+_BOOL_TYPES = ("BOOL", "BOOL2", "BOOL4")
+_TIME_TYPES = ("SECNANO", "NSEC")
+
+
+@dataclass
+class TOB1Header:
+    """
+    Parsed TOB1 header.
+
+    Attributes
+    ----------
+    environment : list of str
+        The station/logger/program line.
+    names, units, processing, types : list of str
+        One entry per field.
+    data_offset : int
+        Byte offset of the first record.
+    """
+
+    environment: List[str]
+    names: List[str]
+    units: List[str]
+    processing: List[str]
+    types: List[str]
+    data_offset: int
+
+    @property
+    def dtype(self) -> np.dtype:
+        """Structured dtype of one record."""
+        return tob1_dtype(self.names, self.types)
+
+
+def is_tob1(file: Union[str, Path]) -> bool:
+    """Return True if `file` starts with a TOB1 header."""
+    with Path(file).open("rb") as fp:
+        start = fp.read(len(TOB1_PREFIX) + 1)
+    return start.lstrip(b'"').startswith(TOB1_PREFIX.encode())
+
+
+def read_tob1_header(file: Union[str, Path]) -> TOB1Header:
+    """
+    Parse the five ASCII header lines of a TOB1 file.
+
+    Parameters
+    ----------
+    file : str or Path
+        Path to the TOB1 file.
+
+    Returns
+    -------
+    TOB1Header
+        The parsed header, including the byte offset of the records.
+
+    Raises
+    ------
+    RuntimeError
+        If the file does not start with a TOB1 header.
+    """
+    lines = []
+    with Path(file).open("rb") as fp:
+        for _ in range(HEADER_LINES):
+            raw = fp.readline()
+            lines.append(raw.decode("ascii", errors="replace").strip())
+        offset = fp.tell()
+    fields = [line.replace('"', "").split(",") for line in lines]
+    if fields[0][0] != TOB1_PREFIX:
+        raise RuntimeError(f"Header line not recognized: {fields[0]}")
+    return TOB1Header(*fields, data_offset=offset)
+
+
+def tob1_dtype(names: List[str], types: List[str]) -> np.dtype:
+    """
+    Map TOB1 field names and Campbell data types to a structured dtype.
+
+    Parameters
+    ----------
+    names : list of str
+        Field names from the second header line.
+    types : list of str
+        Data types from the fifth header line, e.g. ``IEEE4`` or
+        ``ASCII(16)``.
+
+    Returns
+    -------
+    np.dtype
+        A packed structured dtype matching one binary record.
+
+    Raises
+    ------
+    ValueError
+        If the lengths differ, a name repeats or a type is unknown.
+    """
+    if len(names) != len(types):
+        raise ValueError(
+            f"TOB1 header has {len(names)} names but {len(types)} data types"
+        )
+    if len(set(names)) != len(names):
+        raise ValueError("TOB1 header contains duplicate field names")
+    fields = []
+    for name, tob_type in zip(names, types):
+        match = _ASCII_RE.match(tob_type)
+        if match:
+            fields.append((name, f"S{match.group('size')}"))
+            continue
+        try:
+            fields.append((name, TOB1_TYPES[tob_type.upper()]))
+        except KeyError:
+            raise ValueError(f"Unsupported TOB1 data type {tob_type!r} for {name}")
+    return np.dtype(fields)
+
+
+def decode_fp2(raw: np.ndarray) -> np.ndarray:
+    """
+    Decode Campbell FP2 two-byte floats.
+
+    Bit 15 is the sign, bits 13-14 the number of decimal places and bits
+    0-12 the mantissa. A mantissa of 8191 with no decimals is +/-inf and
+    8190 is NaN.
+
+    Parameters
+    ----------
+    raw : np.ndarray
+        Unsigned 16-bit integers in native byte order.
+
+    Returns
+    -------
+    np.ndarray
+        The decoded values as float32.
+    """
+    raw = raw.astype(np.uint16)
+    sign = np.where(raw & 0x8000, -1.0, 1.0)
+    exponent = (raw >> 13) & 0x3
+    mantissa = (raw & 0x1FFF).astype(np.float64)
+    values = sign * mantissa / np.power(10.0, exponent)
+    special = exponent == 0
+    values = np.where(special & (mantissa == 8191), sign * np.inf, values)
+    values = np.where(special & (mantissa == 8190), np.nan, values)
+    return values.astype(np.float32)
+
+
+def read_tob1(
+    file: Union[str, Path],
+    timestamp: bool = True,
+    memmap: bool = True,
+) -> pd.DataFrame:
+    """
+    Read a TOB1 binary file into a DataFrame.
+
+    Parameters
+    ----------
+    file : str or Path
+        Path to the TOB1 file.
+    timestamp : bool, optional
+        If True and the table has ``SECONDS``/``NANOSECONDS`` fields, replace
+        them with a leading ``TIMESTAMP`` column as in TOA5 output.
+        Defaults to True.
+    memmap : bool, optional
+        If True, memory-map the record block instead of reading it into
+        memory first. Defaults to True.
+
+    Returns
+    -------
+    pd.DataFrame
+        One column per field. FP2 fields are decoded to float32, ASCII fields
+        to str, SecNano/NSec fields to datetimes and BOOL fields to bool.
+
+    Raises
+    ------
+    ValueError
+        If the record block is not a whole number of records.
+    """
+    file = Path(file)
+    header = read_tob1_header(file)
+    dtype = header.dtype
+    n_records = tob1_record_count(file, header)
+
+    if n_records == 0:
+        records = np.zeros(0, dtype=dtype)
+    elif memmap:
+        records = np.memmap(
+            file, dtype=dtype, mode="r", offset=header.data_offset, shape=(n_records,)
+        )
+    else:
+        records = np.fromfile(file, dtype=dtype, offset=header.data_offset)
+
+    return _records_frame(records, header, timestamp)
+
+
+def iter_tob1(
+    file: Union[str, Path],
+    chunksize: int = 100_000,
+    timestamp: bool = True,
+    start: int = 0,
+    stop: Optional[int] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Read a TOB1 file as a sequence of DataFrames of at most `chunksize` records.
+
+    The record block is memory-mapped, so only one chunk is decoded at a
+    time and memory use does not grow with the file size.
+
+    Parameters
+    ----------
+    file : str or Path
+        Path to the TOB1 file.
+    chunksize : int, optional
+        Maximum number of records per chunk. Defaults to 100,000.
+    timestamp : bool, optional
+        As in `read_tob1`. Defaults to True.
+    start, stop : int, optional
+        Range of record numbers to read, e.g. to split a file between
+        workers. Defaults to the whole file.
+
+    Yields
+    ------
+    pd.DataFrame
+        Decoded records, as `read_tob1` would return them.
+    """
+    file = Path(file)
+    header = read_tob1_header(file)
+    n_records = tob1_record_count(file, header)
+    stop = n_records if stop is None else min(stop, n_records)
+    if start >= stop:
+        return
+    records = np.memmap(
+        file,
+        dtype=header.dtype,
+        mode="r",
+        offset=header.data_offset,
+        shape=(n_records,),
+    )
+    for lo in range(start, stop, chunksize):
+        yield _records_frame(records[lo : min(lo + chunksize, stop)], header, timestamp)
+
+
+def tob1_record_count(file: Union[str, Path], header: TOB1Header) -> int:
+    """
+    Number of whole records in a TOB1 file.
+
+    Raises
+    ------
+    ValueError
+        If the record block is not a whole number of records.
+    """
+    itemsize = header.dtype.itemsize
+    n_bytes = Path(file).stat().st_size - header.data_offset
+    n_records, remainder = divmod(n_bytes, itemsize)
+    if remainder:
+        raise ValueError(
+            f"{file} holds {n_bytes} data bytes, not a multiple of the "
+            f"{itemsize}-byte record"
+        )
+    return n_records
+
+
+def _records_frame(
+    records: np.ndarray, header: TOB1Header, timestamp: bool
+) -> pd.DataFrame:
+    """Decode structured TOB1 records into a DataFrame."""
+    columns = {}
+    for name, tob_type in zip(header.names, header.types):
+        kind = tob_type.upper()
+        field = records[name]
+        if kind == "FP2":
+            columns[name] = decode_fp2(field)
+        elif kind in _TIME_TYPES:
+            columns[name] = _campbell_time(field["s"], field["ns"])
+        elif _ASCII_RE.match(tob_type):
+            # strings are NUL-terminated; bytes after the NUL are stale
+            columns[name] = [
+                raw.split(b"\x00", 1)[0].decode("ascii", errors="replace")
+                for raw in field.tolist()
+            ]
+        elif kind in _BOOL_TYPES:
+            columns[name] = np.asarray(field) != 0
+        else:
+            columns[name] = field.astype(field.dtype.newbyteorder("="))
+    df = pd.DataFrame(columns, columns=header.names)
+
+    if timestamp and {"SECONDS", "NANOSECONDS"} <= set(df.columns):
+        stamps = _campbell_time(df.pop("SECONDS"), df.pop("NANOSECONDS"))
+        df.insert(0, "TIMESTAMP", stamps)
+    return df
+
+
+def _campbell_time(seconds, nanoseconds) -> pd.DatetimeIndex:
+    """Convert Campbell epoch seconds and nanoseconds to datetimes."""
+    seconds = np.asarray(seconds, dtype=np.int64)
+    nanoseconds = np.asarray(nanoseconds, dtype=np.int64)
+    return CAMPBELL_EPOCH + pd.to_timedelta(
+        seconds * 1_000_000_000 + nanoseconds, unit="ns"
+    )
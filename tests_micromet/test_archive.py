@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from micromet.format.archive import StationArchive, open_archive
+
+
+def _toa5(rows):
+    header = """"TOA5","CR6","CR6","1056","CR6.Std.09.02","CPU:MicroMet.CR6","50525","Flux_AmeriFluxFormat"
+"TIMESTAMP","RECORD","TA","NOTE"
+"TS","RN","deg C",""
+"","","Avg","Smp"
+"""
+    body = "".join(f'"{ts}",{i},{ta},"{note}"\n' for i, (ts, ta, note) in enumerate(rows))
+    return header + body
+
+
+@pytest.fixture
+def raw_dir(tmp_path):
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    (raw / "21314_Flux_AmeriFluxFormat_1.dat").write_text(
+        _toa5([
+            ("2023-12-31 23:30:00", 1.0, "a"),
+            ("2024-01-01 00:00:00", 2.0, "b"),
+            ("2024-01-01 00:30:00", -9999, "c"),
+        ])
+    )
+    return raw
+
+
+def test_ingest_and_open(tmp_path, raw_dir):
+    archive = StationArchive(tmp_path / "archive")
+    assert archive.ingest_directory("US-UTD", raw_dir) == 1
+    assert archive.years("US-UTD") == [2023, 2024]
+
+    df = archive.open("US-UTD")
+    assert df.index.name == "TIMESTAMP"
+    assert df["TA"].iloc[:2].tolist() == [1.0, 2.0]
+    assert np.isnan(df["TA"].iloc[2])
+    assert df["NOTE"].tolist() == ["a", "b", "c"]
+
+    sliced = open_archive(
+        tmp_path / "archive", "US-UTD", start="2024-01-01", end="2024-01-01 00:00", columns=["TA"]
+    )
+    assert list(sliced.columns) == ["TA"]
+    assert sliced.index.tolist() == [pd.Timestamp("2024-01-01 00:00")]
+
+
+def test_ingest_is_incremental(tmp_path, raw_dir):
+    archive = StationArchive(tmp_path / "archive")
+    archive.ingest_directory("US-UTD", raw_dir)
+    assert archive.ingest_directory("US-UTD", raw_dir) == 0
+
+    # identical content under a new name is not merged again
+    copy = raw_dir / "21314_Flux_AmeriFluxFormat_copy.dat"
+    copy.write_bytes((raw_dir / "21314_Flux_AmeriFluxFormat_1.dat").read_bytes())
+    assert archive.pending_files("US-UTD", [copy]) == []
+
+    (raw_dir / "21314_Flux_AmeriFluxFormat_2.dat").write_text(
+        _toa5([
+            ("2024-01-01 00:30:00", 5.0, "new"),
+            ("2024-01-01 01:00:00", 6.0, "d"),
+        ])
+    )
+    assert archive.ingest_directory("US-UTD", raw_dir) == 1
+    df = archive.open("US-UTD", start="2024-01-01")
+    assert df["TA"].tolist() == [2.0, 5.0, 6.0]
+    sources = archive.load_manifest("US-UTD")["sources"]
+    assert len(sources) == 3
+    assert sources[str(copy.resolve())]["duplicate_of"] == str(
+        (raw_dir / "21314_Flux_AmeriFluxFormat_1.dat").resolve()
+    )
+
+
+def test_duplicates_are_not_rehashed(tmp_path, raw_dir, monkeypatch):
+    from micromet.format import archive as archive_module
+
+    archive = StationArchive(tmp_path / "archive")
+    archive.ingest_directory("US-UTD", raw_dir)
+    copy = raw_dir / "21314_Flux_AmeriFluxFormat_copy.dat"
+    copy.write_bytes((raw_dir / "21314_Flux_AmeriFluxFormat_1.dat").read_bytes())
+    assert archive.ingest_directory("US-UTD", raw_dir) == 0
+
+    hashed = []
+    digest = archive_module.file_digest
+    monkeypatch.setattr(
+        archive_module, "file_digest", lambda path: hashed.append(path) or digest(path)
+    )
+    assert archive.ingest_directory("US-UTD", raw_dir) == 0
+    assert hashed == []
+
+
+def test_fill_uses_dtypes_of_all_partitions(tmp_path, raw_dir):
+    archive = StationArchive(tmp_path / "archive")
+    archive.ingest_directory("US-UTD", raw_dir)
+    numbers = raw_dir / "21314_Flux_AmeriFluxFormat_2.dat"
+    numbers.write_text(
+        _toa5([("2025-06-01 00:00:00", 7.0, "x")]).replace('"TA"', '"FLAG"')
+    )
+    archive.ingest("US-UTD", [numbers])
+    text = raw_dir / "21314_Flux_AmeriFluxFormat_3.dat"
+    text.write_text(
+        _toa5([("2026-06-01 00:00:00", "ok", "y")]).replace('"TA"', '"FLAG"')
+    )
+    archive.ingest("US-UTD", [text])
+
+    entry = archive.load_manifest("US-UTD")["columns"]["FLAG"]
+    assert entry["dtypes"]["2025"] == "<f8"
+    assert entry["dtypes"]["2026"].startswith("<U")
+    df = archive.open("US-UTD", end="2024-12-31")
+    # absent before 2025; neither the 2026 strings nor the 2025 floats fit
+    assert df["FLAG"].isna().all()
+
+
+def test_open_unknown_column(tmp_path, raw_dir):
+    archive = StationArchive(tmp_path / "archive")
+    archive.ingest_directory("US-UTD", raw_dir)
+    with pytest.raises(KeyError):
+        archive.open("US-UTD", columns=["NOPE"])
+    assert archive.open("US-UTM").empty
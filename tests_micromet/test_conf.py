@@ -93,7 +93,7 @@ def fake_config():
 
 @pytest.fixture
 def response_json(monkeypatch):
-    """Force requests.get(...).json() to return a fixed clock time."""
+    """Force logger GET requests to return a fixed clock time."""
 
     class FakeResponse:
         status_code = 200
@@ -105,7 +105,7 @@ def response_json(monkeypatch):
         def json(self):
             return self._j
 
-    monkeypatch.setattr("requests.get", lambda *a, **k: FakeResponse())
+    monkeypatch.setattr("requests.Session.get", lambda *a, **k: FakeResponse())
 
 
 
@@ -4,6 +4,7 @@ import numpy as np
 from micromet.qaqc.data_cleaning import (
     set_range_to_nan,
     find_optimal_shift,
+    lagged_correlation,
     apply_lag_shift,
     mask_wind_direction,
     mask_by_rolling_window_combined,
@@ -34,6 +35,21 @@ class TestDataCleaning(unittest.TestCase):
         best_lag, corr = find_optimal_shift(df1, df2, 'val', 'val', min_lag_units=10, max_lag_units=100)
         self.assertEqual(abs(best_lag), 50)
 
+    def test_lagged_correlation_matches_pandas(self):
+        rng = np.random.default_rng(0)
+        s1 = pd.Series(rng.normal(size=300).cumsum() + 500.0)
+        s2 = pd.Series(np.roll(s1.to_numpy(), -7) + rng.normal(size=300))
+        s1[rng.random(300) < 0.3] = np.nan
+        s2[100:160] = np.nan
+        lags = np.arange(-40, 41)
+        expected = [s1.corr(s2.shift(lag)) for lag in lags]
+        curve = lagged_correlation(s1, s2, lags)
+        np.testing.assert_allclose(curve.to_numpy(), expected, rtol=1e-9)
+        self.assertEqual(curve.idxmax(), 7)
+        # constant overlap and no overlap give NaN, as in pandas
+        self.assertTrue(lagged_correlation(s1, pd.Series(2.0, index=s1.index), [0, 5]).isna().all())
+        self.assertTrue(np.isnan(lagged_correlation(s1, s2, [400])[400]))
+
     def test_apply_lag_shift(self):
         times = pd.date_range('2024-01-01', periods=10, freq='D')
         df = pd.DataFrame({'val': range(10)}, index=times)
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from micromet.report import easyflux_footprint as ef
+
+FETCH_COLUMNS = [
+    "FETCH_MAX_new",
+    "FETCH_90_new",
+    "FETCH_55_new",
+    "FETCH_40_new",
+    "FP_DIST_INTRST_new",
+]
+
+
+def _periods(n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(
+        {
+            "USTAR_1_1_1": rng.uniform(0.02, 1.2, n),
+            "W_SIGMA_1_1_1": rng.uniform(0.05, 1.5, n),
+            "ZL_1_1_1": np.concatenate(
+                [rng.uniform(-3, 3, n // 2), rng.uniform(-300, 10, n - n // 2)]
+            ),
+            "MO_LENGTH_1_1_1": rng.uniform(-2000, 2000, n),
+            "WS_1_1_1": rng.uniform(0.2, 10, n),
+            "WD_1_1_1": rng.uniform(0, 360, n),
+        }
+    )
+    for col in df:
+        df.loc[rng.random(n) < 0.03, col] = np.nan
+    return df
+
+
+@pytest.mark.parametrize("z, dist", [(1.64, 500.0), (1.64, 8.0), (0.8, 40.0)])
+def test_array_engine_matches_scalar(z, dist):
+    df = _periods()
+    cfg = ef.SiteConfig(z=z, z0=0.05, sonic_azimuth=210.0)
+    cfg.set_uniform_dist(dist)
+    with np.errstate(all="ignore"):
+        fast = ef.recalculate_fetch(df, cfg, engine="array")
+        slow = ef.recalculate_fetch(df, cfg, engine="scalar")
+    for col in FETCH_COLUMNS:
+        np.testing.assert_allclose(
+            fast[col].to_numpy(float), slow[col].to_numpy(float), rtol=1e-9, atol=1e-9
+        )
+    assert fast["FP_EQUATION_new"].tolist() == slow["FP_EQUATION_new"].tolist()
+    expected = {"", "KormannMeixner"} | ({"Kljun et al"} if z >= 1.0 else set())
+    assert set(fast["FP_EQUATION_new"]) == expected
+
+
+def test_kljun_array_matches_scalar_function():
+    ustar = np.array([0.3, 0.5, 0.9])
+    sigma_w = np.array([0.4, 0.6, 1.1])
+    obukhov = np.array([-50.0, 300.0, 2000.0])
+    res = ef.footprint_kljun_array(ustar, sigma_w, 2.0, obukhov, 0.05, 150.0)
+    for i in range(3):
+        scalar = ef.footprint_kljun(ustar[i], sigma_w[i], 2.0, obukhov[i], 0.05, 150.0)
+        assert res["fetch_90"][i] == pytest.approx(scalar.fetch_90, rel=1e-9)
+        assert res["fp_dist_intrst"][i] == pytest.approx(scalar.fp_dist_intrst, rel=1e-9)
+
+
+def test_recalculate_fetch_rejects_unknown_engine():
+    with pytest.raises(ValueError):
+        ef.recalculate_fetch(_periods(5), ef.SiteConfig(), engine="numba")
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"block_size": 64},
+        {"block_size": 50, "workers": 3, "executor": "thread"},
+        {"freq": "D", "workers": 2, "executor": "process"},
+    ],
+)
+def test_chunked_recalculation_matches_full(kwargs):
+    df = _periods(300)
+    df.index = pd.date_range("2024-01-01", periods=len(df), freq="30min")
+    cfg = ef.SiteConfig(z=1.64)
+    full = ef.recalculate_fetch(df, cfg)
+    blocks = list(ef.iter_recalculate_fetch(df, cfg, **kwargs))
+    assert len(blocks) > 1
+    pd.testing.assert_frame_equal(pd.concat(blocks), full)
+
+
+def test_recalculate_fetch_to_csv(tmp_path):
+    df = _periods(120)
+    path = tmp_path / "fetch.csv"
+    assert ef.recalculate_fetch_to_csv(df, ef.SiteConfig(), path, block_size=25) == 120
+    written = pd.read_csv(path, index_col=0)
+    full = ef.recalculate_fetch(df, ef.SiteConfig())
+    np.testing.assert_allclose(
+        written["FETCH_90_new"].to_numpy(float), full["FETCH_90_new"].to_numpy(float)
+    )
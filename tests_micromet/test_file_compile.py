@@ -2,7 +2,8 @@ import os
 import time
 from pathlib import Path
 import pytest
-from micromet.format.file_compile import compile_files, _gather_files, _to_fileinfo, _group_by_filename, _unique_by_ctime_size, _all_differ_in_both_ctime_and_size, FileInfo
+from micromet.format import file_compile
+from micromet.format.file_compile import compile_files, default_index_path, _group_by_filename, _unique_by_ctime_size, _all_differ_in_both_ctime_and_size, FileInfo, FileIndex, HASH_BLOCK
 
 @pytest.fixture
 def temp_dir_structure(tmp_path):
@@ -28,25 +29,32 @@ def temp_dir_structure(tmp_path):
 
     return source_dir
 
-def test_gather_files(temp_dir_structure):
-    """Test the _gather_files function."""
-    # case_sensitive=True should not match UPPERCASE.txt if we search for 'file'
-    files = _gather_files(temp_dir_structure, "file", case_sensitive=True)
-    assert len(files) == 5
-    filenames = {p.name for p in files}
-    assert "file1.txt" in filenames
-    assert "file2.txt" in filenames
-    assert "file3.txt" in filenames
-    assert "UPPERCASE.txt" not in filenames
-
-    # case_sensitive=False should match UPPERCASE.txt if we search for 'uppercase'
-    files_case_insensitive = _gather_files(temp_dir_structure, "uppercase", case_sensitive=False)
-    assert len(files_case_insensitive) == 1
-    assert "UPPERCASE.txt" in {p.name for p in files_case_insensitive}
-
-    # Test with .txt
-    files_txt = _gather_files(temp_dir_structure, ".txt", case_sensitive=True)
-    assert len(files_txt) == 6
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """Keep the default sidecar index out of the real user cache."""
+    cache = tmp_path / "cache"
+    monkeypatch.setenv("XDG_CACHE_HOME", str(cache))
+    return cache
+
+def test_compile_files_case_sensitivity(temp_dir_structure, tmp_path):
+    """Names are matched as a regex, case-insensitively unless asked."""
+    strict = tmp_path / "strict"
+    compile_files(temp_dir_structure, strict, "uppercase", case_sensitive=True)
+    assert list(strict.iterdir()) == []
+
+    loose = tmp_path / "loose"
+    compile_files(temp_dir_structure, loose, "uppercase", case_sensitive=False)
+    assert [p.name for p in loose.iterdir()] == ["UPPERCASE.txt"]
+
+def test_default_index_outside_outdir(temp_dir_structure, tmp_path, cache_dir):
+    """The default index goes to the user cache, not the output directory."""
+    outdir = tmp_path / "output"
+    compile_files(temp_dir_structure, outdir, "file2")
+
+    assert [p.name for p in outdir.iterdir()] == ["file2.txt"]
+    index_path = default_index_path(temp_dir_structure)
+    assert index_path.exists()
+    assert cache_dir in index_path.parents
 
 def test_compile_files_basic(temp_dir_structure, tmp_path):
     """Test basic file compilation."""
@@ -54,6 +62,20 @@ def test_compile_files_basic(temp_dir_structure, tmp_path):
     compile_files(temp_dir_structure, outdir, ".txt", case_sensitive=False)
 
     assert outdir.exists()
+    # the two file1.txt differ in content, so both are kept
+    assert (outdir / "file1_1.txt").read_text() == "content1"
+    assert (outdir / "file1_2.txt").read_text() == "content1_dup"
+    assert (outdir / "file2.txt").exists()
+    assert (outdir / "UPPERCASE.txt").exists()
+
+
+def test_compile_files_ctime_size_mode(temp_dir_structure, tmp_path):
+    """Test the (creation time, size) deduplication mode."""
+    outdir = tmp_path / "output"
+    compile_files(
+        temp_dir_structure, outdir, ".txt", case_sensitive=False, dedupe="ctime_size"
+    )
+
     assert (outdir / "file1.txt").exists()
     assert (outdir / "file2.txt").exists()
     assert (outdir / "UPPERCASE.txt").exists()
@@ -90,3 +112,56 @@ def test_all_differ_in_both_ctime_and_size():
         FileInfo(Path("b"), size=200, create_ts=now + 1, mtime_ts=now + 1),
     ]
     assert _all_differ_in_both_ctime_and_size(items3)
+
+
+def test_compile_files_dedupes_by_content(tmp_path):
+    """Identical content is copied once even when timestamps differ."""
+    source = tmp_path / "source"
+    for sub in ("a", "b", "c"):
+        (source / sub).mkdir(parents=True)
+    (source / "a" / "card.dat").write_text("same")
+    time.sleep(0.05)
+    (source / "b" / "card.dat").write_text("same")
+    (source / "c" / "card.dat").write_text("diff")
+    outdir = tmp_path / "output"
+
+    compile_files(source, outdir, "card", link=True)
+
+    out = sorted(p.name for p in outdir.iterdir() if not p.name.startswith("."))
+    assert out == ["card_1.dat", "card_2.dat"]
+    assert (outdir / "card_1.dat").read_text() == "same"
+    assert os.path.samefile(outdir / "card_1.dat", source / "a" / "card.dat")
+
+
+def test_content_keys_use_full_hash_for_large_files(tmp_path):
+    """Large files that only differ in the middle are told apart."""
+    head, tail = b"h" * HASH_BLOCK, b"t" * HASH_BLOCK
+    for sub, middle in (("a", b"1"), ("b", b"2"), ("c", b"1")):
+        (tmp_path / sub).mkdir()
+        (tmp_path / sub / "big.bin").write_bytes(head + middle * 10 + tail)
+    index = FileIndex()
+    infos = index.scan(tmp_path)
+    keys = file_compile._content_keys(_group_by_filename(infos), index)
+
+    by_dir = {fi.path.parent.name: keys[fi.path] for fi in infos}
+    assert by_dir["a"] == by_dir["c"] != by_dir["b"]
+    assert len(by_dir["a"]) == 3
+
+
+def test_file_index_rescans_only_changed_dirs(temp_dir_structure, tmp_path, monkeypatch):
+    """A rerun only lists directories whose mtime changed."""
+    index_path = tmp_path / "index.json"
+    index = FileIndex(index_path)
+    assert len(index.scan(temp_dir_structure)) == 6
+    index.save()
+
+    (temp_dir_structure / "subdir2" / "file4.txt").write_text("new")
+    listed = []
+    real_scandir = os.scandir
+    monkeypatch.setattr(
+        file_compile.os, "scandir", lambda d: listed.append(d) or real_scandir(d)
+    )
+    infos = FileIndex(index_path).scan(temp_dir_structure)
+
+    assert listed == [str(temp_dir_structure / "subdir2")]
+    assert len(infos) == 7
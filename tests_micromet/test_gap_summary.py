@@ -1,7 +1,11 @@
 import unittest
 import pandas as pd
 import numpy as np
-from micromet.report.gap_summary import summarize_gaps, compare_gap_summaries
+from micromet.report.gap_summary import (
+    summarize_gaps,
+    compare_gap_summaries,
+    compare_gap_summaries_multi,
+)
 
 class TestGapSummary(unittest.TestCase):
     def setUp(self):
@@ -20,6 +24,27 @@ class TestGapSummary(unittest.TestCase):
         self.assertEqual(len(gaps), 1)
         self.assertEqual(gaps.iloc[0]['N_STEPS_MISSING'], 1)
 
+    def test_summarize_gaps_kinds(self):
+        times = pd.date_range('2024-01-01', periods=12, freq='30min')
+        keep = np.ones(12, dtype=bool)
+        keep[[4, 5, 8]] = False  # timestamps absent from the record
+        idx = pd.MultiIndex.from_product([['STN1'], times[keep]], names=['STATIONID', 'DATETIME_END'])
+        df = pd.DataFrame({'VAR1': 1.0, 'VAR2': 2.0}, index=idx)
+        df.loc[('STN1', times[1]), 'VAR1'] = np.nan
+        df.loc[('STN1', times[7]), 'VAR1'] = np.nan
+        df.loc[('STN1', times[11]), 'VAR2'] = np.nan
+
+        gaps = summarize_gaps(df, expected_freq='30min')
+        self.assertEqual(list(gaps['COLUMN']), ['VAR1', 'VAR1', 'VAR1', 'VAR2', 'VAR2', 'VAR2'])
+        self.assertEqual(
+            list(gaps['GAP_KIND']),
+            ['NaN', 'MissingTimestamp', 'Mixed', 'MissingTimestamp', 'MissingTimestamp', 'NaN'],
+        )
+        self.assertEqual(list(gaps['N_STEPS_MISSING']), [1, 2, 2, 2, 1, 1])
+        self.assertEqual(gaps.iloc[2]['GAP_START'], times[7])
+        self.assertEqual(gaps.iloc[2]['GAP_END'], times[8])
+        self.assertEqual(gaps.iloc[2]['HOURS_MISSING'], 1.0)
+
     def test_compare_gap_summaries(self):
         # Dataset A has a gap at index 2
         gaps_a = summarize_gaps(self.df, expected_freq='30min')
@@ -37,5 +62,41 @@ class TestGapSummary(unittest.TestCase):
         fill_b_to_a = comparison[comparison['TARGET_DATASET'] == 'A']
         self.assertFalse(fill_b_to_a.empty)
 
+    def test_compare_gap_summaries_multi(self):
+        times = pd.date_range('2024-01-01', periods=10, freq='30min')
+
+        def gaps(spans):
+            return pd.DataFrame({
+                'STATIONID': 'STN1',
+                'COLUMN': 'VAR1',
+                'GAP_START': [times[s] for s, _ in spans],
+                'GAP_END': [times[e] for _, e in spans],
+                'N_STEPS_MISSING': [e - s + 1 for s, e in spans],
+                'GAP_KIND': 'NaN',
+            })
+
+        eddy = gaps([(2, 7)])
+        met = gaps([(4, 5)])
+        met2 = gaps([(1, 3), (6, 9)])
+        out = compare_gap_summaries_multi(
+            {'eddy': eddy, 'met': met, 'met2': met2}, expected_freq='30min'
+        )
+
+        into_eddy = out[out['TARGET_DATASET'] == 'eddy']
+        from_met = into_eddy[into_eddy['SOURCE_DATASET'] == 'met']
+        self.assertEqual(
+            list(zip(from_met['FILLABLE_START'], from_met['FILLABLE_END'])),
+            [(times[2], times[3]), (times[6], times[7])],
+        )
+        from_met2 = into_eddy[into_eddy['SOURCE_DATASET'] == 'met2']
+        self.assertEqual(list(from_met2['N_STEPS_FILLABLE']), [2])
+        self.assertEqual(from_met2.iloc[0]['FILLABLE_START'], times[4])
+        self.assertAlmostEqual(from_met2.iloc[0]['COVERAGE_RATIO'], 2 / 6)
+        # met's gap at 4-5 lies inside eddy's gap but between met2's gaps
+        into_met = out[out['TARGET_DATASET'] == 'met']
+        self.assertEqual(list(into_met['SOURCE_DATASET']), ['met2'])
+        self.assertEqual(set(out['TARGET_DATASET']), {'eddy', 'met', 'met2'})
+
+
 if __name__ == '__main__':
     unittest.main()
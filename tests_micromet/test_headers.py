@@ -0,0 +1,89 @@
+import os
+
+import pytest
+
+from micromet.format import headers
+from micromet.format.headers import (
+    HeaderIndex,
+    count_columns,
+    detect_delimiter_and_header,
+    file_signature,
+    find_header_donor,
+    get_first_line_raw,
+    scan,
+)
+
+HEADER = "TIMESTAMP_START,TIMESTAMP_END,FC,LE\n"
+ROWS = "".join(f"2024010{i}0000,2024010{i}0030,{i}.5,{i * 10}.25\n" for i in range(1, 8))
+
+
+def _write(path, text, mtime):
+    path.write_text(text)
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+@pytest.fixture
+def card_dir(tmp_path):
+    """A directory of AmeriFlux dumps where only some files have a header."""
+    _write(tmp_path / "US-UTD_AmeriFluxFormat_1.dat", HEADER + ROWS, 1_000)
+    _write(tmp_path / "US-UTD_AmeriFluxFormat_5.dat", HEADER + ROWS, 5_000)
+    _write(tmp_path / "US-UTD_AmeriFluxFormat_2.dat", ROWS, 2_000)
+    _write(tmp_path / "US-UTD_AmeriFluxFormat_3.dat", ROWS, 4_000)
+    _write(tmp_path / "other.dat", "A,B\n1,2\n", 2_000)
+    return tmp_path
+
+
+def test_file_signature_matches_detectors(card_dir):
+    for path in card_dir.iterdir():
+        for sample_size in (16, 64_000):
+            sig = file_signature(path, sample_size=sample_size)
+            delim, has_hdr = detect_delimiter_and_header(path, sample_size=sample_size)
+            assert sig.delimiter == delim
+            assert sig.has_header == has_hdr
+            assert sig.columns == count_columns(path, delim)
+            assert sig.first_line == get_first_line_raw(path)
+
+
+def test_find_header_donor_uses_index(card_dir, monkeypatch):
+    index = HeaderIndex()
+    index.signatures(card_dir)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("donor files should not be read again")
+
+    monkeypatch.setattr(headers, "file_signature", fail)
+    target = card_dir / "US-UTD_AmeriFluxFormat_3.dat"
+    donor = find_header_donor(target, ",", 4, index=index)
+    # closest modification time wins over the better name match
+    assert donor == (card_dir / "US-UTD_AmeriFluxFormat_5.dat", HEADER.strip())
+    assert find_header_donor(target, ",", 5, index=index) is None
+    assert find_header_donor(target, ";", 4, index=index) is None
+
+
+def test_header_index_refresh(card_dir):
+    index = HeaderIndex()
+    assert len(index.donors(card_dir, ",", 4)) == 2
+    _write(card_dir / "US-UTD_AmeriFluxFormat_9.dat", HEADER + ROWS, 9_000)
+    assert len(index.donors(card_dir, ",", 4)) == 3
+
+    frozen = HeaderIndex(refresh=False)
+    frozen.signatures(card_dir)
+    _write(card_dir / "US-UTD_AmeriFluxFormat_8.dat", HEADER + ROWS, 8_000)
+    assert len(frozen.donors(card_dir, ",", 4)) == 3
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_scan_repairs_tree(card_dir, workers):
+    nested = card_dir / "nested"
+    nested.mkdir()
+    _write(nested / "US-UTD_AmeriFluxFormat_7.dat", HEADER + ROWS, 7_000)
+    _write(nested / "US-UTD_AmeriFluxFormat_6.dat", ROWS, 6_000)
+
+    scan(card_dir, min_sim=0.5, backup=True, workers=workers)
+
+    for name in ("US-UTD_AmeriFluxFormat_2.dat", "US-UTD_AmeriFluxFormat_3.dat"):
+        assert (card_dir / name).read_text() == HEADER + ROWS
+        assert (card_dir / (name + ".bak")).read_text() == ROWS
+    assert (nested / "US-UTD_AmeriFluxFormat_6.dat").read_text() == HEADER + ROWS
+    assert (card_dir / "other.dat").read_text() == "A,B\n1,2\n"
@@ -0,0 +1,289 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from micromet import tob1
+from micromet.highfreq import (
+    HighFreqConfig,
+    Moments,
+    StreamingMoments,
+    compute_fluxes,
+    double_rotation,
+    find_lag,
+    iter_high_freq,
+    lagged_covariance,
+    lagged_covariance_direct,
+    period_moments,
+    read_high_freq,
+    reshape_periods,
+    split_high_freq,
+    stream_fluxes,
+    stream_statistics,
+)
+
+EXAMPLE = Path(__file__).resolve().parents[1] / "out_data" / "Example_High_Freq.csv"
+
+
+@pytest.fixture(scope="module")
+def raw():
+    """Half an hour of 10 Hz EasyFlux samples."""
+    return read_high_freq(EXAMPLE)
+
+
+def _synthetic(n_periods, spp, seed=0):
+    rng = np.random.default_rng(seed)
+    n = n_periods * spp
+    w = rng.normal(0.1, 0.3, n)
+    return pd.DataFrame(
+        {
+            "Ux": rng.normal(2.0, 0.5, n) + 0.3 * w,
+            "Uy": rng.normal(-1.0, 0.4, n),
+            "Uz": w,
+            "T_SONIC": 20.0 + 0.5 * w + rng.normal(0, 0.2, n),
+            "CO2": 650.0 - 3.0 * w + rng.normal(0, 1.0, n),
+            "H2O": 8.0 + 0.2 * w + rng.normal(0, 0.1, n),
+        }
+    )
+
+
+def _rotated_period(frame):
+    """Double-rotate one period sample by sample, the direct way."""
+    u, v, w = (frame[c].to_numpy() for c in ("Ux", "Uy", "Uz"))
+    yaw = np.arctan2(v.mean(), u.mean())
+    u1 = u * np.cos(yaw) + v * np.sin(yaw)
+    v1 = -u * np.sin(yaw) + v * np.cos(yaw)
+    pitch = np.arctan2(w.mean(), u1.mean())
+    u2 = u1 * np.cos(pitch) + w * np.sin(pitch)
+    w2 = -u1 * np.sin(pitch) + w * np.cos(pitch)
+    return u2, v1, w2
+
+
+def test_fluxes_match_per_period_rotation():
+    config = HighFreqConfig(sample_rate=10.0, averaging_period="1min")
+    df = _synthetic(5, config.samples_per_period)
+    result = compute_fluxes(df, config)
+
+    assert len(result) == 5
+    for i in range(5):
+        frame = df.iloc[i * 600 : (i + 1) * 600]
+        u, v, w = _rotated_period(frame)
+        wp = w - w.mean()
+        ts = frame["T_SONIC"].to_numpy()
+        co2 = frame["CO2"].to_numpy()
+        row = result.iloc[i]
+        assert row["COV_W_TS"] == pytest.approx(np.mean(wp * (ts - ts.mean())))
+        assert row["COV_W_CO2"] == pytest.approx(np.mean(wp * (co2 - co2.mean())))
+        uw = np.mean((u - u.mean()) * wp)
+        vw = np.mean((v - v.mean()) * wp)
+        assert row["USTAR"] == pytest.approx((uw**2 + vw**2) ** 0.25)
+        assert row["W_SIGMA"] == pytest.approx(w.std())
+        assert row["N_SAMPLES"] == 600
+
+
+def test_double_rotation_zeroes_mean_cross_wind(raw):
+    _, arrays = reshape_periods(raw, HighFreqConfig())
+    means, cov, n = period_moments(arrays)
+    means_r, cov_r, _, _ = double_rotation(means, cov)
+
+    assert n.tolist() == [18000]
+    np.testing.assert_allclose(means_r[:, 1:3], 0.0, atol=1e-12)
+    # rotation preserves the wind speed and total variance
+    np.testing.assert_allclose(means_r[:, 0], np.linalg.norm(means[:, :3], axis=1))
+    np.testing.assert_allclose(
+        np.trace(cov_r[:, :3, :3], axis1=1, axis2=2),
+        np.trace(cov[:, :3, :3], axis1=1, axis2=2),
+    )
+
+
+def test_example_file_fluxes(raw):
+    result = compute_fluxes(raw, start=pd.Timestamp("2024-06-01 12:00"))
+
+    assert list(result.index) == [pd.Timestamp("2024-06-01 12:30")]
+    row = result.iloc[0]
+    assert row["TA"] < row["T_SONIC"]
+    assert np.sign(row["H"]) == np.sign(row["COV_W_TS"])
+    assert 0 < row["USTAR"] < 1
+    assert row["LE"] > 0
+    assert row["TKE"] == pytest.approx(
+        0.5 * (row["U_SIGMA"] ** 2 + row["V_SIGMA"] ** 2 + row["W_SIGMA"] ** 2)
+    )
+
+
+def test_timestamps_place_samples_and_gaps(raw):
+    config = HighFreqConfig(min_valid_fraction=0.5)
+    index = pd.date_range("2024-06-01 12:00:00.1", periods=len(raw), freq="100ms")
+    timed = raw.set_index(index)
+    expected = compute_fluxes(raw, config)
+
+    # drop the first 10 minutes and add a lone sample in the next period
+    gappy = pd.concat(
+        [timed.iloc[6000:], timed.iloc[:1].set_axis([pd.Timestamp("2024-06-01 13:00")])]
+    )
+    periods, arrays = reshape_periods(gappy, config)
+    assert list(periods) == [
+        pd.Timestamp("2024-06-01 12:30"),
+        pd.Timestamp("2024-06-01 13:00"),
+    ]
+    assert np.isnan(arrays["u"][0, :6000]).all()
+    assert arrays["u"][1, -1] == raw["Ux"].iloc[0]
+
+    result = compute_fluxes(timed, config)
+    pd.testing.assert_frame_equal(
+        result.reset_index(drop=True), expected.reset_index(drop=True)
+    )
+    short = compute_fluxes(gappy, config)
+    assert short["N_SAMPLES"].tolist() == [12000, 1]
+    assert short["H"].notna().tolist() == [True, False]
+
+
+@pytest.fixture
+def timed_csv(raw, tmp_path):
+    """Two hours of the example samples with timestamps and a gap."""
+    df = pd.concat([raw] * 4, ignore_index=True)
+    df.index = pd.date_range(
+        "2024-06-01 00:00:00.1", periods=len(df), freq="100ms", name="TIMESTAMP"
+    )
+    df.iloc[100:400, 2] = np.nan
+    path = tmp_path / "high_freq.csv"
+    df.to_csv(path)
+    return df, path
+
+
+def test_merged_moments_match_direct():
+    rng = np.random.default_rng(1)
+    x = rng.gamma(2.0, 1.5, size=(5000, 3)) + [0.0, 100.0, -50.0]
+    keys = np.arange(len(x)) // 1000
+    _, whole = Moments.from_samples(x, keys)
+
+    # chunks that straddle period boundaries
+    acc = StreamingMoments(["a", "b", "c"], period="1s", sample_rate=1000.0)
+    frame = pd.DataFrame(x, columns=["a", "b", "c"])
+    finished = [
+        acc.update_moments(frame.iloc[part])
+        for part in np.array_split(np.arange(len(x)), 7)
+    ]
+    finished.append(acc.flush_moments())
+    assert np.concatenate([labels for labels, _ in finished]).tolist() == [
+        0,
+        1,
+        2,
+        3,
+        4,
+    ]
+    for name in ("n", "mean", "m2", "m3", "m4"):
+        streamed = np.concatenate([getattr(m, name) for _, m in finished])
+        np.testing.assert_allclose(streamed, getattr(whole, name))
+
+    _, a = Moments.from_samples(x[:300], keys[:300])
+    _, b = Moments.from_samples(x[300:1000], keys[300:1000])
+    merged = a.merge(b)
+    np.testing.assert_allclose(merged.m4, whole.m4[:1])
+    first = x[:1000]
+    np.testing.assert_allclose(whole.covariance[0], np.cov(first.T, ddof=0))
+    d = first - first.mean(axis=0)
+    np.testing.assert_allclose(
+        whole.kurtosis[0], (d**4).mean(axis=0) / d.var(axis=0) ** 2 - 3
+    )
+
+
+def test_streaming_emits_finished_periods(timed_csv):
+    df, path = timed_csv
+    frames = list(stream_statistics(path, ["Uz", "CO2"], chunksize=20000))
+
+    assert [len(f) for f in frames] == [1, 1, 1, 1]
+    stats = pd.concat(frames)
+    valid = df.dropna()
+    grouped = valid.groupby(valid.index.ceil("30min"))
+    np.testing.assert_allclose(stats["N"], grouped.size())
+    np.testing.assert_allclose(stats["CO2_MEAN"], grouped["CO2"].mean())
+    np.testing.assert_allclose(stats["Uz_VAR"], grouped["Uz"].var(ddof=0))
+    np.testing.assert_allclose(
+        stats["COV_Uz_CO2"],
+        grouped.apply(lambda f: np.cov(f["Uz"], f["CO2"], ddof=0)[0, 1]),
+    )
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_stream_fluxes_match_in_memory(timed_csv, workers):
+    df, path = timed_csv
+    expected = compute_fluxes(df)
+    result = pd.concat(list(stream_fluxes(path, chunksize=7000, workers=workers)))
+    pd.testing.assert_frame_equal(result, expected, check_freq=False, rtol=1e-9)
+
+
+def test_stream_tob1_in_parallel(raw, tmp_path):
+    names = ["SECONDS", "NANOSECONDS", "Uz", "CO2"]
+    types = ["ULONG", "ULONG", "IEEE4", "IEEE4"]
+    records = np.zeros(len(raw), dtype=tob1.tob1_dtype(names, types))
+    start = (pd.Timestamp("2024-06-01") - tob1.CAMPBELL_EPOCH).total_seconds()
+    offset_ns = (np.arange(len(raw)) + 1) * 100_000_000
+    records["SECONDS"] = int(start) + offset_ns // 1_000_000_000
+    records["NANOSECONDS"] = offset_ns % 1_000_000_000
+    records["Uz"] = raw["Uz"]
+    records["CO2"] = raw["CO2"]
+    path = tmp_path / "high_freq.dat"
+    with open(path, "wb") as fp:
+        fp.write(b'"TOB1","1","CR6","1","OS","CPU:flux.cr6","1","ts_data"\r\n')
+        for line in (names, [""] * 4, [""] * 4, types):
+            fp.write((",".join(f'"{v}"' for v in line) + "\r\n").encode())
+        fp.write(records.tobytes())
+
+    assert len(split_high_freq(path, 4)) == 4
+    assert sum(len(c) for c in iter_high_freq(path, chunksize=5000)) == len(raw)
+    serial = pd.concat(list(stream_statistics(path, ["Uz", "CO2"], chunksize=5000)))
+    parallel = pd.concat(
+        list(stream_statistics(path, ["Uz", "CO2"], chunksize=5000, workers=4))
+    )
+    pd.testing.assert_frame_equal(parallel, serial, rtol=1e-9)
+    assert serial.index[0] == pd.Timestamp("2024-06-01 00:30")
+    assert serial["Uz_MEAN"].iloc[0] == pytest.approx(raw["Uz"].mean(), rel=1e-6)
+
+
+def test_fft_lagged_covariance_matches_direct(raw):
+    _, arrays = reshape_periods(raw, HighFreqConfig(averaging_period="10min"))
+    w, co2 = arrays["w"], arrays["co2"].copy()
+    co2[0, 100:400] = np.nan
+    co2[1, ::7] = np.nan
+    for max_lag, min_lag in ((60, None), (300, -5), (6000, 0)):
+        lags, fft = lagged_covariance(w, co2, max_lag, min_lag)
+        _, direct = lagged_covariance_direct(w, co2, max_lag, min_lag)
+        assert lags[0] == (-max_lag if min_lag is None else min_lag)
+        np.testing.assert_allclose(fft, direct, rtol=1e-9, atol=1e-12)
+
+
+def test_find_lag_recovers_delay_and_falls_back():
+    rng = np.random.default_rng(3)
+    kernel = np.hanning(15)
+    noise = rng.normal(0, 0.3, (4, 3000))
+    w = np.stack([np.convolve(row, kernel, mode="same") for row in noise])
+    delays = np.array([0, 4, 9, 25])
+    co2 = np.stack([np.roll(w[p], d) for p, d in enumerate(delays)])
+    co2 = -3.0 * co2 + rng.normal(0, 0.2, co2.shape)
+
+    lag, cov = find_lag(w, co2, max_lag=20, default_lag=2)
+    # the 25-sample delay is outside the window and peaks on its edge
+    np.testing.assert_array_equal(lag, [0, 4, 9, 2])
+    _, direct = lagged_covariance_direct(w, co2, 20)
+    np.testing.assert_allclose(cov, direct[np.arange(4), lag + 20])
+    assert (cov[:3] < -0.2).all()
+
+    lag, _ = find_lag(w, co2, max_lag=30, min_lag=0)
+    np.testing.assert_array_equal(lag, delays)
+    lag, cov = find_lag(np.full((1, 50), np.nan), w[:1, :50], 5, default_lag=1)
+    assert lag[0] == 1 and np.isnan(cov[0])
+
+
+def test_compute_fluxes_applies_lag():
+    df = _synthetic(2, 3000)
+    delayed = df.assign(CO2=np.roll(df["CO2"].to_numpy(), 6))
+    config = HighFreqConfig(averaging_period="5min", max_lag=20, min_lag=0)
+    lagged = compute_fluxes(delayed, config)
+    plain = compute_fluxes(df, HighFreqConfig(averaging_period="5min"))
+    assert (lagged["LAG_CO2"] == 6).all()
+    assert "LAG_CO2" not in plain
+    np.testing.assert_allclose(lagged["COV_W_CO2"], plain["COV_W_CO2"], rtol=0.02)
+    assert (lagged["N_SAMPLES"] == 3000 - 6).all()
+    with pytest.raises(ValueError):
+        next(stream_fluxes(EXAMPLE, config))
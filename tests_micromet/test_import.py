@@ -0,0 +1,48 @@
+import subprocess
+import sys
+
+import pytest
+
+import micromet
+
+# Dependencies that only plotting, database or ML code should pull in
+HEAVY_MODULES = (
+    "matplotlib",
+    "plotly",
+    "scipy",
+    "sklearn",
+    "sqlalchemy",
+    "requests",
+    "statsmodels",
+    "windrose",
+)
+
+
+def _loaded_after_import(module):
+    code = (
+        f"import sys, {module}; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return [m for m in result.stdout.strip().split(",") if m]
+
+
+@pytest.mark.parametrize("module", ["micromet", "micromet.pipeline", "micromet.highfreq"])
+def test_import_stays_within_budget(module):
+    assert _loaded_after_import(module) == []
+
+
+def test_lazy_attributes_resolve():
+    from micromet.format.reformatter import Reformatter
+
+    assert micromet.Reformatter is Reformatter
+    assert micromet.MISSING_VALUE == -9999
+    assert micromet.gap_summary.__name__ == "micromet.report.gap_summary"
+    assert "Reformatter" in dir(micromet)
+    with pytest.raises(AttributeError):
+        micromet.not_a_module
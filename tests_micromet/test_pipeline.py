@@ -1,3 +1,6 @@
+import json
+import tempfile
+import time
 import unittest
 from unittest.mock import MagicMock, patch, mock_open
 from pathlib import Path
@@ -79,5 +82,65 @@ class TestPipeline(unittest.TestCase):
         self.assertEqual(results[0].site_id, 'US-UTW')
         mock_file.assert_called()
 
+    def test_batch_process_parallel_threads(self):
+        def fake_process_file(self_, input_file, output_dir=None, data_type='eddy', site_id=None,
+                              output_tag=None):
+            # Finish the first file last so completion order != file order
+            time.sleep(0.05 if Path(input_file).name.startswith('a') else 0.0)
+            return ProcessingResult(site_id='US-UTW', success=True, input_file=Path(input_file))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            in_dir = Path(tmp) / 'in'
+            in_dir.mkdir()
+            for name in ['a_Flux.dat', 'b_Flux.dat', 'c_Flux.dat']:
+                (in_dir / name).write_text('')
+            out_dir = Path(tmp) / 'out'
+
+            pipeline = Pipeline(config=self.config)
+            with patch.object(Pipeline, 'process_file', fake_process_file):
+                results = pipeline.batch_process(in_dir, out_dir, workers=3, executor='thread')
+
+            self.assertEqual([r.input_file.name for r in results],
+                             ['a_Flux.dat', 'b_Flux.dat', 'c_Flux.dat'])
+            summary = json.loads((out_dir / 'batch_summary.json').read_text())
+            self.assertEqual(summary['n_success'], 3)
+            self.assertTrue(summary['results'][0]['input_file'].endswith('a_Flux.dat'))
+
+    def test_batch_process_real_files_process_pool(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            in_dir = Path(tmp) / 'in'
+            in_dir.mkdir()
+            times = pd.date_range('2024-06-01', periods=96, freq='30min')
+            for day in (0, 2):
+                start = times + pd.Timedelta(days=day)
+                pd.DataFrame({
+                    'TIMESTAMP_START': start.strftime('%Y%m%d%H%M'),
+                    'TIMESTAMP_END': (start + pd.Timedelta('30min')).strftime('%Y%m%d%H%M'),
+                    'TA_1_1_1': 20 + np.sin(np.arange(96) / 8),
+                    'LE': 100.0,
+                    'H': 50.0,
+                }).to_csv(in_dir / f'US-UTW_Flux_AmeriFluxFormat_{day}.dat', index=False)
+            out_dir = Path(tmp) / 'out'
+
+            config = PipelineConfig(check_timestamps=False, generate_plots=False)
+            results = Pipeline(config=config).batch_process(
+                in_dir, out_dir, workers=2, executor='process'
+            )
+
+            self.assertTrue(all(r.success for r in results), [r.error_message for r in results])
+            # Files of one station processed concurrently keep separate outputs
+            self.assertEqual(len({r.output_file for r in results}), 2)
+            self.assertTrue(all(r.output_file.exists() for r in results))
+            self.assertEqual(len(list((out_dir / 'reports' / 'US-UTW').glob('limits_*.csv'))), 2)
+            summary = json.loads((out_dir / 'batch_summary.json').read_text())
+            self.assertEqual(summary['n_success'], 2)
+            self.assertEqual(summary['results'][0]['reports']['limits']['n_rows'],
+                             len(results[0].reports['limits']))
+
+    def test_iter_process_files_rejects_unknown_executor(self):
+        pipeline = Pipeline(config=self.config)
+        with self.assertRaises(ValueError):
+            list(pipeline.iter_process_files([Path('a.dat')], executor='gpu'))
+
 if __name__ == '__main__':
     unittest.main()
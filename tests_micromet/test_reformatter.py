@@ -125,3 +125,143 @@ def test_reformatter_prepare(sample_reformatter_df):
 
     # Test physical limits (value should be -9999 after fillna)
     assert df.loc[df['TIMESTAMP_START'] == 202401010000, 'TA'].iloc[0] == -9999
+
+def _engine_input():
+    times = pd.date_range('2024-01-01 00:30', periods=12, freq='30min').delete(4)
+    stamps = times.strftime('%Y%m%d%H%M')
+    n = len(times)
+    return pd.DataFrame({
+        'TIMESTAMP_START': stamps,
+        'TIMESTAMP_END': stamps,
+        'RECORD': np.arange(n),
+        'Ta': [25.5, 100.0, -9999, 24.9, np.nan, 20.0, 21.0, 22.0, 23.0, 24.0, 25.0],
+        'TA': [1.0, 2.0, 3.0, -9999, 5.0, 6.0, 7.0, 8.0, 9.0, 10.0, 11.0],
+        'Tau': [0.1, 0.0, 0.2, 0.3, 0.4, 0.5, 0.0, 0.1, 0.2, 0.3, 0.4],
+        'u_star': np.linspace(0.1, 1.0, n),
+        'SWC_1_1_1': np.linspace(0.1, 0.5, n),
+        'FC_SSITC_TEST': [0, 1, 4, 5, 7, 9, 2, 3, 6, 8, 0],
+        'some_other_var': np.arange(n) * 2,
+    })
+
+@pytest.mark.parametrize("interval,drop_soil", [(30, True), (60, False)])
+def test_columnar_engine_matches_pandas(interval, drop_soil):
+    df = _engine_input()
+    expected, expected_report, _ = Reformatter(drop_soil=drop_soil).process(
+        df.copy(), interval=interval
+    )
+    result, report, _ = Reformatter(drop_soil=drop_soil, engine='columnar').process(
+        df.copy(), interval=interval
+    )
+
+    assert result.to_csv() == expected.to_csv()
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+    pd.testing.assert_frame_equal(
+        report.reset_index(drop=True), expected_report.reset_index(drop=True)
+    )
+
+def test_reformatter_rejects_unknown_engine():
+    with pytest.raises(ValueError):
+        Reformatter(engine='spark')
+
+def test_read_fast_toa5_dtypes(sample_toa5_file):
+    processor = AmerifluxDataProcessor()
+    df = processor.read_fast(sample_toa5_file, float_dtype="float32")
+    # RECORD is in reformatter_vars drop_cols and is not read at all
+    assert list(df.columns) == ["TIMESTAMP", "STAT_1", "STAT_2"]
+    assert pd.api.types.is_datetime64_any_dtype(df["TIMESTAMP"])
+    assert df["STAT_1"].dtype == np.float32
+    assert pd.isna(df.loc[2, "STAT_1"])
+
+def test_read_fast_keeps_record_when_asked(sample_toa5_file):
+    processor = AmerifluxDataProcessor()
+    df = processor.read_fast(sample_toa5_file, skip_drop_cols=False)
+    standard = processor.to_dataframe(sample_toa5_file)
+    assert df["RECORD"].dtype == np.int64
+    pd.testing.assert_frame_equal(
+        df.drop(columns="TIMESTAMP"), standard.drop(columns="TIMESTAMP"), check_dtype=False
+    )
+    assert (df["TIMESTAMP"] == pd.to_datetime(standard["TIMESTAMP"])).all()
+
+def test_read_fast_drop_cols_match_exactly(tmp_path):
+    # "datetime_end" is a lowercase drop_cols entry; drop_extras never
+    # matches it against the uppercased names, so it must be kept
+    file_path = tmp_path / "dt_end.dat"
+    file_path.write_text(
+        '"TIMESTAMP_START","TIMESTAMP_END","DATETIME_END","RECORD","VAR_1"\n'
+        '"202401010000","202401010030",1,1,1.1\n'
+    )
+    df = AmerifluxDataProcessor().read_fast(file_path)
+    assert list(df.columns) == ["TIMESTAMP_START", "TIMESTAMP_END", "DATETIME_END", "VAR_1"]
+
+def test_read_fast_ameriflux_matches_standard(sample_ameriflux_file):
+    processor = AmerifluxDataProcessor()
+    fast = processor.to_dataframe(sample_ameriflux_file, fast=True)
+    standard = processor.to_dataframe(sample_ameriflux_file)
+    assert fast["TIMESTAMP_START"].dtype == np.int64
+    pd.testing.assert_frame_equal(fast, standard, check_dtype=False)
+
+def test_read_fast_falls_back_on_text_columns(tmp_path):
+    file_path = tmp_path / "text_col.dat"
+    file_path.write_text(
+        '"TIMESTAMP_START","TIMESTAMP_END","NOTE","VAR_1"\n'
+        '"202401010000","202401010030","ok",1.1\n'
+    )
+    df = AmerifluxDataProcessor().read_fast(file_path)
+    assert df.loc[0, "NOTE"] == "ok"
+    assert df.loc[0, "VAR_1"] == pytest.approx(1.1)
+
+
+def test_rating_array_matches_rating():
+    from micromet.format.transformers import rating, rating_array, scale_and_convert
+
+    values = np.array(
+        [np.nan, -1.0, 0.0, 1.5, 3.0, 3.5, 4.0, 5.0, 6.0, 6.5, 7.0, 9.0, np.inf]
+    )
+    expected = [rating(v) for v in values]
+    assert rating_array(values).tolist() == expected
+    assert rating_array(values.reshape(-1, 1))[:, 0].tolist() == expected
+
+    column = pd.Series(values, index=np.arange(10, 23), name='FC_SSITC_TEST')
+    pd.testing.assert_series_equal(scale_and_convert(column), column.apply(rating))
+
+
+def test_ssitc_scale_rescales_columns_in_bulk():
+    import logging
+    from micromet.format.transformers import rating, ssitc_scale
+
+    df = pd.DataFrame({
+        'FC_SSITC_TEST': [0, 4, 7, 9],
+        'LE_SSITC_TEST': [0.0, 1.0, np.nan, 2.0],
+        'H_SSITC_TEST': [np.nan, 5.0, 8.0, 3.0],
+        'TA': [10.0, 11.0, 12.0, 13.0],
+    })
+    expected = df.copy()
+    for column in ('FC_SSITC_TEST', 'H_SSITC_TEST'):
+        expected[column] = expected[column].apply(rating)
+
+    result = ssitc_scale(df.copy(), logging.getLogger(__name__))
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_fill_na_drop_dups_coalesces_in_precedence_order():
+    from micromet.format.transformers import fill_na_drop_dups
+
+    df = pd.DataFrame({
+        'B.3': [np.nan, 11.0, 12.0, -9999.0],
+        'A': [1, -9999, 3, -9999],
+        'NOTE': ['x', None, 'y', 'z'],
+        'A.2': [-9999.0, 9.0, np.nan, -9999.0],
+        'A.1': [np.nan, 2.0, -9999.0, np.nan],
+        'B.1': [10.0, -9999.0, np.nan, np.inf],
+        'C': [1, 2, 3, 4],
+        'C.1': [5, 6, 7, 8],
+    })
+    result = fill_na_drop_dups(df)
+
+    assert list(result.columns) == ['A', 'NOTE', 'C', 'B']
+    assert result['A'].tolist() == [1.0, 2.0, 3.0, -9999.0]
+    assert result['B'].tolist() == [10.0, 11.0, 12.0, np.inf]
+    assert result['NOTE'].tolist() == ['x', -9999, 'y', 'z']
+    assert result['C'].dtype == np.int64
+    assert result['C'].tolist() == [1, 2, 3, 4]
+    assert list(df.columns)[:2] == ['B.3', 'A']  # input left alone
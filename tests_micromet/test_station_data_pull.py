@@ -0,0 +1,386 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+import pytest
+import requests
+import sqlalchemy
+
+import micromet.station_data_pull as station_data_pull
+from micromet.station_data_pull import StationDataDownloader, StationDataProcessor
+
+TOA5 = (
+    '"TOA5","UTD","CR6","1","CR6.Std","CPU:flux.cr6","1","Flux_AmeriFluxFormat"\n'
+    '"TIMESTAMP_START","TIMESTAMP_END","H"\n'
+    '"","",""\n'
+    '"","","Avg"\n'
+    "202501010000,202501010030,10.5\n"
+    "202501010030,202501010100,12.0\n"
+)
+
+
+def _toa5_range(p1, p2):
+    """TOA5 body with half-hourly records in [p1, p2)."""
+    stamps = pd.date_range(p1, p2, freq="30min", inclusive="left")
+    lines = [
+        '"TOA5","UTD","CR6","1","CR6.Std","CPU:flux.cr6","1","Flux_AmeriFluxFormat"',
+        '"TIMESTAMP","RECORD","TIMESTAMP_START","TIMESTAMP_END","H"',
+        '"TS","RN","","","W/m^2"',
+        '"","","","","Avg"',
+    ]
+    for i, ts in enumerate(stamps):
+        start = ts - pd.Timedelta("30min")
+        lines.append(f'"{ts}",{i},{start:%Y%m%d%H%M},{ts:%Y%m%d%H%M},{i % 7}')
+    return "\n".join(lines) + "\n"
+
+
+class StubLogger:
+    """State shared by the stub logger HTTP handler."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = []
+        self.fail_first = 0
+        self.delay = {}
+        self.active = 0
+        self.max_active = 0
+        self.drop_after = None
+
+
+def _handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body, content_type="text/plain"):
+            body = body.encode()
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = {k: v[0] for k, v in parse_qs(url.query).items()}
+            uri = params.get("uri", "")
+            with state.lock:
+                state.requests.append((url.path, params))
+                n_requests = len(state.requests)
+                state.active += 1
+                state.max_active = max(state.max_active, state.active)
+            try:
+                time.sleep(state.delay.get(uri, 0.0))
+                if n_requests <= state.fail_first:
+                    self._send(503, "busy")
+                elif params.get("command") == "ClockCheck":
+                    body = json.dumps({"time": "2025-01-01 01:00:00"})
+                    self._send(200, body, "application/json")
+                elif params.get("mode") == "date-range":
+                    body = _toa5_range(params["p1"], params["p2"])
+                    if state.drop_after is not None:
+                        # announce the full body, send part of it, hang up
+                        cut, state.drop_after = state.drop_after, None
+                        self.send_response(200)
+                        self.send_header("Content-Length", str(len(body)))
+                        self.end_headers()
+                        self.wfile.write(body[:cut].encode())
+                        self.close_connection = True
+                    else:
+                        self._send(200, body)
+                else:
+                    self._send(200, TOA5)
+            finally:
+                with state.lock:
+                    state.active -= 1
+
+    return Handler
+
+
+@pytest.fixture
+def stub_logger():
+    """Run a local HTTP server that mimics a Campbell logger web API."""
+    state = StubLogger()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _handler(state))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    state.port = server.server_address[1]
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+def _config(port, stations=("UTD",)):
+    config = {"LOGGER": {"login": "u", "pw": "p"}}
+    for station in stations:
+        config[station] = {"ip": "127.0.0.1", "eddy": "1", "eddy_port": str(port)}
+    return config
+
+
+def test_download_from_station_uses_pooled_session(stub_logger):
+    with StationDataDownloader(_config(stub_logger.port)) as sdm:
+        logger_time, _ = sdm.get_times("UTD")
+        df, pack_size, status = sdm.download_from_station("UTD", p1="2025-01-01")
+        assert sdm._session("UTD") is sdm._session("UTD", "eddy")
+        assert len(sdm._sessions) == 1
+
+    assert logger_time == "2025-01-01 01:00:00"
+    assert status == 200
+    assert df["H"].tolist() == [10.5, 12.0]
+    assert pack_size > 0
+    path, params = stub_logger.requests[-1]
+    assert path == "/tables.html"
+    assert params["uri"] == "dl:Flux_AmeriFluxFormat"
+
+
+def test_download_retries_busy_logger(stub_logger):
+    stub_logger.fail_first = 2
+    sdm = StationDataDownloader(_config(stub_logger.port), backoff_factor=0)
+    df, _, status = sdm.download_from_station("UTD", p1="2025-01-01")
+    assert status == 200
+    assert len(df) == 2
+    assert len(stub_logger.requests) == 3
+
+
+def test_download_gives_up_after_retries(stub_logger):
+    stub_logger.fail_first = 10
+    sdm = StationDataDownloader(_config(stub_logger.port), retries=1, backoff_factor=0)
+    df, pack_size, status = sdm.download_from_station("UTD", p1="2025-01-01")
+    assert (df, pack_size, status) == (None, None, 503)
+    assert len(stub_logger.requests) == 2
+
+
+def test_hung_logger_times_out(stub_logger):
+    stub_logger.delay["dl:Flux_AmeriFluxFormat"] = 2.0
+    sdm = StationDataDownloader(_config(stub_logger.port), timeout=0.2, retries=0)
+    with pytest.raises(requests.exceptions.RequestException):
+        sdm.download_from_station("UTD", p1="2025-01-01")
+
+
+@pytest.fixture
+def keyed_engine():
+    engine = sqlalchemy.create_engine("sqlite:///:memory:")
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "CREATE TABLE amfluxeddy (stationid TEXT, timestamp_end INTEGER, "
+            "h REAL, le REAL, UNIQUE (stationid, timestamp_end))"
+        )
+    return engine
+
+
+def test_upsert_records_merges_in_database(keyed_engine):
+    sdp = StationDataProcessor(_config(0), keyed_engine)
+    first = pd.DataFrame(
+        {
+            "stationid": ["UTD", "UTD", "UTE"],
+            "timestamp_end": [1, 2, 1],
+            "h": [1.0, 2.0, 3.0],
+            "le": [10.0, 20.0, 30.0],
+        }
+    )
+    second = pd.DataFrame(
+        {
+            "stationid": ["UTD", "UTD", "UTD"],
+            "timestamp_end": [2, 3, 3],
+            "h": [2.5, float("nan"), 4.0],
+            "le": [25.0, 35.0, 40.0],
+        }
+    )
+    # (inserted, updated); the duplicate key 3 in `second` is sent once
+    assert sdp.upsert_records(first, "amfluxeddy") == (3, 0)
+    assert sdp.upsert_records(second, "amfluxeddy") == (1, 1)
+
+    stored = pd.read_sql(
+        "SELECT * FROM amfluxeddy ORDER BY stationid, timestamp_end", keyed_engine
+    )
+    assert len(stored) == 4
+    assert stored["h"].tolist() == [1.0, 2.5, 4.0, 3.0]
+    assert stored["le"].tolist() == [10.0, 25.0, 40.0, 30.0]
+
+    with pytest.raises(ValueError):
+        sdp.upsert_records(first.drop(columns="stationid"), "amfluxeddy")
+
+
+def test_station_queries_are_parameterized(keyed_engine):
+    sdp = StationDataProcessor(_config(0), keyed_engine)
+    sdp.upsert_records(
+        pd.DataFrame({"stationid": ["O'X", "UTD"], "timestamp_end": [5, 9]}),
+        "amfluxeddy",
+    )
+    assert sdp.get_max_date("O'X") == 5
+    df = pd.DataFrame({"TIMESTAMP_END": [5, 6]})
+    assert sdp.compare_sql_to_station(df, "O'X")["TIMESTAMP_END"].tolist() == [6]
+
+
+def test_process_station_data_fetches_concurrently(stub_logger, monkeypatch):
+    stub_logger.delay["dl:Flux_AmeriFluxFormat"] = 0.3
+    stations = ("UTD", "UTE", "UTW", "UTJ")
+    engine = sqlalchemy.create_engine("sqlite:///:memory:")
+    pd.DataFrame(
+        {"stationid": ["UTD"], "timestamp_start": [0], "timestamp_end": [202501010030]}
+    ).to_sql("amfluxeddy", engine, index=False)
+
+    class PassThrough:
+        """Stand-in with the real ``Reformatter`` signatures."""
+
+        def __init__(
+            self,
+            var_limits_csv=None,
+            drop_soil=True,
+            check_timestamps=False,
+            site_lat=None,
+            site_lon=None,
+            site_utc_offset=-7,
+            logger=None,
+            engine="pandas",
+        ):
+            pass
+
+        def prepare(self, df, interval=30, data_type="eddy"):
+            return df, pd.DataFrame()
+
+    monkeypatch.setattr(station_data_pull, "Reformatter", PassThrough)
+    sdp = StationDataProcessor(_config(stub_logger.port, stations), engine)
+    monkeypatch.setattr(sdp, "get_max_date", lambda *a, **k: pd.Timestamp("2025-01-01"))
+    uploads = {}
+    monkeypatch.setattr(
+        sdp,
+        "_upload_to_database",
+        lambda df, stats, dat: (uploads.setdefault(stats["stationid"], len(df)), 0),
+    )
+
+    sdp.process_station_data({f"US-{s}": s for s in stations})
+
+    assert stub_logger.max_active > 1
+    assert uploads == {"US-UTD": 2, "US-UTE": 2, "US-UTW": 2, "US-UTJ": 2}
+
+
+def test_iter_station_chunks_windows_and_chunks(stub_logger):
+    sdm = StationDataDownloader(_config(stub_logger.port))
+    chunks = list(
+        sdm.iter_station_chunks(
+            "UTD", start="2025-01-01", end="2025-01-03", window="1D", chunksize=10
+        )
+    )
+
+    windows = [(p["p1"], p["p2"]) for _, p in stub_logger.requests]
+    assert windows == [
+        ("2025-01-01T00:00:00", "2025-01-02T00:00:00"),
+        ("2025-01-02T00:00:00", "2025-01-03T00:00:00"),
+    ]
+    assert max(len(c) for c in chunks) == 10
+    df = pd.concat(chunks)
+    assert len(df) == 96
+    assert pd.to_datetime(df["TIMESTAMP"]).is_monotonic_increasing
+    assert sum(c.attrs["pack_size"] for c in chunks) > 0
+
+
+def test_stream_station_data_resumes_from_checkpoint(stub_logger, monkeypatch):
+    engine = sqlalchemy.create_engine("sqlite:///:memory:")
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "CREATE TABLE amfluxeddy (stationid TEXT, timestamp_start INTEGER, "
+            "timestamp_end INTEGER, h REAL, UNIQUE (stationid, timestamp_end))"
+        )
+    sdp = StationDataProcessor(_config(stub_logger.port), engine, backoff_factor=0)
+    # the first data request dies part way through the first day
+    stub_logger.drop_after = 1500
+
+    uploaded = sdp.stream_station_data(
+        "US-UTD",
+        start="2025-01-01",
+        end="2025-01-03",
+        window="1D",
+        chunksize=10,
+        reformat=False,
+    )
+
+    stored = pd.read_sql("SELECT stationid, timestamp_end FROM amfluxeddy", engine)
+    assert len(stored) == 96
+    assert stored["timestamp_end"].is_unique
+    assert set(stored["stationid"]) == {"UTD"}
+    # the record at the checkpoint is sent twice and merged by the upsert
+    assert uploaded == 97
+    data_requests = [p for _, p in stub_logger.requests if p.get("mode")]
+    assert len(data_requests) == 3
+    assert data_requests[1]["p1"] > "2025-01-01T00:00:00"
+
+
+@pytest.fixture
+def merge_engine():
+    engine = sqlalchemy.create_engine("sqlite:///:memory:")
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "CREATE TABLE amfluxeddy (stationid TEXT, timestamp_start INTEGER, "
+            "timestamp_end INTEGER, h REAL, netrad REAL, "
+            "UNIQUE (stationid, timestamp_end))"
+        )
+        conn.exec_driver_sql(
+            "CREATE TABLE amfluxmet (stationid TEXT, timestamp_start INTEGER, "
+            "timestamp_end INTEGER, netrad REAL, swc_1_1_1 REAL, "
+            "UNIQUE (stationid, timestamp_end))"
+        )
+    return engine
+
+
+def test_merged_table_refreshes_uploaded_intervals(merge_engine):
+    sdp = StationDataProcessor(_config(0), merge_engine)
+    sdp.upsert_records(
+        pd.DataFrame(
+            {
+                "stationid": ["UTD", "UTD"],
+                "timestamp_start": [0, 30],
+                "timestamp_end": [30, 100],
+                "h": [1.0, 2.0],
+                "netrad": [10.0, 20.0],
+            }
+        ),
+        "amfluxeddy",
+    )
+    sdp.upsert_records(
+        pd.DataFrame(
+            {
+                "stationid": ["UTD", "UTD"],
+                "timestamp_start": [30, 100],
+                "timestamp_end": [100, 130],
+                "netrad": [21.0, 31.0],
+                "swc_1_1_1": [0.2, 0.3],
+            }
+        ),
+        "amfluxmet",
+    )
+    sdp.create_merged_table()
+
+    merged = sdp.read_merged("UTD")
+    assert merged["timestamp_end"].tolist() == [30, 100, 130]
+    assert merged["netrad"].tolist()[:2] == [10.0, 20.0]
+    assert merged["met_netrad"].tolist()[1:] == [21.0, 31.0]
+    assert merged["timestamp_start"].tolist() == [0, 30, 100]
+    assert pd.isna(merged.loc[2, "h"]) and pd.isna(merged.loc[0, "swc_1_1_1"])
+
+    # an upload refreshes only its own interval
+    with merge_engine.begin() as conn:
+        conn.exec_driver_sql("UPDATE amfluxeddy SET h = -1 WHERE timestamp_end = 30")
+    stats = {"stationid": "US-UTD", "talbetype": "eddy"}
+    assert sdp._upload_to_database(
+        pd.DataFrame(
+            {"stationid": ["UTD"], "timestamp_end": [130], "h": [3.0], "netrad": [30.0]}
+        ),
+        stats,
+        "eddy",
+    ) == (1, 0)
+    assert (
+        pd.read_sql("SELECT uploaddf_len FROM uploadstats", merge_engine).iloc[0, 0]
+        == 1
+    )
+
+    merged = sdp.read_merged("UTD", start=100, end=130, columns=["h", "met_netrad"])
+    assert list(merged.columns) == ["stationid", "timestamp_end", "h", "met_netrad"]
+    assert merged["h"].tolist() == [2.0, 3.0]
+    assert merged["met_netrad"].tolist() == [21.0, 31.0]
+    assert sdp.read_merged("UTD", end=30)["h"].tolist() == [1.0]
@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from micromet import tob1
+from micromet.reader import AmerifluxDataProcessor
+
+
+def _write_tob1(path, names, units, processing, types, records):
+    header = [
+        ["TOB1", "1234", "CR1000X", "1234", "CR1000X.Std.05.01", "CPU:test.cr1x", "1", "Flux_CSFormat"],
+        names,
+        units,
+        processing,
+        types,
+    ]
+    with open(path, "wb") as fp:
+        for line in header:
+            fp.write((",".join(f'"{v}"' for v in line) + "\r\n").encode("ascii"))
+        fp.write(records.tobytes())
+    return path
+
+
+@pytest.fixture
+def sample_tob1_file(tmp_path):
+    names = ["SECONDS", "NANOSECONDS", "RECORD", "TA", "RH", "FLAG", "NOTE"]
+    types = ["ULONG", "ULONG", "ULONG", "IEEE4", "FP2", "LONG", "ASCII(8)"]
+    dtype = tob1.tob1_dtype(names, types)
+    records = np.zeros(3, dtype=dtype)
+    start = (pd.Timestamp("2024-06-19 12:00") - tob1.CAMPBELL_EPOCH).total_seconds()
+    records["SECONDS"] = int(start) + np.arange(3) * 1800
+    records["NANOSECONDS"] = [0, 0, 500_000_000]
+    records["RECORD"] = [10, 11, 12]
+    records["TA"] = [21.5, np.nan, -3.25]
+    # FP2: 45.6 -> 1 decimal, mantissa 456; -1.23 -> sign, 2 decimals; NaN
+    records["RH"] = [(1 << 13) | 456, 0x8000 | (2 << 13) | 123, 0x9FFE]
+    records["FLAG"] = [-1, 0, 7]
+    records["NOTE"] = [b"ok", b"Kljun\x00er", b"full8chr"]
+    units = ["SECONDS", "NANOSECONDS", "RN", "deg C", "%", "", ""]
+    processing = ["", "", "", "Avg", "Smp", "Smp", "Smp"]
+    return _write_tob1(tmp_path / "sample_tob1.dat", names, units, processing, types, records)
+
+
+def test_read_tob1_header(sample_tob1_file):
+    header = tob1.read_tob1_header(sample_tob1_file)
+    assert header.names[:3] == ["SECONDS", "NANOSECONDS", "RECORD"]
+    assert header.types[-1] == "ASCII(8)"
+    assert header.dtype.itemsize == 4 * 3 + 4 + 2 + 4 + 8
+
+
+def test_read_tob1_values(sample_tob1_file):
+    df = tob1.read_tob1(sample_tob1_file)
+    assert list(df.columns) == ["TIMESTAMP", "RECORD", "TA", "RH", "FLAG", "NOTE"]
+    assert df["TIMESTAMP"].iloc[0] == pd.Timestamp("2024-06-19 12:00")
+    assert df["TIMESTAMP"].iloc[2] == pd.Timestamp("2024-06-19 13:00:00.5")
+    assert df["RECORD"].tolist() == [10, 11, 12]
+    assert df["TA"].iloc[0] == pytest.approx(21.5)
+    assert np.isnan(df["TA"].iloc[1])
+    np.testing.assert_allclose(df["RH"].to_numpy()[:2], [45.6, -1.23], rtol=1e-6)
+    assert np.isnan(df["RH"].iloc[2])
+    assert df["FLAG"].tolist() == [-1, 0, 7]
+    assert df["NOTE"].tolist() == ["ok", "Kljun", "full8chr"]
+
+
+def test_read_tob1_without_memmap(sample_tob1_file):
+    mapped = tob1.read_tob1(sample_tob1_file, timestamp=False)
+    loaded = tob1.read_tob1(sample_tob1_file, timestamp=False, memmap=False)
+    assert "SECONDS" in mapped.columns
+    pd.testing.assert_frame_equal(mapped, loaded)
+
+
+def test_decode_fp2_infinity():
+    values = tob1.decode_fp2(np.array([0x1FFF, 0x9FFF, 0], dtype=np.uint16))
+    assert values[0] == np.inf
+    assert values[1] == -np.inf
+    assert values[2] == 0
+
+
+def test_read_tob1_rejects_truncated_records(sample_tob1_file):
+    with open(sample_tob1_file, "ab") as fp:
+        fp.write(b"\x00\x01")
+    with pytest.raises(ValueError):
+        tob1.read_tob1(sample_tob1_file)
+
+
+def test_tob1_dtype_unknown_type():
+    with pytest.raises(ValueError):
+        tob1.tob1_dtype(["A"], ["WEIRD"])
+
+
+def test_processor_reads_tob1(sample_tob1_file):
+    processor = AmerifluxDataProcessor()
+    df = processor.to_dataframe(sample_tob1_file)
+    assert df.shape == (3, 6)
+    fast = processor.read_fast(sample_tob1_file)
+    assert "RECORD" not in fast.columns
+
+
+def test_iter_tob1_chunks_match_read(sample_tob1_file):
+    expected = tob1.read_tob1(sample_tob1_file)
+    chunks = list(tob1.iter_tob1(sample_tob1_file, chunksize=2))
+    assert [len(c) for c in chunks] == [2, 1]
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), expected)
+
+    tail = list(tob1.iter_tob1(sample_tob1_file, start=1, stop=3))
+    pd.testing.assert_frame_equal(
+        tail[0], expected.iloc[1:].reset_index(drop=True)
+    )
@@ -6,7 +6,10 @@ from micromet.report.validate import (
     validate_timestamp_consistency,
     find_zero_chunks,
     compare_names_to_ameriflux,
-    data_diff_check
+    data_diff_check,
+    review_lags,
+    detect_sectional_offsets_indexed,
+    detect_sectional_offsets_pairs
 )
 
 class TestValidate(unittest.TestCase):
@@ -55,5 +58,49 @@ class TestValidate(unittest.TestCase):
         diff = data_diff_check(df1, df2)
         self.assertEqual(diff.loc['VAR', 'percent_different'], 10.0)
 
+    def _logger_pair(self, seed=0):
+        rng = np.random.default_rng(seed)
+        times = pd.date_range('2024-01-01', periods=24 * 30, freq='h')
+        x = 10 * np.sin(2 * np.pi * np.arange(len(times)) / 24) + rng.normal(0, 1, len(times)).cumsum()
+        y = x + rng.normal(0, 0.5, len(times))
+        y[: len(times) // 2] = np.roll(y, 2)[: len(times) // 2]  # clock 2 h slow at first
+        x[rng.random(len(times)) < 0.1] = np.nan
+        y[300:340] = np.nan
+        return pd.DataFrame({'TA': x}, index=times), pd.DataFrame({'TA_2': y}, index=times)
+
+    def test_detect_sectional_offsets_matches_loop(self):
+        df1, df2 = self._logger_pair()
+        result = detect_sectional_offsets_indexed(df1, df2, 'TA', 'TA_2', max_lag=6, window_size='5D')
+
+        s1, s2 = df1['TA'], df2['TA_2']
+        both = pd.DataFrame({'s1': s1, 's2': s2}).dropna()
+        lags = np.arange(-6, 7)
+        starts = pd.date_range(both.index.min(), both.index.max(), freq='5D')
+        self.assertListEqual(list(result['window_start']), list(starts))
+        for _, row in result.iterrows():
+            seg = both.loc[row['window_start']:row['window_start'] + pd.Timedelta('5D')]
+            corr = [seg['s1'].corr(seg['s2'].shift(lag)) for lag in lags]
+            self.assertEqual(row['best_lag'], lags[np.nanargmax(corr)])
+            self.assertAlmostEqual(row['correlation'], np.nanmax(corr), places=10)
+        self.assertEqual(result['best_lag'].iloc[0], -2)
+        self.assertEqual(result['best_lag'].iloc[-1], 0)
+
+    def test_detect_sectional_offsets_pairs(self):
+        pairs = {name: self._logger_pair(seed) for seed, name in enumerate(['US-UTW', 'US-UTE'])}
+        serial = detect_sectional_offsets_pairs(pairs, 'TA', 'TA_2', max_lag=6, window_size='5D')
+        parallel = detect_sectional_offsets_pairs(pairs, 'TA', 'TA_2', max_lag=6, window_size='5D', workers=2)
+        self.assertListEqual(list(serial), ['US-UTW', 'US-UTE'])
+        for name, (df1, df2) in pairs.items():
+            expected = detect_sectional_offsets_indexed(df1, df2, 'TA', 'TA_2', max_lag=6, window_size='5D')
+            pd.testing.assert_frame_equal(serial[name], expected)
+            pd.testing.assert_frame_equal(parallel[name], expected)
+
+    def test_review_lags(self):
+        df1, df2 = self._logger_pair()
+        correlations, lag, value = review_lags(df1['TA'], df2['TA_2'], max_lag=4)
+        expected = [df1['TA'].corr(df2['TA_2'].shift(k)) for k in range(-4, 5)]
+        np.testing.assert_allclose(correlations, expected, rtol=1e-9)
+        self.assertEqual(lag, int(np.argmax(np.abs(expected))) - 4)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from micromet.format.transformers import validation
+from micromet.format.transformers.validation import (
+    apply_physical_limits,
+    limit_plan,
+    mask_stuck_values,
+    match_limit_keys,
+)
+
+
+@pytest.fixture
+def limits():
+    return {
+        "T": {"Min": -50.0, "Max": 50.0},
+        "TA": {"Min": -40.0, "Max": 40.0},
+        "TA_1": {"Min": -30.0, "Max": 30.0},
+        "SW_IN": {"Min": 0.0, "Max": np.nan},
+    }
+
+
+def test_match_limit_keys_longest_prefix(limits):
+    col_map = match_limit_keys(["TA_1_1_1", "TA_2_1_1", "TS_1_1_1", "RECORD", "X"], limits)
+    assert col_map["TA_1_1_1"]["key"] == "TA_1"
+    assert col_map["TA_2_1_1"]["key"] == "TA"
+    assert col_map["TS_1_1_1"]["key"] == "T"
+    assert "RECORD" not in col_map
+    assert "X" not in col_map
+
+
+def test_match_limit_keys_first_key_when_not_longest(limits):
+    col_map = match_limit_keys(["TA_1_1_1"], limits, prefer_longest_key=False)
+    assert col_map["TA_1_1_1"]["key"] == "T"
+
+
+def test_limit_plan_is_cached(limits):
+    validation._limit_plan.cache_clear()
+    cols = ["TA_1_1_1", "SW_IN_1_1_1"]
+    assert limit_plan(cols, limits) is limit_plan(tuple(cols), limits)
+    assert validation._limit_plan.cache_info().hits == 1
+
+
+def test_apply_physical_limits_masks_and_counts():
+    df = pd.DataFrame({
+        "TA_1_1_1": [10.0, 100.0, -9999.0, -100.0, np.nan],
+        "SW_IN_1_1_1": [-5.0, 0.0, 500.0, 1600.0, 200.0],
+        "RECORD": [1, 2, 3, 4, 5],
+        "NO_LIMITS": [1e9, 2, 3, 4, 5],
+    })
+    out, mask, report = apply_physical_limits(df, return_mask=True)
+
+    assert out["TA_1_1_1"].tolist()[0] == 10.0
+    assert out["TA_1_1_1"].isna().tolist() == [False, True, True, True, True]
+    assert out["RECORD"].dtype == df["RECORD"].dtype
+    assert out["NO_LIMITS"].equals(df["NO_LIMITS"])
+    assert mask.loc[1, "TA_1_1_1"] and not mask.loc[0, "TA_1_1_1"]
+
+    ta = report.set_index("column").loc["TA_1_1_1"]
+    assert (ta["n_below"], ta["n_above"], ta["n_flagged"]) == (1, 1, 2)
+    assert ta["pct_flagged"] == pytest.approx(200.0 / 3)
+
+
+def test_apply_physical_limits_keeps_int_dtype_when_in_bounds():
+    df = pd.DataFrame({"SW_IN_1_1_1": [0, 10, 20]})
+    out, _, report = apply_physical_limits(df)
+    assert out["SW_IN_1_1_1"].dtype == np.int64
+    assert report["n_flagged"].tolist() == [0]
+
+
+def test_mask_stuck_values_runs_and_report():
+    idx = pd.date_range("2024-01-01", periods=9, freq="30min")
+    df = pd.DataFrame({
+        "A": [1.0, 2.0, 2.0, 2.0, np.nan, 2.0, 2.0, 3.0, 3.0],
+        "B": [5.0, 5.0, 5.0, 5.0, 5.0, 6.0, 7.0, 8.0, 9.0],
+        "C": ["x", "x", "x", "y", "y", "y", "y", "z", "z"],
+    }, index=idx)
+    out, report, mask = mask_stuck_values(df, 3, return_mask=True)
+
+    assert mask["A"].tolist() == [False, True, True, True] + [False] * 5
+    assert mask["B"].tolist() == [True] * 5 + [False] * 4
+    assert mask["C"].tolist() == [True] * 7 + [False] * 2
+    assert out["A"].isna().sum() == 4
+    assert report["column"].tolist() == ["A", "B", "C", "C"]
+    assert report["n_rows"].tolist() == [3, 5, 3, 4]
+    assert report.loc[0, "start"] == idx[1]
+    assert report.loc[1, "duration"] == pd.Timedelta("2h")
+
+
+def test_mask_stuck_values_tolerance_rechecks_drift():
+    idx = pd.date_range("2024-01-01", periods=6, freq="1h")
+    df = pd.DataFrame({
+        "flat": [1.0, 1.01, 1.0, 1.01, 1.0, 1.01],
+        "drift": [1.0, 1.01, 1.02, 1.03, 1.04, 1.05],
+    }, index=idx)
+    _, report = mask_stuck_values(df, "3h", tolerance=0.015)
+
+    assert report["column"].tolist() == ["flat"]
+    assert report.loc[0, "threshold_value"] == pd.Timedelta("3h")
+
+
+def test_mask_stuck_values_empty_report():
+    idx = pd.date_range("2024-01-01", periods=4, freq="1h")
+    df = pd.DataFrame({"A": [1.0, 2.0, 3.0, 4.0]}, index=idx)
+    out, report = mask_stuck_values(df, 2)
+
+    assert report.empty
+    assert "column" in report.columns
+    assert out.equals(df)